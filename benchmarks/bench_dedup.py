@@ -0,0 +1,84 @@
+"""
+Benchmark duplicate lookups against indexes of growing size.
+
+Builds the index over synthetic papers, then times find_duplicates for
+slightly reworded titles of indexed papers (as another source would
+publish them) and reports how many of them were found.
+
+Usage: python benchmarks/bench_dedup.py [--sizes N,N,...] [--queries N]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+# add src into path
+sys.path.insert(0, str(project_root / "src"))
+
+from dedup_index import DedupIndex
+from paper_class import Paper
+
+
+def build_vocabulary(size: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(size)]
+
+
+def make_paper(i: int, vocabulary: list, rng: random.Random) -> Paper:
+    return Paper(
+        paper_id=f"2101.{i:05d}",
+        title=" ".join(rng.choice(vocabulary) for _ in range(rng.randint(6, 12))),
+        authors=[" ".join(rng.sample(vocabulary, 2)) for _ in range(4)],
+        src_website="arxiv",
+    )
+
+
+def other_version(paper: Paper) -> Paper:
+    # camera-ready: punctuation and case changes, "Last, First" author names
+    return Paper(
+        paper_id=f"cvf/{paper.paper_id}",
+        title=paper.title.title() + ".",
+        authors=[", ".join(reversed(name.split())) for name in paper.authors],
+        src_website="cvf",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="duplicate index lookups")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = build_vocabulary(20000, rng)
+
+    print(f"{'papers':>8}{'build ms/paper':>16}{'p50 ms':>10}{'p99 ms':>10}{'found':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        papers = [make_paper(i, vocabulary, rng) for i in range(size)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = DedupIndex(Path(tmp_dir) / "dedup_index.sqlite3")
+            start = time.perf_counter()
+            index.build(papers)
+            build_ms = (time.perf_counter() - start) * 1000 / size
+
+            timings = []
+            found = 0
+            for paper in rng.sample(papers, min(args.queries, size)):
+                query = other_version(paper)
+                start = time.perf_counter()
+                duplicates = index.find_duplicates(query)
+                timings.append((time.perf_counter() - start) * 1000)
+                found += any(paper_id == paper.paper_id for paper_id, _ in duplicates)
+            timings.sort()
+            p50 = timings[len(timings) // 2]
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{size:>8}{build_ms:>16.3f}{p50:>10.3f}{p99:>10.3f}{found / len(timings):>8.0%}")
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark the memory footprint and serialization speed of Paper objects.
+
+Papers are decoded from JSON, as they come back from the database, and kept
+alive after the decoded dicts are dropped. Compares Paper and FrozenPaper
+with the previous dict-backed class.
+
+Usage: python benchmarks/bench_paper_memory.py [--size N]
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+# add src into path
+sys.path.insert(0, str(project_root / "src"))
+
+from paper_class import FrozenPaper, Paper
+
+
+class LegacyPaper:
+    """
+    The previous representation: a __dict__ per object and list fields
+    """
+
+    def __init__(
+        self, paper_uid="", paper_id="", title="", authors=[], paper_url="", pdf_url="",
+        abstract="", tldr="", keywords=[], public_comments="", year="", published_at="",
+        bibtex="", src_website="",
+    ):
+        self.paper_uid = paper_uid
+        self.paper_id = paper_id
+        self.title = title
+        self.authors = authors
+        self.paper_url = paper_url
+        self.pdf_url = pdf_url
+        self.abstract = abstract
+        self.tldr = tldr
+        self.keywords = keywords
+        self.public_comments = public_comments
+        self.year = year
+        self.published_at = published_at
+        self.bibtex = bibtex
+        self.src_website = src_website
+        self.first_author = self.authors[0] if self.authors else ""
+
+    def to_dict(self) -> dict:
+        return {
+            "paper_uid": self.paper_uid,
+            "paper_id": self.paper_id,
+            "title": self.title,
+            "authors": self.authors,
+            "paper_url": self.paper_url,
+            "pdf_url": self.pdf_url,
+            "abstract": self.abstract,
+            "tldr": self.tldr,
+            "keywords": self.keywords,
+            "public_comments": self.public_comments,
+            "year": self.year,
+            "published_at": self.published_at,
+            "bibtex": self.bibtex,
+            "src_website": self.src_website,
+            "first_author": self.first_author,
+        }
+
+    @staticmethod
+    def from_dict(src_dict: dict):
+        return LegacyPaper(
+            paper_uid=src_dict.get("paper_uid", ""),
+            paper_id=src_dict.get("paper_id", ""),
+            title=src_dict.get("title", ""),
+            authors=src_dict.get("authors", []),
+            paper_url=src_dict.get("paper_url", ""),
+            pdf_url=src_dict.get("pdf_url", ""),
+            abstract=src_dict.get("abstract", ""),
+            tldr=src_dict.get("tldr", ""),
+            keywords=src_dict.get("keywords", []),
+            public_comments=src_dict.get("public_comments", ""),
+            year=src_dict.get("year", ""),
+            published_at=src_dict.get("published_at", ""),
+            bibtex=src_dict.get("bibtex", ""),
+            src_website=src_dict.get("src_website", ""),
+        )
+
+
+def make_record(i: int) -> dict:
+    paper_id = f"{2000 + i % 100:04d}.{i:05d}"
+    return Paper(
+        paper_id=paper_id,
+        title=f"Paper number {i} on representation learning",
+        authors=[f"Author {i}-{j}" for j in range(5)],
+        paper_url=f"https://arxiv.org/abs/{paper_id}",
+        pdf_url=f"https://arxiv.org/pdf/{paper_id}.pdf",
+        abstract="We study representation learning. " * 8,
+        keywords=["deep learning", "representation"],
+        year=str(2010 + i % 12),
+        src_website=("arxiv", "cvf", "openreview")[i % 3],
+    ).to_dict()
+
+
+def bytes_per_object(cls, blob: str, size: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    records = json.loads(blob)
+    papers = [cls.from_dict(record) for record in records]
+    del records
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del papers
+    return current / size
+
+
+def ops_per_sec(func, inputs) -> float:
+    start = time.perf_counter()
+    for arg in inputs:
+        func(arg)
+    return len(inputs) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paper memory and serialization")
+    parser.add_argument("--size", type=int, default=100000)
+    args = parser.parse_args()
+
+    blob = json.dumps([make_record(i) for i in range(args.size)])
+    records = json.loads(blob)
+
+    print(f"{'class':<14}{'bytes/object':>14}{'from_dict/s':>14}{'to_dict/s':>14}")
+    for cls in (LegacyPaper, Paper, FrozenPaper):
+        memory = bytes_per_object(cls, blob, args.size)
+        from_rate = ops_per_sec(cls.from_dict, records)
+        papers = [cls.from_dict(record) for record in records]
+        to_rate = ops_per_sec(cls.to_dict, papers)
+        print(f"{cls.__name__:<14}{memory:>14,.0f}{from_rate:>14,.0f}{to_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark the page parsers against the previous full-tree html.parser
+implementation on the stored page fixtures in tests/fixtures.
+
+Usage: python benchmarks/bench_parsers.py [--repeat N]
+"""
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+fixtures_dir = project_root / "tests" / "fixtures"
+# add src into path
+sys.path.insert(0, str(project_root / "src"))
+
+from page_parsers import (
+    HTML_PARSER,
+    parse_arxiv_page,
+    parse_cvf_page,
+    parse_openreview_page,
+)
+
+###########################################################
+# previous implementation: full BeautifulSoup tree with html.parser
+
+
+def legacy_parse_arxiv_page(page, tmp_paper_dict):
+    soup = BeautifulSoup(page, "html.parser")
+    result = soup.find("h1", class_="title mathjax")
+    tmp_paper_dict["title"] = [i.string for i in result].pop()
+    result = soup.find("div", class_="authors")
+    author_list = [i.string.strip() for i in result]
+    author_list.pop(0)
+    while "," in author_list:
+        author_list.remove(",")
+    tmp_paper_dict["authors"] = author_list
+    result = soup.find("blockquote", class_="abstract mathjax")
+    tmp_paper_dict["abstract"] = " ".join([i.string for i in result].pop().split("\n"))
+    result = soup.find("td", class_="tablecell comments mathjax")
+    if result:
+        comments = " ".join([i.string.strip() if i.string else "" for i in result])
+    else:
+        comments = ""
+    tmp_paper_dict["comments"] = comments
+    return tmp_paper_dict
+
+
+def legacy_parse_cvf_page(page, tmp_paper_dict):
+    soup = BeautifulSoup(page, "html.parser")
+    result = soup.find("div", id="papertitle")
+    tmp_paper_dict["title"] = [i.string for i in result].pop().strip()
+    result = soup.find("div", id="authors")
+    authors_str = str(result.contents[2])[6:-8]
+    tmp_paper_dict["authors"] = [author.lstrip() for author in authors_str.split(",")]
+    result = soup.find("div", id="abstract")
+    paper_abstract = " ".join([i.string for i in result].pop().split("\n"))
+    tmp_paper_dict["abstract"] = paper_abstract.lstrip()
+    result = str(soup.find("div", {"class": "bibref"}))
+    tmp_paper_dict["bibtex"] = result[21:-6].replace("<br/>", "")
+    return tmp_paper_dict
+
+
+def legacy_parse_openreview_page(page, tmp_paper_dict):
+    soup = BeautifulSoup(page, "html.parser")
+    result = soup.find("script", id="__NEXT_DATA__")
+    all_data_json = json.loads(str([i.string for i in result].pop()))
+    data_dict = all_data_json["props"]["pageProps"]["forumNote"]["content"]
+    tmp_paper_dict["title"] = data_dict.get("title", "")
+    tmp_paper_dict["keywords"] = data_dict.get("keywords", "")
+    tmp_paper_dict["authors"] = data_dict.get("authors", "")
+    tmp_paper_dict["abstract"] = data_dict.get("abstract", "")
+    if data_dict.get("one-sentence_summary"):
+        tmp_paper_dict["tldr"] = data_dict.get("one-sentence_summary", "")
+    else:
+        tmp_paper_dict["tldr"] = data_dict.get("TL;DR", "")
+    tmp_paper_dict["bibtex"] = data_dict.get("_bibtex", "")
+    return tmp_paper_dict
+
+
+###########################################################
+
+_cases = [
+    ("arxiv", "arxiv_abs_*.html", legacy_parse_arxiv_page, parse_arxiv_page),
+    ("cvf", "cvf_*.html", legacy_parse_cvf_page, parse_cvf_page),
+    ("openreview", "openreview_*.html", legacy_parse_openreview_page, parse_openreview_page),
+]
+
+
+def bench(func, page: str, repeat: int) -> float:
+    """
+    Return the best time per call in milliseconds
+    """
+    timer = timeit.Timer(lambda: func(page, {}))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"parser backend: {HTML_PARSER}")
+    print(f"{'fixture':<50} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, pattern, legacy_func, new_func in _cases:
+        for fixture_fp in sorted(fixtures_dir.glob(pattern)):
+            page = fixture_fp.read_text()
+            legacy_result = legacy_func(page, {})
+            new_result = new_func(page, {})
+            for key, value in legacy_result.items():
+                if value != new_result.get(key) and str(value).strip() != new_result.get(key):
+                    print(f"  [{name}] '{key}' differs from legacy parser")
+            legacy_ms = bench(legacy_func, page, args.repeat)
+            new_ms = bench(new_func, page, args.repeat)
+            print(
+                f"{fixture_fp.name:<50} {legacy_ms:>10.3f} {new_ms:>10.3f} {legacy_ms / new_ms:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark /search queries against a user library of synthetic papers.
+
+Reports the time to index the library and the p50/p99 latency of queries
+of one to three terms.
+
+Usage: python benchmarks/bench_search.py [--size N] [--queries N]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+# add src into path
+sys.path.insert(0, str(project_root / "src"))
+
+from paper_class import Paper
+from search_index import SearchIndex
+
+
+def build_vocabulary(size: int, rng: random.Random) -> list:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(size)]
+
+
+def make_paper(i: int, vocabulary: list, rng: random.Random) -> Paper:
+    def words(k: int) -> str:
+        # zipf-like word distribution, a few terms are very common
+        return " ".join(
+            vocabulary[int(rng.paretovariate(1.2)) % len(vocabulary)] for _ in range(k)
+        )
+
+    return Paper(
+        paper_id=f"2101.{i:05d}",
+        title=words(10),
+        authors=[words(2) for _ in range(4)],
+        abstract=words(180),
+        keywords=words(4).split(),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="search index latency")
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = build_vocabulary(20000, rng)
+    papers = [make_paper(i, vocabulary, rng) for i in range(args.size)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = SearchIndex(Path(tmp_dir) / "search_index.sqlite3")
+        start = time.perf_counter()
+        for paper in papers:
+            index.add_paper("bench", paper)
+        elapsed = time.perf_counter() - start
+        print(f"indexed {args.size} papers in {elapsed:.2f} s ({elapsed / args.size * 1000:.2f} ms/paper)")
+
+        timings = []
+        for _ in range(args.queries):
+            query = " ".join(rng.choice(vocabulary[:2000]) for _ in range(rng.randint(1, 3)))
+            start = time.perf_counter()
+            index.search("bench", query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p50 = timings[len(timings) // 2]
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{args.queries} queries: p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
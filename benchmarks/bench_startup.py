@@ -0,0 +1,96 @@
+"""
+Measure the cold import time of the bot modules.
+
+Each module is imported in a fresh interpreter with `python -X importtime`,
+the report lists the wall time of the import, the cumulative import time of
+the module and the imports that took the most time on their own.
+
+Usage: python benchmarks/bench_startup.py [--rounds N] [--top N] [module ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+
+DEFAULT_MODULES = [
+    "url_handlers",
+    "page_parsers",
+    "http_client",
+    "datautils",
+    "paper_scraper",
+    "bot",
+]
+
+
+def import_once(module: str) -> Tuple[float, str]:
+    """
+    Import `module` in a new interpreter, return the wall time (ms) and the
+    -X importtime report
+    """
+    env = dict(os.environ, PYTHONPATH=str(src_dir), PYTHONDONTWRITEBYTECODE="")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(project_root),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1]
+        raise Exception(f"import {module} failed: {error}")
+    return wall_ms, proc.stderr
+
+
+def parse_importtime(report: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Map each imported package to its (self, cumulative) import time in us
+    """
+    timings = {}
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def bench_module(module: str, rounds: int, top: int) -> None:
+    runs: List[Tuple[float, Dict[str, Tuple[int, int]]]] = []
+    for _ in range(rounds):
+        wall_ms, report = import_once(module)
+        runs.append((wall_ms, parse_importtime(report)))
+    # the fastest round has the least noise from the rest of the system
+    wall_ms, timings = min(runs, key=lambda run: run[0])
+    cumulative_ms = timings[module][1] / 1000
+
+    print(f"{module}: wall {wall_ms:.1f} ms, import {cumulative_ms:.1f} ms")
+    heaviest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)
+    for name, (self_us, _) in heaviest[:top]:
+        print(f"    {self_us / 1000:>8.2f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bot cold import time")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        try:
+            bench_module(module, args.rounds, args.top)
+        except Exception as err:
+            print(f"{module}: {err}")
+
+
+if __name__ == "__main__":
+    main()
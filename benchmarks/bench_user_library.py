@@ -0,0 +1,104 @@
+"""
+Benchmark the latency of adding a paper to a user library as it grows.
+
+Compares the per-paper entry schema of SQLiteStorage with the previous
+layout, which read the whole profile (library embedded as a map), added the
+paper and wrote the whole profile back.
+
+Usage: python benchmarks/bench_user_library.py [--size N] [--step N]
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+# add src into path
+sys.path.insert(0, str(project_root / "src"))
+
+from storage import SQLiteStorage
+
+
+class EmbeddedProfileStore:
+    """
+    The previous read-modify-write schema: one JSON profile per user
+    """
+
+    def __init__(self, db_path: Path):
+        self._conn = sqlite3.connect(str(db_path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE users (username TEXT PRIMARY KEY, profile TEXT)")
+
+    def create_user(self, profile: dict) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO users VALUES (?, ?)", (profile["username"], json.dumps(profile))
+            )
+
+    def add_paper_to_user(self, username: str, entry: dict) -> bool:
+        row = self._conn.execute(
+            "SELECT profile FROM users WHERE username = ?", (username,)
+        ).fetchone()
+        profile = json.loads(row[0])
+        if entry["paper_id"] in profile["papers"]:
+            return False
+        profile["papers"][entry["paper_id"]] = entry
+        with self._conn:
+            self._conn.execute(
+                "UPDATE users SET profile = ? WHERE username = ?",
+                (json.dumps(profile), username),
+            )
+        return True
+
+
+def make_entry(i: int) -> dict:
+    return {
+        "paper_id": f"{2000 + i // 100000:04d}.{i % 100000:05d}",
+        "added_at": 1610000000 + i,
+        "labels": ["to-read"],
+        "notes": [],
+    }
+
+
+def run(store, size: int, step: int, window: int = 200) -> list:
+    """
+    Add `size` papers, return the mean add latency (us) of the `window` adds
+    following every `step` papers
+    """
+    store.create_user(
+        {"username": "bench", "first_name": "", "last_name": "", "user_createdAt": 0, "papers": {}}
+    )
+    results = []
+    for i in range(size):
+        start = time.perf_counter()
+        store.add_paper_to_user("bench", make_entry(i))
+        elapsed = time.perf_counter() - start
+        if i % step < window:
+            if i % step == 0:
+                results.append([i, 0.0])
+            results[-1][1] += elapsed * 1e6 / window
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="user library add latency")
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--step", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        per_entry = run(SQLiteStorage(Path(tmp_dir) / "entries.sqlite3"), args.size, args.step)
+        embedded = run(EmbeddedProfileStore(Path(tmp_dir) / "embedded.sqlite3"), args.size, args.step)
+
+    print(f"{'library size':>12} {'per-paper entry us':>20} {'embedded map us':>18}")
+    for (size, entry_us), (_, embedded_us) in zip(per_entry, embedded):
+        print(f"{size:>12} {entry_us:>20.1f} {embedded_us:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
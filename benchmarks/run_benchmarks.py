@@ -0,0 +1,166 @@
+"""
+Offline benchmark suite for the hot path of the bot.
+
+Measures throughput and p50/p99 latency per call of process_url (over a
+corpus of URL variants), the page parsers run by get_paper_from_* (over the
+page fixtures in tests/fixtures) and Paper.from_dict / Paper.to_dict, then
+compares them with the stored baseline.
+
+Usage:
+    python benchmarks/run_benchmarks.py                  # run and compare
+    python benchmarks/run_benchmarks.py --save-baseline  # record new baseline
+    python benchmarks/run_benchmarks.py --check          # exit 1 on regression
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+benchmarks_dir = project_root / "benchmarks"
+fixtures_dir = project_root / "tests" / "fixtures"
+baseline_fp = benchmarks_dir / "baseline.json"
+# add src into path
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(benchmarks_dir))
+
+from page_parsers import parse_arxiv_page, parse_cvf_page, parse_openreview_page
+from paper_class import Paper
+from url_corpus import build_url_corpus
+from url_handlers import process_url
+
+
+def measure(func: Callable, inputs: Sequence, rounds: int) -> Dict[str, float]:
+    """
+    Call `func` on every input `rounds` times and time each call individually
+    """
+    timings: List[int] = []
+    errors = 0
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(rounds):
+        for arg in inputs:
+            start = perf_counter_ns()
+            try:
+                func(arg)
+            except Exception:
+                errors += 1
+            timings.append(perf_counter_ns() - start)
+    timings.sort()
+    total_s = sum(timings) / 1e9
+    return {
+        "calls": len(timings),
+        "errors": errors // rounds,
+        "ops_per_sec": round(len(timings) / total_s, 1),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 3),
+        "p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000, 3),
+        "mean_us": round(statistics.fmean(timings) / 1000, 3),
+    }
+
+
+def load_pages(pattern: str) -> List[str]:
+    return [fp.read_text() for fp in sorted(fixtures_dir.glob(pattern))]
+
+
+def run_suite(corpus_size: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    urls = build_url_corpus(corpus_size)
+    paper_dicts = [
+        parse_arxiv_page(page, {"paper_id": "x", "src_website": "arxiv"})
+        for page in load_pages("arxiv_abs_*.html")
+    ] + [
+        parse_openreview_page(page, {"paper_id": "x", "src_website": "openreview"})
+        for page in load_pages("openreview_*.html")
+    ]
+    papers = [Paper.from_dict(d) for d in paper_dicts]
+    parser_rounds = max(1, rounds // 2)
+
+    return {
+        "process_url": measure(process_url, urls, rounds),
+        "parse_arxiv_page": measure(
+            lambda page: parse_arxiv_page(page, {}), load_pages("arxiv_abs_*.html"), parser_rounds * 20
+        ),
+        "parse_cvf_page": measure(
+            lambda page: parse_cvf_page(page, {}), load_pages("cvf_*.html"), parser_rounds * 40
+        ),
+        "parse_openreview_page": measure(
+            lambda page: parse_openreview_page(page, {}), load_pages("openreview_*.html"), parser_rounds * 40
+        ),
+        "Paper.from_dict": measure(Paper.from_dict, paper_dicts * 250, rounds),
+        "Paper.to_dict": measure(Paper.to_dict, papers * 250, rounds),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Return the benchmarks whose p50 latency regressed beyond `tolerance`
+    or that fail on more inputs than in the baseline
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if result["errors"] > baseline[name].get("errors", 0):
+            regressions.append(
+                f"{name}: {result['errors']} errors (baseline {baseline[name].get('errors', 0)})"
+            )
+        limit = baseline[name]["p50_us"] * (1 + tolerance)
+        if result["p50_us"] > limit:
+            regressions.append(
+                f"{name}: p50 {result['p50_us']}us > {limit:.3f}us "
+                f"(baseline {baseline[name]['p50_us']}us + {tolerance:.0%})"
+            )
+    return regressions
+
+
+def print_table(results: dict, baseline: dict) -> None:
+    header = f"{'benchmark':<24}{'ops/s':>14}{'p50 us':>12}{'p99 us':>12}{'vs baseline':>14}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        if name in baseline:
+            ratio = f"{result['p50_us'] / baseline[name]['p50_us']:.2f}x"
+        else:
+            ratio = "-"
+        print(
+            f"{name:<24}{result['ops_per_sec']:>14,.1f}{result['p50_us']:>12.3f}"
+            f"{result['p99_us']:>12.3f}{ratio:>14}{result['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="paperbot offline benchmarks")
+    parser.add_argument("--corpus-size", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = run_suite(args.corpus_size, args.rounds)
+    baseline = json.loads(baseline_fp.read_text()) if baseline_fp.is_file() else {}
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        failing = [name for name, result in results.items() if result["errors"]]
+        if failing:
+            # an error-dominated run would hide regressions of the real path
+            print(f"\nNot saving a baseline with errors in: {', '.join(failing)}")
+            sys.exit(1)
+        baseline_fp.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline saved to {baseline_fp}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Deterministic corpus of paper URLs in the shapes users actually paste:
+http/https, www./export. hosts, abstract and pdf pages, version suffixes,
+trailing slashes, query strings and fragments.
+"""
+import random
+from typing import List
+
+# real IDs the bot has seen, padded with generated ones below
+_arxiv_ids = [
+    "1301.3781",
+    "1405.4053",
+    "1512.03385",
+    "1706.03762",
+    "1810.04805",
+    "2010.00514",
+    "1811.12432",
+    "2101.05725",
+    "2101.05709",
+    "hep-th/9901001",
+    "math/0211159",
+    "cs/0112017",
+]
+_cvf_ids = [
+    "content_CVPR_2020/Wang_Dual_Super-Resolution_Learning_for_Semantic_Segmentation_CVPR_2020_paper",
+    "content_CVPR_2020/Kim_Advisable_Learning_for_Self-Driving_Vehicles_by_Internalizing_Observation-to-Action_Rules_CVPR_2020_paper",
+    "content_ICCV_2019/Ghiasi_NAS-FPN_Learning_Scalable_Feature_Pyramid_Architecture_for_Object_Detection_ICCV_2019_paper",
+    "content_cvpr_2018/Hu_Squeeze-and-Excitation_Networks_CVPR_2018_paper",
+    "content_WACV_2020/Zhang_Example_Paper_Title_WACV_2020_paper",
+]
+_openreview_ids = ["H1lj0nNFwB", "nlAxjsniDzg", "m5Qsh0kBQG", "CR1XOQ0UTh-", "rJl-b3RcF7"]
+
+_arxiv_templates = [
+    "https://arxiv.org/abs/{id}",
+    "http://arxiv.org/abs/{id}",
+    "https://www.arxiv.org/abs/{id}",
+    "https://export.arxiv.org/abs/{id}",
+    "https://arxiv.org/abs/{id}v{v}",
+    "https://arxiv.org/abs/{id}/",
+    "https://arxiv.org/abs/{id}?context=cs.LG",
+    "https://arxiv.org/abs/{id}v{v}#references",
+    "https://arxiv.org/pdf/{id}.pdf",
+    "https://arxiv.org/pdf/{id}",
+    "https://arxiv.org/pdf/{id}v{v}.pdf",
+    "arxiv.org/abs/{id}",
+]
+_cvf_templates = [
+    "https://openaccess.thecvf.com/{context}/html/{name}.html",
+    "http://openaccess.thecvf.com/{context}/html/{name}.html",
+    "https://openaccess.thecvf.com/{context}/papers/{name}.pdf",
+    "https://openaccess.thecvf.com/{context}/html/{name}.html?utm_source=twitter",
+]
+_openreview_templates = [
+    "https://openreview.net/forum?id={id}",
+    "https://openreview.net/pdf?id={id}",
+    "http://openreview.net/forum?id={id}",
+    "https://openreview.net/forum?id={id}&noteId={id}",
+    "https://www.openreview.net/forum?id={id}",
+]
+
+_charset = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-"
+
+
+def build_url_corpus(size: int = 5000, seed: int = 0) -> List[str]:
+    """
+    Build `size` URLs, roughly 60% arXiv, 20% CVF and 20% OpenReview
+    """
+    rng = random.Random(seed)
+    urls: List[str] = []
+    while len(urls) < size:
+        kind = rng.random()
+        if kind < 0.6:
+            if rng.random() < 0.2:
+                paper_id = rng.choice(_arxiv_ids)
+            else:
+                year, month = rng.randint(15, 21), rng.randint(1, 12)
+                paper_id = f"{year:02d}{month:02d}.{rng.randint(0, 99999):05d}"
+            template = rng.choice(_arxiv_templates)
+            urls.append(template.format(id=paper_id, v=rng.randint(1, 5)))
+        elif kind < 0.8:
+            if rng.random() < 0.3:
+                context, name = rng.choice(_cvf_ids).split("/")
+            else:
+                year = rng.choice([2018, 2019, 2020])
+                venue = rng.choice(["CVPR", "ICCV", "WACV"])
+                words = "_".join(
+                    rng.choice(["Deep", "Learning", "Scene", "Graph", "Neural", "Video"])
+                    for _ in range(rng.randint(3, 8))
+                )
+                context = f"content_{venue}_{year}"
+                name = f"Author_{words}_{venue}_{year}_paper"
+            template = rng.choice(_cvf_templates)
+            urls.append(template.format(context=context, name=name))
+        else:
+            if rng.random() < 0.3:
+                paper_id = rng.choice(_openreview_ids)
+            else:
+                paper_id = "".join(rng.choice(_charset) for _ in range(rng.choice([10, 11])))
+            template = rng.choice(_openreview_templates)
+            urls.append(template.format(id=paper_id))
+    return urls
+
+
+if __name__ == "__main__":
+    for url in build_url_corpus(20):
+        print(url)
@@ -0,0 +1,98 @@
+# built-in modules
+import re
+import time
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, List
+
+# external modules
+from markkk.logger import logger
+
+# local
+from http_client import HttpClient
+from paper_class import Paper
+
+__all__ = ["get_papers_from_arxiv_api", "parse_arxiv_feed"]
+
+ARXIV_API_URL = "http://export.arxiv.org/api/query"
+# arXiv asks API clients to keep id_list queries small and to pause between calls
+MAX_IDS_PER_QUERY: int = 100
+QUERY_INTERVAL: float = 3.0  # seconds
+
+_ns = {
+    "atom": "http://www.w3.org/2005/Atom",
+    "arxiv": "http://arxiv.org/schemas/atom",
+}
+_abs_id_re = re.compile(r"arxiv\.org/abs/(.+?)(v\d+)?$")
+_whitespace_re = re.compile(r"\s+")
+
+
+def get_papers_from_arxiv_api(
+    paper_ids: Iterable[str],
+    client: HttpClient = None,
+    chunk_size: int = MAX_IDS_PER_QUERY,
+    interval: float = QUERY_INTERVAL,
+    api_url: str = ARXIV_API_URL,
+) -> Dict[str, Paper]:
+    """
+    Resolve many arXiv IDs with one export API query per `chunk_size` IDs.
+    Returns a dict of paper_id -> Paper, IDs unknown to arXiv are left out.
+    """
+    if client is None:
+        client = HttpClient()
+    paper_ids = sorted(set(paper_ids))
+    chunk_size = max(1, min(chunk_size, MAX_IDS_PER_QUERY))
+
+    papers: Dict[str, Paper] = {}
+    for start in range(0, len(paper_ids), chunk_size):
+        if start and interval:
+            time.sleep(interval)
+        chunk = paper_ids[start : start + chunk_size]
+        params = {"id_list": ",".join(chunk), "max_results": len(chunk)}
+        response = client.get(api_url, conditional=False, params=params)
+        if response.status_code != 200:
+            logger.error(f"arXiv API returned {response.status_code}")
+            raise Exception(f"arXiv API returned {response.status_code}")
+        for paper in parse_arxiv_feed(response.text):
+            papers[paper.paper_id] = paper
+
+    missing = len(paper_ids) - len(papers)
+    if missing:
+        logger.warning(f"{missing} arXiv IDs could not be resolved")
+    return papers
+
+
+def parse_arxiv_feed(feed: str) -> List[Paper]:
+    """
+    Parse an arXiv API Atom feed into Paper objects
+    """
+    root = ET.fromstring(feed)
+    papers = []
+    for entry in root.iterfind("atom:entry", _ns):
+        match = _abs_id_re.search(entry.findtext("atom:id", "", _ns))
+        if not match:
+            # error entries carry an 'api/errors' id instead of an abstract url
+            logger.warning(f"arXiv API: {_clean(entry.findtext('atom:summary', '', _ns))}")
+            continue
+        paper_id = match.group(1)
+        published_at = entry.findtext("atom:published", "", _ns)
+        papers.append(
+            Paper(
+                paper_id=paper_id,
+                title=_clean(entry.findtext("atom:title", "", _ns)),
+                authors=[
+                    _clean(author.findtext("atom:name", "", _ns))
+                    for author in entry.iterfind("atom:author", _ns)
+                ],
+                paper_url=f"https://arxiv.org/abs/{paper_id}",
+                pdf_url=f"https://arxiv.org/pdf/{paper_id}.pdf",
+                abstract=_clean(entry.findtext("atom:summary", "", _ns)),
+                year=published_at[:4],
+                published_at=published_at,
+                src_website="arxiv",
+            )
+        )
+    return papers
+
+
+def _clean(text: str) -> str:
+    return _whitespace_re.sub(" ", text).strip()
@@ -1,6 +1,9 @@
 # built-in modules
 import json
 import os
+import signal
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -15,12 +18,30 @@ from telegram.ext import (
     Filters,
     MessageHandler,
     Updater,
+    run_async,
 )
+from telegram.utils.helpers import escape_markdown
 
 from constants import project_root
 
 # local
-from datautils import TelegramUser, add_paper_to_user, create_new_user_db, get_paper
+from datautils import (
+    TelegramUser,
+    add_paper_to_user,
+    create_new_user_db,
+    export_user_library,
+    get_paper_versions,
+    prefetch_pool,
+    search_user_papers,
+    shutdown_pdf_text_extractor,
+)
+from exporter import EXPORT_FORMATS
+from metrics import configure_slow_log, span, start_metrics_server, trace_request
+from message_links import LinkResolver, chat_limiter, extract_urls, format_reply
+from negative_cache import negative_cache
+from paper_scraper import get_paper, paper_refresher, source_limiter
+from visit_log import VisitLogger
+from webhook import WebhookServer
 
 logs_path: Path = project_root / "logs"
 
@@ -30,19 +51,35 @@ if not logs_path.is_dir():
 ##############################################
 # user log function
 
+# buffered JSONL writer, keeps file I/O off the dispatcher threads
+visit_logger = VisitLogger(logs_path / "user_visit_history.jsonl")
+# stage breakdown of requests slower than 'slow_request_ms'
+slow_request_logger = VisitLogger(logs_path / "slow_requests.jsonl")
+
+
 
-def user_log(update, ts: str = None, remarks: str = ""):
+def user_log(
+    update,
+    ts: str = None,
+    remarks: str = "",
+    started_at: float = None,
+    outcome: str = "ok",
+):
     if not ts:
         ts: str = timestamp_microseconds()
-    first_name: str = update.message.chat.first_name
-    last_name: str = update.message.chat.last_name
-    username: str = update.message.chat.username
-    chat_id: str = update.message.chat.id
-    name: str = f"{first_name} {last_name}"
-    record: str = f"{ts} - chat_id({chat_id}) - username({username}) - name({name}) - visited({remarks})\n"
-    user_log_fp: Path = logs_path / "user_visit_history.txt"
-    with user_log_fp.open(mode="a") as f:
-        f.write(record)
+    chat = update.message.chat
+    record = {
+        "ts": ts,
+        "chat_id": chat.id,
+        "username": chat.username,
+        "name": f"{chat.first_name} {chat.last_name}",
+        "command": remarks,
+        "latency_ms": (
+            round((time.perf_counter() - started_at) * 1000, 3) if started_at else None
+        ),
+        "outcome": outcome,
+    }
+    visit_logger.log(record)
 
 
 def get_current_telegram_user(update) -> TelegramUser:
@@ -69,69 +106,221 @@ def start(update, context):
     """
     Command Handler: /start
     """
+    started_at = time.perf_counter()
     user = get_current_telegram_user(update)
     msg = f"Hi {user.first_name}, this is paper bot"
     update.message.reply_text(msg, parse_mode=telegram.ParseMode.MARKDOWN)
     create_new_user_db(user)
-    user_log(update, remarks="/start")
+    user_log(update, remarks="/start", started_at=started_at)
 
 
 def help(update, context):
     """
     Command Handler: /help
     """
-    msg = "Currently I can only accpet arxiv.org url"
+    started_at = time.perf_counter()
+    msg = (
+        "Send me links of papers on arxiv.org, CVF Open Access (openaccess.thecvf.com) "
+        "or OpenReview (openreview.net), several per message if you like.\n"
+        "/search <words> finds papers in your library, /export <format> downloads it."
+    )
     update.message.reply_text(msg, parse_mode=telegram.ParseMode.MARKDOWN)
-    user_log(update, remarks="/help")
+    user_log(update, remarks="/help", started_at=started_at)
 
 
 def source(update, context):
     """
     Command Handler: /source
     """
+    started_at = time.perf_counter()
     msg = "View source / contribute / report issue on [GitHub](https://github.com/MarkHershey/paperbot)"
     update.message.reply_text(msg, parse_mode=telegram.ParseMode.MARKDOWN)
-    user_log(update, remarks="/source")
+    user_log(update, remarks="/source", started_at=started_at)
+
+
+def search(update, context):
+    """
+    Command Handler: /search <query>
+    """
+    started_at = time.perf_counter()
+    outcome = "ok"
+    query = " ".join(context.args)
+    if not query:
+        msg = "Usage: /search <keywords>"
+        outcome = "unsupported"
+    else:
+        try:
+            user = get_current_telegram_user(update)
+            papers = search_user_papers(user, query)
+            if papers:
+                # scraped titles and user queries may contain Markdown characters
+                msg = "\n\n".join(
+                    "{}. *{}*\n{}\n{}".format(
+                        i,
+                        escape_markdown(paper.title),
+                        escape_markdown(paper.first_author),
+                        escape_markdown(paper.paper_url),
+                    )
+                    for i, paper in enumerate(papers, start=1)
+                )
+            else:
+                msg = f"No saved paper matches '{escape_markdown(query)}'"
+        except Exception as err:
+            logger.error(err)
+            msg = "Internal Server Error"
+            outcome = "error"
+    update.message.reply_text(msg, parse_mode=telegram.ParseMode.MARKDOWN)
+    user_log(update, remarks="/search", started_at=started_at, outcome=outcome)
+
+
+def export(update, context):
+    """
+    Command Handler: /export [bibtex|csv|jsonl]
+    """
+    started_at = time.perf_counter()
+    outcome = "ok"
+    fmt = context.args[0].lower() if context.args else "bibtex"
+    if fmt not in EXPORT_FORMATS:
+        msg = "Usage: /export [{}]".format("|".join(EXPORT_FORMATS))
+        update.message.reply_text(msg)
+        user_log(update, remarks="/export", started_at=started_at, outcome="unsupported")
+        return
+
+    filepath = None
+    try:
+        user = get_current_telegram_user(update)
+        filepath, count = export_user_library(user, fmt)
+        if count:
+            filename = f"paperbot_{user.username}.{EXPORT_FORMATS[fmt]}"
+            with filepath.open("rb") as f:
+                update.message.reply_document(
+                    document=f, filename=filename, caption=f"{count} papers"
+                )
+        else:
+            update.message.reply_text("Your library is empty")
+    except Exception as err:
+        logger.error(err)
+        update.message.reply_text("Internal Server Error")
+        outcome = "error"
+    finally:
+        if filepath is not None:
+            filepath.unlink()
+    user_log(update, remarks="/export", started_at=started_at, outcome=outcome)
 
 
 ############################################################################################
 # MessageHandlers
 
 
+def resolve_link(url: str, user: TelegramUser):
+    """
+    Get the paper of a link, add it to the user's library and return it
+    with its versions from other sources
+    """
+    paper = get_paper(url)
+    add_paper_to_user(paper, user)
+    return paper, get_paper_versions(paper)
+
+
+# resolves the links of messages in parallel, bounded across all chats
+link_resolver = LinkResolver(max_workers=8)
+
+
+@run_async
 def url_MsgHandler(update, context):
-    # context.bot.send_message(chat_id=update.effective_chat.id, text=update.message.text)
-    try:
-        url_received = update.message.text
+    """
+    Resolve every link in the message concurrently, reply once with the
+    result of each
+    """
+    # runs on the dispatcher's run_async threads, a chat over its quota is refused, not held
+    started_at = time.perf_counter()
+    with trace_request("url_MsgHandler") as trace:
+        try:
+            urls = extract_urls(update.message)
+            if urls:
+                user = get_current_telegram_user(update)
+                with span("resolve_links"):
+                    results = link_resolver.resolve_all(
+                        urls,
+                        resolve=lambda url: resolve_link(url, user),
+                        chat_id=str(update.effective_chat.id),
+                    )
+                messages = format_reply(results)
+                outcomes = {result.outcome for result in results}
+                outcome = outcomes.pop() if len(outcomes) == 1 else "partial"
+            else:
+                messages = ["No link found in your message, please send the link of a paper."]
+                outcome = "no_link"
+        except Exception as err:
+            logger.error(err)
+            messages = ["Internal Server Error"]
+            outcome = "error"
+
+        # respond to user
+        trace.outcome = outcome
+        with span("telegram_reply"):
+            for msg in messages:
+                try:
+                    update.message.reply_text(msg, parse_mode=telegram.ParseMode.MARKDOWN)
+                except Exception as err:
+                    # still send the other parts and log the visit
+                    logger.error(f"Failed to send reply: {err}")
+                    trace.outcome = outcome = "error"
+
+    user_log(
+        update,
+        remarks="respond_paper_info_from_url",
+        started_at=started_at,
+        outcome=outcome,
+    )
 
-        if "arxiv" in url_received:
-            logger.debug("URL identified: arXiv")
 
-            paper = get_paper(url_received)
-            msg = "*Paper*: {}\n\n*Author*: {}\n\n*PDF*: {}".format(
-                paper.title, paper.first_author, paper.pdf_url
-            )
+############################################################################################
 
-            user = get_current_telegram_user(update)
-            add_paper_to_user(paper, user)
 
-        elif "openaccess.thecvf.com" in url_received:
-            logger.debug("URL identified: CVPR Open Access")
-            msg = "CVPR Open Access (in development)"
+def run_webhook(updater: Updater, webhook_config: dict):
+    """
+    Receive updates through the webhook server until SIGINT/SIGTERM.
+    Any number of instances can run behind a load balancer, as each update
+    is handled by whichever instance receives it.
+    """
+
+    def handle_update(data: dict):
+        update = telegram.Update.de_json(data, updater.bot)
+        updater.dispatcher.process_update(update)
 
-        else:
-            msg = "Currently only arxiv paper url is supported."
+    if webhook_config.get("secret_token", "REPLACE_ME") == "REPLACE_ME":
+        logger.error("Set 'webhook.secret_token' in 'config.conf' to use webhook mode")
+        return
 
-    except Exception as err:
-        logger.error(err)
-        msg = "Internal Server Error"
-        # msg = telegram.utils.helpers.escape_markdown(msg)
+    server = WebhookServer(
+        handle_update,
+        secret_token=webhook_config["secret_token"],
+        host=webhook_config.get("listen", "127.0.0.1"),
+        port=webhook_config.get("port", 8443),
+        path=webhook_config.get("path", "/telegram"),
+        num_workers=webhook_config.get("num_workers", 4),
+        max_queue_size=webhook_config.get("max_queue_size", 100),
+    )
+    server.start()
 
-    # respond to user
-    update.message.reply_text(msg, parse_mode=telegram.ParseMode.MARKDOWN)
-    user_log(update, remarks="respond_paper_info_from_url")
+    # one instance registers the public url, the others only serve it
+    if webhook_config.get("url"):
+        updater.bot.set_webhook(
+            url=webhook_config["url"],
+            max_connections=webhook_config.get("max_connections", 40),
+            secret_token=webhook_config["secret_token"],
+        )
 
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: stop.set())
+    while not stop.wait(1):
+        pass
 
-############################################################################################
+    logger.info(f"Stopping webhook server: {server.stats()}")
+    server.stop(drain=True)
+    updater.stop()
 
 
 def main():
@@ -164,6 +353,8 @@ def main():
     dispatcher.add_handler(CommandHandler("start", start))
     dispatcher.add_handler(CommandHandler("help", help))
     dispatcher.add_handler(CommandHandler("source", source))
+    dispatcher.add_handler(CommandHandler("search", search))
+    dispatcher.add_handler(CommandHandler("export", export))
 
     # Message Handlers
     url_filter = Filters.text & (
@@ -174,9 +365,36 @@ def main():
     # log all errors
     dispatcher.add_error_handler(error)
 
+    # Prometheus metrics and the slow request log
+    if config.get("metrics_port"):
+        start_metrics_server(config["metrics_port"], config.get("metrics_host", "127.0.0.1"))
+    if config.get("slow_request_ms"):
+        configure_slow_log(config["slow_request_ms"] / 1000, slow_request_logger.log)
+
+    # per source website and per chat rate limits
+    rate_limits = config.get("rate_limits", {})
+    source_limiter.configure(**rate_limits.get("sources", {}))
+    chat_limiter.configure(**rate_limits.get("chat", {}))
+
+    # re-scrape stale papers in the background, most requested first
+    paper_refresher.start_sweeper()
+
     # Start the Bot
-    updater.start_polling()
-    updater.idle()
+    if config.get("mode", "polling") == "webhook":
+        run_webhook(updater, config.get("webhook", {}))
+    else:
+        updater.start_polling()
+        updater.idle()
+
+    # finish queued PDF downloads before exiting
+    logger.info(f"Draining PDF prefetch queue: {prefetch_pool.stats()}")
+    prefetch_pool.shutdown(drain=True)
+    paper_refresher.shutdown()
+    link_resolver.shutdown()
+    logger.info(f"Most re-posted failing links: {negative_cache.top_hits()}")
+    shutdown_pdf_text_extractor()
+    visit_logger.close()
+    slow_request_logger.close()
 
 
 if __name__ == "__main__":
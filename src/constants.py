@@ -1,19 +1,47 @@
+import json
+import threading
 from pathlib import Path
 
-import firebase_admin
-from firebase_admin import credentials, firestore
-
-__all__ = ["db", "ALL_PAPER_PARENT", "ALL_USER_PARENT", "project_root"]
+__all__ = [
+    "get_db",
+    "ALL_PAPER_PARENT",
+    "ALL_USER_PARENT",
+    "project_root",
+    "config_fp",
+    "load_config",
+]
 
 
 ################## FIREBASE ################################################
 # Use a service account
-_cred = credentials.Certificate(
-    "src/data/paperbot-31c08-firebase-adminsdk-gznc7-5b4edd1da0.json"
-)
-firebase_admin.initialize_app(_cred)
+_cred_fp = "src/data/paperbot-31c08-firebase-adminsdk-gznc7-5b4edd1da0.json"
+_db = None
+_db_lock = threading.Lock()
+
+
+def get_db():
+    """
+    Return the Firestore client, the Firebase app is initialized on first use
+    so that importing this module does not load the SDK or the credentials
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                import firebase_admin
+                from firebase_admin import credentials, firestore
+
+                firebase_admin.initialize_app(credentials.Certificate(_cred_fp))
+                _db = firestore.client()
+    return _db
+
+
+def __getattr__(name: str):
+    # keep `constants.db` working for existing callers
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-db = firestore.client()
 
 ALL_PAPER_PARENT = "papers"
 ALL_USER_PARENT = "users"
@@ -22,3 +50,16 @@ ALL_USER_PARENT = "users"
 
 # get project root
 project_root: Path = Path(__file__).resolve().parent.parent
+
+# bot config file
+config_fp: Path = project_root / "src/config.conf"
+
+
+def load_config() -> dict:
+    """
+    Read 'config.conf', return an empty dict if it does not exist
+    """
+    if not config_fp.is_file():
+        return {}
+    with config_fp.open() as f:
+        return json.load(f)
@@ -1,19 +1,24 @@
 # built-in modules
+import threading
 from pathlib import Path
-from typing import Dict, List, Tuple
-
-import firebase_admin
+from typing import Dict, List, Optional, Tuple
 
 # external modules
-import requests
-from bs4 import BeautifulSoup
-from firebase_admin import credentials, firestore
 from markkk.logger import logger
 from markkk.time import timestamp_seconds
 
 # local
 from constants import *
+from dedup_index import DedupIndex
+from exporter import export_library
+from metrics import span, timed
+from paper_cache import paper_cache
 from paper_class import Paper
+from pdf_store import PdfStore
+from pdf_text import PdfTextCache, PdfTextExtractor
+from prefetch import PrefetchPool
+from search_index import FIELD_WEIGHTS, SearchIndex
+from storage import StorageBackend, create_storage
 
 # get papers directory
 papers_dir = project_root / "papers"
@@ -28,89 +33,325 @@ class TelegramUser:
 
 
 ###########################################################
-def download_pdf(paper: Paper, save_dir=papers_dir) -> Path:
-    save_dir = Path(save_dir)
-    assert save_dir.is_dir()
-
-    filepath = save_dir / f"{paper.paper_id}.pdf"
-    if filepath.is_file():
-        logger.warning(f"Paper PDF already exist at: {filepath}")
-        return filepath
-    else:
+_pdf_store: Optional[PdfStore] = None
+_pdf_store_lock = threading.Lock()
+
+
+def get_pdf_store() -> PdfStore:
+    """
+    Return the store of downloaded PDFs under papers/, bounded by
+    'pdf_quota_mb' of 'config.conf'
+    """
+    global _pdf_store
+    if _pdf_store is None:
+        with _pdf_store_lock:
+            if _pdf_store is None:
+                quota_mb = load_config().get("pdf_quota_mb")
+                quota_bytes = quota_mb * 1024 * 1024 if quota_mb else None
+                _pdf_store = PdfStore(papers_dir, quota_bytes=quota_bytes)
+    return _pdf_store
+
+
+def download_pdf(paper: Paper) -> Path:
+    store = get_pdf_store()
+    legacy_fp = papers_dir / f"{paper.paper_id}.pdf"
+    if legacy_fp.is_file() and paper.paper_id not in store:
+        # downloaded before the store existed, move it in
+        return store.put_file(paper.paper_id, legacy_fp)
+    try:
+        return store.download(paper.paper_id, paper.pdf_url)
+    except Exception as e:
+        logger.error(e)
+        return False
+
+
+def _prefetch_pdf(paper: Paper):
+    filepath = download_pdf(paper)
+    if not filepath:
+        raise Exception(f"Failed to download PDF of '{paper.paper_id}'")
+    # runs in its own process pool, the prefetch worker does not wait for it
+    get_pdf_text_extractor().submit(paper.paper_id, filepath)
+
+
+# fetches PDFs of newly added papers into papers/ in the background
+prefetch_pool = PrefetchPool(_prefetch_pdf)
+
+
+_pdf_text_extractor: Optional[PdfTextExtractor] = None
+_pdf_text_lock = threading.Lock()
+
+
+def get_pdf_text_extractor() -> PdfTextExtractor:
+    """
+    Return the extractor that fills the full-text cache of downloaded PDFs
+    """
+    global _pdf_text_extractor
+    if _pdf_text_extractor is None:
+        with _pdf_text_lock:
+            if _pdf_text_extractor is None:
+                cache = PdfTextCache(project_root / "cache" / "pdf_text.sqlite3")
+                _pdf_text_extractor = PdfTextExtractor(cache, max_workers=2)
+    return _pdf_text_extractor
+
+
+def shutdown_pdf_text_extractor() -> None:
+    """
+    Stop the extractor's worker processes, if it was ever started
+    """
+    with _pdf_text_lock:
+        extractor = _pdf_text_extractor
+    if extractor is not None:
+        extractor.shutdown()
+
+
+def _create_storage() -> StorageBackend:
+    """
+    Build the storage backend selected by 'storage_backend' in 'config.conf'
+    """
+    config = load_config()
+    backend = config.get("storage_backend", "firestore")
+    if backend == "sqlite":
+        sqlite_path = config.get("sqlite_path", "src/data/paperbot.sqlite3")
+        return create_storage("sqlite", db_path=project_root / sqlite_path)
+    return create_storage(
+        backend, client=get_db(), paper_parent=ALL_PAPER_PARENT, user_parent=ALL_USER_PARENT
+    )
+
+
+_storage: StorageBackend = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """
+    Return the storage backend, it is built on first use so that importing
+    this module stays cheap and does not connect to the database
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _create_storage()
+    return _storage
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """
+    Return the full-text index of user libraries, stored at 'search_index_path'
+    of 'config.conf'
+    """
+    global _search_index
+    if _search_index is None:
+        with _search_index_lock:
+            if _search_index is None:
+                index_path = load_config().get(
+                    "search_index_path", "src/data/search_index.sqlite3"
+                )
+                _search_index = SearchIndex(project_root / index_path)
+    return _search_index
+
+
+_dedup_index: Optional[DedupIndex] = None
+_dedup_index_lock = threading.Lock()
+
+
+def get_dedup_index() -> DedupIndex:
+    """
+    Return the index linking versions of a paper from different sources,
+    stored at 'dedup_index_path' of 'config.conf'
+    """
+    global _dedup_index
+    if _dedup_index is None:
+        with _dedup_index_lock:
+            if _dedup_index is None:
+                index_path = load_config().get("dedup_index_path", "src/data/dedup_index.sqlite3")
+                _dedup_index = DedupIndex(project_root / index_path)
+    return _dedup_index
+
+
+@timed("save_paper_to_db")
+def save_paper_to_db(paper: Paper, force_overwrite=False):
+    saved = get_storage().put_paper(paper, overwrite=force_overwrite)
+    if saved and force_overwrite:
+        # drop the stale copy, next read will fetch the new one from db
+        paper_cache.invalidate(paper.paper_id)
+    if saved:
         try:
-            response = requests.get(paper.pdf_url)
-            with filepath.open(mode="wb") as f:
-                f.write(response.content)
-            return filepath
+            get_dedup_index().add(paper)
         except Exception as e:
-            logger.error(e)
-            return False
+            # the paper is saved, it is picked up again by build_dedup_index
+            logger.error(f"Failed to index '{paper.paper_id}' for duplicates: {e}")
+    return saved
 
 
-def save_paper_to_db(paper: Paper, force_overwrite=False):
-    db_ref = db.collection(ALL_PAPER_PARENT).document(paper.paper_id)
-    doc = db_ref.get()
-    if doc.exists and not force_overwrite:
+# fields read by the search index or the dedup index
+INDEXED_FIELDS: Tuple[str, ...] = tuple(FIELD_WEIGHTS) + ("src_website",)
+
+
+def reindex_paper(old: Paper, new: Paper) -> bool:
+    """
+    Update the search and dedup indexes after the record of a paper was
+    replaced, e.g. by a refresh. Return False if no indexed field changed.
+    """
+    if all(getattr(old, field) == getattr(new, field) for field in INDEXED_FIELDS):
         return False
-    else:
-        db_ref.set(paper.to_dict())
-        return True
+    try:
+        get_search_index().update_paper(new)
+    except Exception as e:
+        logger.error(f"Failed to re-index '{new.paper_id}': {e}")
+    try:
+        get_dedup_index().add(new, regroup=True)
+    except Exception as e:
+        logger.error(f"Failed to re-index '{new.paper_id}' for duplicates: {e}")
+    return True
 
 
 def get_paper_from_db(paper_id: str) -> Paper:
-    db_ref = db.collection(ALL_PAPER_PARENT).document(paper_id)
-    doc = db_ref.get()
-    if doc.exists:
-        paper = Paper.from_dict(doc.to_dict())
-        return paper
-    else:
-        return False
+    with span("get_paper_from_db") as stage:
+        paper = paper_cache.get(paper_id)
+        if paper:
+            stage.labels["cache"] = "hit"
+            return paper
+
+        stage.labels["cache"] = "miss"
+        paper = get_storage().get_paper(paper_id)
+        if paper:
+            paper_cache.put(paper)
+            return paper
+        else:
+            return False
 
 
 def create_new_user_db(user: TelegramUser):
-    db_ref = db.collection(ALL_USER_PARENT).document(user.username)
-    doc = db_ref.get()
-    if doc.exists:
+    profile = {
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "user_createdAt": timestamp_seconds(),
+        "papers": {},
+    }
+    if get_storage().create_user(profile):
+        return True
+    else:
         logger.error("User already exists")
         return False
-    else:
-        profile = {
-            "username": user.username,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "user_createdAt": timestamp_seconds(),
-            "papers": {},
-        }
-        db_ref.set(profile)
-        return True
 
 
+@timed("add_paper_to_user")
 def add_paper_to_user(paper: Paper, user: TelegramUser):
-    db_ref = db.collection(ALL_USER_PARENT).document(user.username)
-    doc = db_ref.get()
-    if doc.exists:
-        pass
-    else:
+    if not get_storage().user_exists(user.username):
         create_new_user_db(user)
-        doc = db_ref.get()
-
-    profile = doc.to_dict()
-    userPapers: dict = profile.get("papers")
-    if paper.paper_id not in userPapers:
-        userPapers[paper.paper_id] = {
-            "paper_id": paper.paper_id,
-            "added_at": timestamp_seconds(),
-            "labels": [],
-            "notes": [],
-        }
-        profile["papers"] = userPapers
-        db_ref.update(profile)
+
+    saved_version = find_saved_version(paper, user)
+    if saved_version:
+        logger.warning(f"'{paper.paper_id}' already added as '{saved_version}'")
+        return False
+
+    entry = {
+        "paper_id": paper.paper_id,
+        "added_at": timestamp_seconds(),
+        "labels": [],
+        "notes": [],
+    }
+    if get_storage().add_paper_to_user(user.username, entry):
+        prefetch_pool.submit(paper)
+        try:
+            get_search_index().add_paper(user.username, paper)
+        except Exception as e:
+            # the paper is saved, it is picked up again by index_user_library
+            logger.error(f"Failed to index '{paper.paper_id}': {e}")
         return True
     else:
         logger.warning("paper already added in the past")
         return False
 
 
+def get_paper_versions(paper: Paper) -> List[Paper]:
+    """
+    Return the records of `paper` stored under other sources, e.g. the
+    OpenReview and CVF versions of an arXiv preprint
+    """
+    versions = []
+    for paper_id in get_dedup_index().versions(paper.paper_id):
+        if paper_id != paper.paper_id:
+            version = get_paper_from_db(paper_id)
+            if version:
+                versions.append(version)
+    return versions
+
+
+def find_saved_version(paper: Paper, user: TelegramUser) -> Optional[str]:
+    """
+    Return the paper_id under which another version of `paper` is already
+    in the user's library, if any
+    """
+    try:
+        paper_ids = get_dedup_index().versions(paper.paper_id)
+    except Exception as e:
+        logger.error(f"Failed to look up versions of '{paper.paper_id}': {e}")
+        return None
+    storage = get_storage()
+    for paper_id in paper_ids:
+        if paper_id != paper.paper_id and storage.user_has_paper(user.username, paper_id):
+            return paper_id
+    return None
+
+
+def build_dedup_index() -> int:
+    """
+    Index every stored paper for duplicate detection, return the count.
+    Used for papers saved before the index existed.
+    """
+    return get_dedup_index().build(get_storage().iter_papers())
+
+
+def index_user_library(username: str) -> int:
+    """
+    (Re)build the search index of a user's library, return the number of
+    papers indexed. Used for libraries saved before the index existed.
+    """
+    profile = get_storage().get_user(username)
+    if not profile:
+        return 0
+    index = get_search_index()
+    count = 0
+    for paper_id in profile["papers"]:
+        paper = get_paper_from_db(paper_id)
+        if paper:
+            index.add_paper(username, paper)
+            count += 1
+    index.mark_backfilled(username)
+    return count
+
+
+def search_user_papers(user: TelegramUser, query: str, limit: int = 10) -> List[Paper]:
+    """
+    Return the papers in the user's library that best match `query`
+    """
+    index = get_search_index()
+    # once per user, later additions are indexed by add_paper_to_user
+    if not index.is_backfilled(user.username):
+        index_user_library(user.username)
+    papers = []
+    for paper_id, _ in index.search(user.username, query, limit=limit):
+        paper = get_paper_from_db(paper_id)
+        if paper:
+            papers.append(paper)
+    return papers
+
+
+def export_user_library(user: TelegramUser, fmt: str = "bibtex") -> Tuple[Path, int]:
+    """
+    Write the user's library to a temporary file in `fmt` ("bibtex", "csv"
+    or "jsonl"), return its path and the number of papers in it
+    """
+    return export_library(get_storage(), user.username, fmt)
+
+
 if __name__ == "__main__":
 
     pass
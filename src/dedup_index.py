@@ -0,0 +1,339 @@
+"""
+Find the versions of a paper stored under other sources, e.g. the arXiv
+preprint, the OpenReview submission and the CVF camera-ready of one work.
+
+Usage: python src/dedup_index.py    (builds the index over all stored papers)
+
+Titles are compared with MinHash signatures of their character shingles,
+and candidates are looked up through LSH band buckets in SQLite, so a
+lookup costs a few indexed queries however many papers are stored.
+Candidates also need to share authors before they are linked.
+"""
+# built-in modules
+import hashlib
+import json
+import random
+import re
+import sqlite3
+import struct
+import threading
+import unicodedata
+import zlib
+from array import array
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+# local
+from paper_class import Paper
+
+__all__ = ["DedupIndex", "normalize_title", "author_keys", "minhash"]
+
+NUM_PERM: int = 64
+NUM_BANDS: int = 16  # 4 rows per band, candidates from ~0.5 title similarity
+SHINGLE_SIZE: int = 4
+TITLE_THRESHOLD: float = 0.8  # estimated Jaccard of title shingles
+AUTHOR_THRESHOLD: float = 0.5  # Jaccard of author surnames
+TITLE_ONLY_THRESHOLD: float = 0.95  # when either side has no authors
+_MERSENNE_PRIME: int = (1 << 61) - 1
+
+_rng = random.Random(20201101)
+_PERMUTATIONS: List[Tuple[int, int]] = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+_non_alnum_re = re.compile(r"[^a-z0-9]+")
+
+_DEDUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_papers (
+    paper_id     TEXT PRIMARY KEY,
+    src_website  TEXT NOT NULL,
+    authors      TEXT NOT NULL,
+    signature    BLOB NOT NULL,
+    canonical_id TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_dedup_papers_canonical ON dedup_papers (canonical_id);
+
+CREATE TABLE IF NOT EXISTS dedup_buckets (
+    band     INTEGER NOT NULL,
+    bucket   INTEGER NOT NULL,
+    paper_id TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_dedup_buckets_paper ON dedup_buckets (paper_id);
+"""
+
+
+def _ascii_lower(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def normalize_title(title: str) -> str:
+    """
+    Lowercase, strip accents and punctuation, collapse whitespace
+    """
+    return _non_alnum_re.sub(" ", _ascii_lower(title or "")).strip()
+
+
+def author_keys(authors: Iterable[str]) -> List[str]:
+    """
+    Normalized surnames, "Kaiming He" and "He, Kaiming" give the same key
+    """
+    keys = set()
+    for name in authors:
+        name = name.split(",")[0] if "," in name else (name.split() or [""])[-1]
+        key = _non_alnum_re.sub("", _ascii_lower(name))
+        if key:
+            keys.add(key)
+    return sorted(keys)
+
+
+def minhash(title: str) -> Tuple[int, ...]:
+    """
+    MinHash signature of the character shingles of a normalized title
+    """
+    if len(title) <= SHINGLE_SIZE:
+        shingles = {title}
+    else:
+        shingles = {title[i : i + SHINGLE_SIZE] for i in range(len(title) - SHINGLE_SIZE + 1)}
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles]
+    return tuple(
+        min([(a * h + b) % _MERSENNE_PRIME for h in hashes]) for a, b in _PERMUTATIONS
+    )
+
+
+def _band_buckets(signature: Sequence[int]) -> List[Tuple[int, int]]:
+    rows = NUM_PERM // NUM_BANDS
+    buckets = []
+    for band in range(NUM_BANDS):
+        data = struct.pack(f">{rows}Q", *signature[band * rows : (band + 1) * rows])
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+    return buckets
+
+
+def _similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def _jaccard(a: Sequence[str], b: Sequence[str]) -> float:
+    a, b = set(a), set(b)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+class DedupIndex:
+    """
+    Groups the records of one paper stored under different sources. Each
+    group is identified by its canonical_id, the paper_id of the first
+    record added to it.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        db_path = str(db_path)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path: str = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_DEDUP_SCHEMA)
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dedup_papers").fetchone()[0]
+
+    def _matches(
+        self, paper: Paper, signature: Sequence[int], authors: List[str]
+    ) -> List[Tuple[str, str, float]]:
+        """
+        (paper_id, canonical_id, title similarity) of the records of `paper`
+        under other sources, best match first
+        """
+        candidates = set()
+        for band, bucket in _band_buckets(signature):
+            rows = self._conn.execute(
+                "SELECT paper_id FROM dedup_buckets WHERE band = ? AND bucket = ?",
+                (band, bucket),
+            ).fetchall()
+            candidates.update(row["paper_id"] for row in rows)
+        candidates.discard(paper.paper_id)
+        if not candidates:
+            return []
+
+        matches = []
+        placeholders = ",".join("?" * len(candidates))
+        rows = self._conn.execute(
+            f"SELECT * FROM dedup_papers WHERE paper_id IN ({placeholders})",
+            list(candidates),
+        ).fetchall()
+        for row in rows:
+            # versions of one work come from different sources
+            if row["src_website"] == paper.src_website:
+                continue
+            similarity = _similarity(signature, array("Q", row["signature"]))
+            other_authors = json.loads(row["authors"])
+            if authors and other_authors:
+                same = (
+                    similarity >= TITLE_THRESHOLD
+                    and _jaccard(authors, other_authors) >= AUTHOR_THRESHOLD
+                )
+            else:
+                same = similarity >= TITLE_ONLY_THRESHOLD
+            if same:
+                matches.append((row["paper_id"], row["canonical_id"], similarity))
+        matches.sort(key=lambda match: -match[2])
+        return matches
+
+    def find_duplicates(self, paper: Paper) -> List[Tuple[str, float]]:
+        """
+        Return (paper_id, title similarity) of the stored records that are
+        other versions of `paper`, best match first
+        """
+        title = normalize_title(paper.title)
+        if not title:
+            return []
+        with self._lock:
+            matches = self._matches(paper, minhash(title), author_keys(paper.authors))
+        return [(paper_id, similarity) for paper_id, _, similarity in matches]
+
+    def add(self, paper: Paper, regroup: bool = False) -> str:
+        """
+        Index `paper`, linking it to the group of its best match.
+        A paper that is already indexed stays in its group, unless
+        `regroup` is set, e.g. because its title or authors changed.
+        Return its canonical_id.
+        """
+        with self._lock, self._conn:
+            return self._add(paper, regroup=regroup)
+
+    def _add(self, paper: Paper, regroup: bool = False) -> str:
+        title = normalize_title(paper.title)
+        row = self._conn.execute(
+            "SELECT canonical_id FROM dedup_papers WHERE paper_id = ?", (paper.paper_id,)
+        ).fetchone()
+        if not title:
+            return row["canonical_id"] if row else paper.paper_id
+
+        signature = minhash(title)
+        authors = author_keys(paper.authors)
+        if row is not None and not regroup:
+            # re-indexed with the same metadata: stay in the same group
+            canonical_id = row["canonical_id"]
+        else:
+            matches = self._matches(paper, signature, authors)
+            canonical_id = matches[0][1] if matches else paper.paper_id
+            if row is not None and row["canonical_id"] == paper.paper_id:
+                canonical_id = self._regroup_members(paper.paper_id, matches, canonical_id)
+
+        self._conn.execute("DELETE FROM dedup_buckets WHERE paper_id = ?", (paper.paper_id,))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO dedup_papers "
+            "(paper_id, src_website, authors, signature, canonical_id) VALUES (?, ?, ?, ?, ?)",
+            (
+                paper.paper_id,
+                paper.src_website or "",
+                json.dumps(authors),
+                array("Q", signature).tobytes(),
+                canonical_id,
+            ),
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO dedup_buckets (band, bucket, paper_id) VALUES (?, ?, ?)",
+            [(band, bucket, paper.paper_id) for band, bucket in _band_buckets(signature)],
+        )
+        return canonical_id
+
+    def _regroup_members(
+        self, paper_id: str, matches: List[Tuple[str, str, float]], canonical_id: str
+    ) -> str:
+        """
+        `paper_id` is the canonical_id of its group and its metadata changed.
+        It stays the canonical_id if it still matches one of the members.
+        Otherwise the members are moved under the first of them, and the
+        paper joins the group of its best match, if any.
+        """
+        members = [
+            row["paper_id"]
+            for row in self._conn.execute(
+                "SELECT paper_id FROM dedup_papers WHERE canonical_id = ? AND paper_id != ? "
+                "ORDER BY paper_id",
+                (paper_id, paper_id),
+            ).fetchall()
+        ]
+        if not members:
+            return canonical_id
+        if set(members) & {match[0] for match in matches}:
+            return paper_id
+        self._conn.execute(
+            "UPDATE dedup_papers SET canonical_id = ? WHERE canonical_id = ? AND paper_id != ?",
+            (members[0], paper_id, paper_id),
+        )
+        return canonical_id
+
+    def build(self, papers: Iterable[Paper], batch_size: int = 500) -> int:
+        """
+        Index many papers, committing once per `batch_size`. Return the count.
+        """
+        count = 0
+        batch: List[Paper] = []
+        for paper in papers:
+            batch.append(paper)
+            if len(batch) >= batch_size:
+                count += self._add_batch(batch)
+        if batch:
+            count += self._add_batch(batch)
+        return count
+
+    def _add_batch(self, batch: List[Paper]) -> int:
+        with self._lock, self._conn:
+            for paper in batch:
+                self._add(paper)
+        count = len(batch)
+        batch.clear()
+        return count
+
+    def canonical_id(self, paper_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT canonical_id FROM dedup_papers WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+        return row["canonical_id"] if row else None
+
+    def versions(self, paper_id: str) -> List[str]:
+        """
+        paper_ids of every record in the group of `paper_id`, itself included
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT paper_id FROM dedup_papers WHERE canonical_id = "
+                "(SELECT canonical_id FROM dedup_papers WHERE paper_id = ?) ORDER BY paper_id",
+                (paper_id,),
+            ).fetchall()
+        return [row["paper_id"] for row in rows]
+
+    def remove(self, paper_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dedup_buckets WHERE paper_id = ?", (paper_id,))
+            self._conn.execute("DELETE FROM dedup_papers WHERE paper_id = ?", (paper_id,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    from markkk.logger import logger
+
+    from datautils import build_dedup_index
+
+    count = build_dedup_index()
+    logger.info(f"Indexed {count} papers for duplicate detection")
+
+
+if __name__ == "__main__":
+    main()
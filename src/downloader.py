@@ -0,0 +1,130 @@
+# built-in modules
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+# external modules
+from markkk.logger import logger
+
+__all__ = ["download_file", "DownloadError", "MAX_CONCURRENT_DOWNLOADS"]
+
+MAX_CONCURRENT_DOWNLOADS: int = 4
+CHUNK_SIZE: int = 64 * 1024
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 30)  # (connect, read) seconds
+
+# caps the number of downloads in flight across all threads
+_download_slots = threading.BoundedSemaphore(MAX_CONCURRENT_DOWNLOADS)
+
+_content_range_re = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+class DownloadError(Exception):
+    pass
+
+
+def download_file(
+    url: str,
+    filepath: Union[str, Path],
+    expected_size: Optional[int] = None,
+    expected_sha256: Optional[str] = None,
+    magic: Optional[bytes] = None,
+    timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+) -> str:
+    """
+    Stream `url` into `filepath` and return the SHA-256 hex digest of the file.
+
+    Data is written in chunks to '<filepath>.part', which is renamed onto
+    `filepath` only after the size, checksum and leading `magic` bytes have
+    been verified, so `filepath` never holds a truncated download. A leftover
+    '.part' file from an interrupted download is resumed with a Range request.
+    """
+    import requests
+
+    filepath = Path(filepath)
+    part_fp = filepath.with_name(filepath.name + ".part")
+
+    with _download_slots:
+        offset = part_fp.stat().st_size if part_fp.is_file() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code == 206:
+                try:
+                    total_size = _total_size_from_content_range(response, offset)
+                except DownloadError:
+                    # the .part file cannot be resumed, a retry starts over
+                    part_fp.unlink()
+                    raise
+                mode = "ab"
+            elif response.status_code == 200:
+                # server ignored the Range header, start over
+                content_length = response.headers.get("Content-Length")
+                total_size = int(content_length) if content_length else None
+                offset = 0
+                mode = "wb"
+            elif response.status_code == 416 and offset:
+                # nothing left to fetch, the .part file may already be complete
+                total_size = None
+                mode = None
+            else:
+                raise DownloadError(f"Unexpected status {response.status_code} from {url}")
+
+            sha256 = _hash_existing(part_fp) if mode != "wb" and offset else hashlib.sha256()
+            if mode is not None:
+                with part_fp.open(mode=mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        if chunk:
+                            f.write(chunk)
+                            sha256.update(chunk)
+
+    try:
+        _verify(part_fp, sha256.hexdigest(), total_size, expected_size, expected_sha256, magic)
+    except DownloadError:
+        part_fp.unlink()
+        raise
+
+    os.replace(part_fp, filepath)
+    logger.debug(f"Downloaded {url} to {filepath}")
+    return sha256.hexdigest()
+
+
+def _total_size_from_content_range(response, offset: int) -> Optional[int]:
+    match = _content_range_re.match(response.headers.get("Content-Range", ""))
+    if not match:
+        raise DownloadError("Missing Content-Range in partial response")
+    if int(match.group(1)) != offset:
+        raise DownloadError(f"Server resumed at byte {match.group(1)}, expected {offset}")
+    total = match.group(3)
+    return None if total == "*" else int(total)
+
+
+def _hash_existing(fp: Path):
+    sha256 = hashlib.sha256()
+    with fp.open(mode="rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256
+
+
+def _verify(
+    fp: Path,
+    sha256_hex: str,
+    total_size: Optional[int],
+    expected_size: Optional[int],
+    expected_sha256: Optional[str],
+    magic: Optional[bytes],
+) -> None:
+    size = fp.stat().st_size
+    if total_size is not None and size != total_size:
+        raise DownloadError(f"Size mismatch for {fp}: got {size}, server sent {total_size}")
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"Size mismatch for {fp}: got {size}, expected {expected_size}")
+    if expected_sha256 is not None and sha256_hex != expected_sha256.lower():
+        raise DownloadError(f"Checksum mismatch for {fp}")
+    if magic is not None:
+        with fp.open(mode="rb") as f:
+            if f.read(len(magic)) != magic:
+                raise DownloadError(f"Unexpected file content for {fp}")
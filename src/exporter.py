@@ -0,0 +1,193 @@
+# built-in modules
+import csv
+import itertools
+import json
+import re
+import string
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+# local
+from paper_class import Paper
+from storage import StorageBackend
+
+__all__ = ["EXPORT_FORMATS", "iter_library", "export_library", "bibtex_entry", "bibtex_key"]
+
+# format -> file extension
+EXPORT_FORMATS: Dict[str, str] = {"bibtex": "bib", "csv": "csv", "jsonl": "jsonl"}
+CSV_COLUMNS = [
+    "paper_id",
+    "title",
+    "authors",
+    "year",
+    "src_website",
+    "paper_url",
+    "pdf_url",
+    "added_at",
+    "labels",
+]
+
+_key_word_re = re.compile(r"[A-Za-z0-9]+")
+_arxiv_year_re = re.compile(r"^(\d{2})(\d{2})\.\d{4,5}$")
+# "@inproceedings{He_2016_CVPR," -> "He_2016_CVPR"
+_bibtex_key_re = re.compile(r"^(\s*@\w+\s*\{\s*)([^,\s]+)(\s*,)")
+
+
+def iter_library(
+    storage: StorageBackend, username: str, batch_size: int = 100
+) -> Iterator[Tuple[dict, Paper]]:
+    """
+    Yield (library entry, paper) for every paper in the user's library.
+    Entries are streamed from storage and papers fetched `batch_size` at a
+    time, so memory use does not depend on the size of the library.
+    """
+    batch: List[dict] = []
+
+    def flush():
+        papers = storage.get_papers([entry["paper_id"] for entry in batch])
+        for entry in batch:
+            paper = papers.get(entry["paper_id"])
+            if paper:
+                yield entry, paper
+        batch.clear()
+
+    for entry in storage.iter_user_papers(username):
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield from flush()
+    if batch:
+        yield from flush()
+
+
+def _bibtex_year(paper: Paper) -> str:
+    if paper.year:
+        return str(paper.year)
+    if paper.published_at:
+        return str(paper.published_at)[:4]
+    # new style arXiv ids start with YYMM
+    match = _arxiv_year_re.match(paper.paper_id)
+    return f"20{match.group(1)}" if match else ""
+
+
+def _bibtex_escape(value: str) -> str:
+    return value.replace("{", "\\{").replace("}", "\\}")
+
+
+def bibtex_key(paper: Paper) -> str:
+    """
+    Citation key of `paper`: the key of the scraped BibTeX, or one built
+    from the first author's last name, the year and the first title word
+    """
+    if paper.bibtex:
+        match = _bibtex_key_re.match(paper.bibtex)
+        if match:
+            return match.group(2)
+    last_name = paper.first_author.split()[-1] if paper.first_author else "anonymous"
+    title_words = [w for w in _key_word_re.findall(paper.title) if len(w) > 3]
+    return "".join(
+        _key_word_re.findall(f"{last_name}{_bibtex_year(paper)}{title_words[0] if title_words else ''}")
+    ).lower()
+
+
+def _key_suffixes() -> Iterator[str]:
+    # a, b, ..., z, aa, ab, ...
+    for length in itertools.count(1):
+        for letters in itertools.product(string.ascii_lowercase, repeat=length):
+            yield "".join(letters)
+
+
+def _unique_key(key: str, used: Set[str]) -> str:
+    """
+    `key`, or `key` with the first free suffix if it is already in `used`.
+    BibTeX drops or rejects entries whose key was used before.
+    """
+    candidate = key
+    if candidate in used:
+        candidate = next(key + suffix for suffix in _key_suffixes() if key + suffix not in used)
+    used.add(candidate)
+    return candidate
+
+
+def bibtex_entry(paper: Paper, key: str = None) -> str:
+    """
+    The BibTeX captured by the scraper, or one built from the paper fields.
+    `key` replaces the citation key, by default bibtex_key(paper).
+    """
+    if paper.bibtex:
+        entry = paper.bibtex.strip()
+        if key and _bibtex_key_re.match(entry):
+            entry = _bibtex_key_re.sub(lambda m: m.group(1) + key + m.group(3), entry, count=1)
+        return entry
+
+    key = key or bibtex_key(paper)
+    fields = [
+        ("title", "{" + _bibtex_escape(paper.title) + "}"),
+        ("author", " and ".join(paper.authors)),
+        ("year", _bibtex_year(paper)),
+        ("url", paper.paper_url),
+    ]
+    if paper.src_website == "arxiv":
+        fields += [("eprint", paper.paper_id), ("archivePrefix", "arXiv")]
+    lines = [f"@misc{{{key},"]
+    lines += [f"  {name}={{{value}}}," for name, value in fields if value]
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def export_library(
+    storage: StorageBackend,
+    username: str,
+    fmt: str = "bibtex",
+    batch_size: int = 100,
+) -> Tuple[Path, int]:
+    """
+    Write the user's library in `fmt` ("bibtex", "csv" or "jsonl") to a
+    temporary file, return its path and the number of papers written.
+    The caller deletes the file.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise Exception(f"Invalid export format: '{fmt}'")
+
+    count = 0
+    with tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        newline="" if fmt == "csv" else None,
+        prefix=f"paperbot_{username}_",
+        suffix=f".{EXPORT_FORMATS[fmt]}",
+        delete=False,
+    ) as f:
+        rows = iter_library(storage, username, batch_size=batch_size)
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for entry, paper in rows:
+                writer.writerow(
+                    [
+                        paper.paper_id,
+                        paper.title,
+                        "; ".join(paper.authors),
+                        paper.year,
+                        paper.src_website,
+                        paper.paper_url,
+                        paper.pdf_url,
+                        entry.get("added_at"),
+                        "; ".join(entry.get("labels") or []),
+                    ]
+                )
+                count += 1
+        elif fmt == "jsonl":
+            for entry, paper in rows:
+                record = paper.to_dict()
+                record["added_at"] = entry.get("added_at")
+                record["labels"] = entry.get("labels") or []
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+        else:
+            used_keys: Set[str] = set()
+            for _, paper in rows:
+                key = _unique_key(bibtex_key(paper), used_keys)
+                f.write(bibtex_entry(paper, key=key) + "\n\n")
+                count += 1
+    return Path(f.name), count
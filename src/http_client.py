@@ -0,0 +1,212 @@
+# built-in modules
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+# external modules
+from markkk.logger import logger
+
+if TYPE_CHECKING:
+    import requests
+
+__all__ = ["HttpClient", "HttpResponse"]
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (3.05, 15)  # (connect, read) seconds
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+USER_AGENT = "paperbot (+https://github.com/MarkHershey/paperbot)"
+
+
+class HttpResponse:
+    """
+    Minimal response object returned by HttpClient, it is either built from a
+    live response or replayed from the on-disk cache after a 304.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        text: str,
+        headers: Dict[str, str],
+        from_cache: bool = False,
+    ):
+        self.url: str = url
+        self.status_code: int = status_code
+        self.text: str = text
+        self.headers: Dict[str, str] = headers
+        self.from_cache: bool = from_cache
+
+    def __repr__(self) -> str:
+        return f"<HttpResponse [{self.status_code}] {self.url}>"
+
+
+class HttpClient:
+    """
+    Shared HTTP layer for the scrapers.
+
+    One requests.Session keeps a keep-alive connection pool per host, every
+    request has connect/read timeouts, and transient failures (connection
+    errors, timeouts, 429 and 5xx) are retried with jittered exponential
+    backoff. With a `cache_dir`, 200 responses carrying an ETag or
+    Last-Modified header are stored on disk and revalidated with
+    If-None-Match / If-Modified-Since, so an unchanged page costs a 304.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path, None] = None,
+        timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        max_cache_entries: int = 2000,
+    ):
+        self.timeout: Tuple[float, float] = timeout
+        self.max_retries: int = max_retries
+        self.backoff_base: float = backoff_base
+        self.backoff_max: float = backoff_max
+        self.max_cache_entries: int = max_cache_entries
+
+        self.pool_connections: int = pool_connections
+        self.pool_maxsize: int = pool_maxsize
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+
+        self.cache_dir: Optional[Path] = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._cache_lock = threading.Lock()
+        self._cache_writes: int = 0
+
+    @property
+    def session(self) -> "requests.Session":
+        """
+        The requests.Session, created (and requests imported) on first use
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    session.headers["User-Agent"] = USER_AGENT
+                    # pool_connections: number of hosts to keep pools for
+                    # pool_maxsize: number of keep-alive connections per host
+                    adapter = HTTPAdapter(
+                        pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize
+                    )
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def get(self, url: str, conditional: bool = True, **kwargs) -> HttpResponse:
+        headers = dict(kwargs.pop("headers", {}))
+        cached = self._load_cached(url) if conditional else None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.request("GET", url, headers=headers, **kwargs)
+
+        if response.status_code == 304 and cached:
+            logger.debug(f"Not modified: {url}")
+            return HttpResponse(url, 200, cached["text"], cached["headers"], from_cache=True)
+
+        result = HttpResponse(
+            url, response.status_code, response.text, dict(response.headers)
+        )
+        if conditional and response.status_code == 200:
+            self._store_cached(url, response)
+        return result
+
+    def request(self, method: str, url: str, **kwargs) -> "requests.Response":
+        """
+        Send a request with timeouts and retries, return the last response.
+        Connection errors are re-raised once the retries are used up.
+        """
+        import requests
+
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                if attempt == self.max_retries:
+                    raise
+                logger.warning(f"{method} {url} failed ({err}), retrying...")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                return response
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying...")
+            time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+            response.close()
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.backoff_max, float(retry_after))
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        # full jitter
+        return random.uniform(0, delay)
+
+    ###########################################################
+    # on-disk response cache
+
+    def _cache_fp(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def _load_cached(self, url: str) -> Optional[dict]:
+        if not self.cache_dir:
+            return None
+        cache_fp = self._cache_fp(url)
+        try:
+            with cache_fp.open() as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, url: str, response: "requests.Response") -> None:
+        if not self.cache_dir:
+            return
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": dict(response.headers),
+            "text": response.text,
+        }
+        cache_fp = self._cache_fp(url)
+        tmp_fp = cache_fp.with_suffix(f".{threading.get_ident()}.tmp")
+        with tmp_fp.open(mode="w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_fp, cache_fp)
+
+        with self._cache_lock:
+            self._cache_writes += 1
+            prune = self._cache_writes % 100 == 0
+        if prune:
+            self._prune_cache()
+
+    def _prune_cache(self) -> None:
+        entries = sorted(self.cache_dir.glob("*.json"), key=lambda fp: fp.stat().st_mtime)
+        for cache_fp in entries[: max(0, len(entries) - self.max_cache_entries)]:
+            try:
+                cache_fp.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,237 @@
+# built-in modules
+import contextvars
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# external modules
+from markkk.logger import logger
+
+# local
+from metrics import isolate_request_labels
+from negative_cache import normalize_url
+from paper_class import Paper
+from rate_limit import RateLimiter, RateLimitExceeded
+
+__all__ = [
+    "LinkResult",
+    "LinkResolver",
+    "chat_limiter",
+    "escape_markdown",
+    "extract_urls",
+    "failure_message",
+    "format_reply",
+]
+
+MAX_LINKS_PER_MESSAGE: int = 20
+LINK_TIMEOUT: float = 90  # seconds for all links of a message
+MAX_MESSAGE_LENGTH: int = 4096  # Telegram's limit per message
+
+# one token of a chat's quota per message, however many links it has; refused
+# straight away with the time to the next slot, as waiting would hold one of
+# the dispatcher's few run_async threads
+chat_limiter = RateLimiter("chat", rate=0.2, burst=5, max_wait=0)
+
+# telegram.MessageEntity.URL / TEXT_LINK
+ENTITY_URL = "url"
+ENTITY_TEXT_LINK = "text_link"
+
+# characters with a meaning in Telegram's (legacy) Markdown parse mode
+_markdown_re = re.compile(r"([_*`\[])")
+
+# replies to links that failed, by error class, also for repeats served from negative_cache
+FAILURE_REPLIES = {
+    "unsupported": "This link is not supported, please send an arXiv, CVF Open Access or OpenReview paper link.",
+    "malformed": "This link does not point to a paper, please send the link of its abstract or PDF page.",
+    "not_found": "The paper was not found on its source website, please check the link.",
+    "upstream_error": "The source website is not responding, please try again in a minute.",
+}
+
+
+def extract_urls(message, limit: int = MAX_LINKS_PER_MESSAGE) -> List[str]:
+    """
+    URLs of the URL and TEXT_LINK entities of a telegram.Message in the
+    order they appear, without repeats, at most `limit`
+    """
+    entities = message.parse_entities([ENTITY_URL, ENTITY_TEXT_LINK])
+    urls = []
+    seen = set()
+    for entity, text in sorted(entities.items(), key=lambda item: item[0].offset):
+        url = entity.url if entity.type == ENTITY_TEXT_LINK else text
+        key = normalize_url(url) if url else ""
+        if key and key not in seen:
+            seen.add(key)
+            urls.append(url)
+    if len(urls) > limit:
+        logger.warning(f"Message has {len(urls)} links, only the first {limit} are read")
+    return urls[:limit]
+
+
+class LinkResult:
+    __slots__ = ("url", "paper", "versions", "error")
+
+    def __init__(
+        self,
+        url: str,
+        paper: Optional[Paper] = None,
+        versions: Sequence[Paper] = (),
+        error: Optional[Exception] = None,
+    ):
+        self.url: str = url
+        self.paper: Optional[Paper] = paper
+        self.versions: Sequence[Paper] = versions
+        self.error: Optional[Exception] = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def outcome(self) -> str:
+        if self.error is None:
+            return "ok"
+        if isinstance(self.error, RateLimitExceeded):
+            return "throttled"
+        if isinstance(self.error, TimeoutError):
+            return "timeout"
+        return getattr(self.error, "error_class", "error")
+
+
+class LinkResolver:
+    """
+    Resolves the links of a message in parallel on a thread pool shared by
+    all messages, so a reading list takes about as long as its slowest link.
+    The pool is started on first use.
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers: int = max_workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="link-resolver"
+                )
+            return self._pool
+
+    @staticmethod
+    def _run(resolve: Callable[[str], Tuple[Paper, Sequence[Paper]]], url: str) -> LinkResult:
+        # e.g. the src_website of this link, not of the others of the message
+        isolate_request_labels()
+        try:
+            paper, versions = resolve(url)
+            return LinkResult(url, paper=paper, versions=versions)
+        except Exception as err:
+            if getattr(err, "error_class", None) or isinstance(err, RateLimitExceeded):
+                logger.warning(err)
+            else:
+                logger.error(err)
+            return LinkResult(url, error=err)
+
+    def resolve_all(
+        self,
+        urls: Sequence[str],
+        resolve: Callable[[str], Tuple[Paper, Sequence[Paper]]],
+        chat_id: Optional[str] = None,
+        timeout: float = LINK_TIMEOUT,
+    ) -> List[LinkResult]:
+        """
+        Resolve `urls` concurrently, return one result per URL in order.
+        `resolve(url)` returns the paper and its versions from other sources.
+        With `chat_id`, the message takes one token of that chat's quota in
+        chat_limiter before any link is submitted. If it is refused, every
+        link fails with the RateLimitExceeded.
+        """
+        if chat_id is not None:
+            try:
+                chat_limiter.acquire(chat_id)
+            except RateLimitExceeded as err:
+                logger.warning(err)
+                return [LinkResult(url, error=err) for url in urls]
+
+        # each link gets its own copy of the request trace context
+        futures: List[Future] = [
+            self._get_pool().submit(contextvars.copy_context().run, self._run, resolve, url)
+            for url in urls
+        ]
+        wait_futures(futures, timeout=timeout)
+        results = []
+        for url, future in zip(urls, futures):
+            if future.done():
+                results.append(future.result())
+            else:
+                results.append(LinkResult(url, error=TimeoutError(f"Timed out resolving {url}")))
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+def escape_markdown(text: str) -> str:
+    """
+    Same as telegram.utils.helpers.escape_markdown: scraped titles, CVF
+    URLs and user input may contain unbalanced '_' or '*', which make
+    Telegram reject the whole message
+    """
+    return _markdown_re.sub(r"\\\1", text or "")
+
+
+def failure_message(err: Exception) -> str:
+    if isinstance(err, RateLimitExceeded):
+        return "Too many requests, please try again in {:.0f} seconds.".format(err.wait + 1)
+    if isinstance(err, TimeoutError):
+        return "Timed out, please try again later."
+    error_class = getattr(err, "error_class", None)
+    return FAILURE_REPLIES.get(error_class, "Internal Server Error")
+
+
+def _format_paper(paper: Paper, versions: Sequence[Paper]) -> str:
+    msg = "*Paper*: {}\n\n*Author*: {}\n\n*PDF*: {}".format(
+        escape_markdown(paper.title),
+        escape_markdown(paper.first_author),
+        escape_markdown(paper.pdf_url),
+    )
+    if versions:
+        msg += "\n\n*Also on*: " + ", ".join(
+            "[{}]({})".format(escape_markdown(version.src_website), version.paper_url)
+            for version in versions
+        )
+    return msg
+
+
+def format_reply(results: Sequence[LinkResult], limit: int = MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    One Markdown reply listing the result of every link, split into
+    several messages only if it is longer than Telegram allows
+    """
+    if len(results) == 1:
+        result = results[0]
+        if result.ok:
+            return [_format_paper(result.paper, result.versions)]
+        return [failure_message(result.error)]
+
+    parts = []
+    for i, result in enumerate(results, start=1):
+        if result.ok:
+            parts.append(f"{i}. " + _format_paper(result.paper, result.versions).replace("\n\n", "\n"))
+        else:
+            parts.append(f"{i}. {escape_markdown(result.url)}\n{failure_message(result.error)}")
+
+    messages = []
+    current = ""
+    for part in parts:
+        if current and len(current) + 2 + len(part) > limit:
+            messages.append(current)
+            current = ""
+        current = f"{current}\n\n{part}" if current else part
+    if current:
+        messages.append(current)
+    return messages
@@ -0,0 +1,401 @@
+# built-in modules
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# external modules
+from markkk.logger import logger
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "RequestTrace",
+    "registry",
+    "stage_duration",
+    "request_duration",
+    "errors_total",
+    "span",
+    "timed",
+    "trace_request",
+    "set_request_labels",
+    "isolate_request_labels",
+    "configure_slow_log",
+    "start_metrics_server",
+]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with a fixed set of label names
+    """
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """
+    Value that can go up and down, e.g. tokens left in a rate limiter
+    """
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: str) -> float:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values (seconds) per label set
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name: str = name
+        self.help: str = help
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def count(self, **labels: str) -> int:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            entry = self._values.get(key)
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(float(bound))
+                labels = _format_labels(self.label_names, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[object] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.register(
+    Histogram(
+        "paperbot_stage_duration_seconds",
+        "Time spent in each stage of handling a request.",
+        ["stage", "src_website", "cache"],
+    )
+)
+request_duration = registry.register(
+    Histogram(
+        "paperbot_request_duration_seconds",
+        "Time to handle a Telegram update end to end.",
+        ["handler", "outcome"],
+    )
+)
+errors_total = registry.register(
+    Counter(
+        "paperbot_errors_total",
+        "Exceptions raised out of a stage, by exception type.",
+        ["stage", "error_type"],
+    )
+)
+
+
+###########################################################
+# request traces
+
+
+class RequestTrace:
+    """
+    Stage timings of one request, collected by the spans run while it is
+    the current trace of the thread
+    """
+
+    def __init__(self, handler: str, **labels: str):
+        self.handler: str = handler
+        self.labels: Dict[str, str] = dict(labels)
+        self.outcome: str = "ok"
+        self.started_at: float = time.perf_counter()
+        self.stages: List[Tuple[str, float, Dict[str, str]]] = []
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def to_dict(self) -> dict:
+        return {
+            "handler": self.handler,
+            "outcome": self.outcome,
+            "labels": self.labels,
+            "total_ms": round(self.elapsed * 1000, 3),
+            "stages": [
+                {"stage": stage, "ms": round(seconds * 1000, 3), **labels}
+                for stage, seconds, labels in self.stages
+            ],
+        }
+
+
+_current_trace: "contextvars.ContextVar[Optional[RequestTrace]]" = contextvars.ContextVar(
+    "paperbot_request_trace", default=None
+)
+# labels spans default to, the trace's own labels unless isolate_request_labels() was called
+_request_labels: "contextvars.ContextVar[Optional[Dict[str, str]]]" = contextvars.ContextVar(
+    "paperbot_request_labels", default=None
+)
+_slow_log: Dict[str, object] = {"threshold": None, "sink": None}
+
+
+def configure_slow_log(threshold: Optional[float], sink: Callable[[dict], object] = None) -> None:
+    """
+    Pass the stage breakdown of every request slower than `threshold`
+    seconds to `sink` (default: the logger), None disables it
+    """
+    _slow_log["threshold"] = threshold
+    _slow_log["sink"] = sink
+
+
+def set_request_labels(**labels: str) -> None:
+    """
+    Label the current request, e.g. with its src_website once it is known.
+    Spans started afterwards default to these labels.
+    """
+    request_labels = _request_labels.get()
+    if request_labels is not None:
+        request_labels.update(labels)
+
+
+def isolate_request_labels() -> None:
+    """
+    Give the current context its own copy of the request labels. Tasks of
+    one request that run in parallel, each in a copy of the request's
+    context, call this first so their labels do not overwrite each other.
+    """
+    request_labels = _request_labels.get()
+    if request_labels is not None:
+        _request_labels.set(dict(request_labels))
+
+
+@contextmanager
+def trace_request(handler: str, **labels: str) -> Iterator[RequestTrace]:
+    """
+    Time a whole request, set `trace.outcome` before the block ends
+    """
+    trace = RequestTrace(handler, **labels)
+    token = _current_trace.set(trace)
+    labels_token = _request_labels.set(trace.labels)
+    try:
+        yield trace
+    except BaseException:
+        trace.outcome = "error"
+        raise
+    finally:
+        _request_labels.reset(labels_token)
+        _current_trace.reset(token)
+        elapsed = trace.elapsed
+        request_duration.observe(elapsed, handler=handler, outcome=trace.outcome)
+        threshold = _slow_log["threshold"]
+        if threshold is not None and elapsed >= threshold:
+            record = trace.to_dict()
+            sink = _slow_log["sink"]
+            if sink:
+                sink(record)
+            else:
+                logger.warning(f"Slow request: {record}")
+
+
+class Span:
+    def __init__(self, stage: str, labels: Dict[str, str]):
+        self.stage: str = stage
+        self.labels: Dict[str, str] = labels
+
+
+@contextmanager
+def span(stage: str, **labels: str) -> Iterator[Span]:
+    """
+    Time a stage into stage_duration. Labels can be filled in inside the
+    block through `span.labels`, unset ones are taken from the request.
+    An exception leaving the block is counted in errors_total.
+    """
+    trace = _current_trace.get()
+    request_labels = _request_labels.get()
+    merged = {"src_website": "", "cache": ""}
+    if request_labels is not None:
+        merged.update((k, v) for k, v in request_labels.items() if k in merged)
+    merged.update(labels)
+    current = Span(stage, merged)
+    started_at = time.perf_counter()
+    try:
+        yield current
+    except Exception as err:
+        errors_total.inc(stage=stage, error_type=type(err).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started_at
+        stage_duration.observe(elapsed, stage=stage, **current.labels)
+        if trace is not None:
+            trace.stages.append((stage, elapsed, dict(current.labels)))
+
+
+def timed(stage: str):
+    """
+    Decorator form of span()
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+###########################################################
+# exposition
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = registry
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(
+    port: int, host: str = "127.0.0.1", metrics_registry: MetricsRegistry = registry
+) -> ThreadingHTTPServer:
+    """
+    Serve GET /metrics from a daemon thread, return the server
+    (server.server_address has the bound port, call shutdown() to stop it)
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": metrics_registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True)
+    thread.start()
+    logger.info(f"Metrics served on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,82 @@
+"""
+Move user libraries from the embedded 'papers' map of each Firestore user
+document into the per-paper 'papers' subcollection used by FirestoreStorage.
+
+Usage: python src/migrate_user_libraries.py [--dry-run] [--user USERNAME]
+
+Safe to re-run: entries that already exist in the subcollection are kept,
+and the embedded map is only deleted after all of its entries were written.
+"""
+# built-in modules
+import argparse
+
+# external modules
+from firebase_admin import firestore
+from markkk.logger import logger
+
+# local
+from constants import ALL_USER_PARENT, get_db
+from storage import FirestoreStorage
+
+# Firestore allows at most 500 writes per batch
+BATCH_SIZE = 400
+
+
+def migrate_user(user_doc, dry_run: bool = False) -> int:
+    """
+    Migrate a single user document, return the number of entries moved
+    """
+    profile = user_doc.to_dict()
+    papers: dict = profile.get("papers")
+    if papers is None:
+        return 0
+
+    papers_ref = user_doc.reference.collection("papers")
+    existing = {doc.id for doc in papers_ref.select([]).stream()}
+    pending = [
+        entry
+        for paper_id, entry in papers.items()
+        if FirestoreStorage.doc_id(paper_id) not in existing
+    ]
+    logger.info(
+        f"{user_doc.id}: {len(papers)} embedded entries, {len(pending)} to move"
+    )
+    if dry_run:
+        return len(pending)
+
+    for start in range(0, len(pending), BATCH_SIZE):
+        batch = get_db().batch()
+        for entry in pending[start : start + BATCH_SIZE]:
+            doc_id = FirestoreStorage.doc_id(entry["paper_id"])
+            batch.set(papers_ref.document(doc_id), entry)
+        batch.commit()
+
+    user_doc.reference.update({"papers": firestore.DELETE_FIELD})
+    return len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate embedded user libraries")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--user", help="only migrate this username")
+    args = parser.parse_args()
+
+    users_ref = get_db().collection(ALL_USER_PARENT)
+    if args.user:
+        user_docs = [users_ref.document(args.user).get()]
+    else:
+        user_docs = users_ref.stream()
+
+    users, entries = 0, 0
+    for user_doc in user_docs:
+        if not user_doc.exists:
+            continue
+        moved = migrate_user(user_doc, dry_run=args.dry_run)
+        users += 1 if moved else 0
+        entries += moved
+    verb = "Would move" if args.dry_run else "Moved"
+    logger.info(f"{verb} {entries} library entries of {users} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# built-in modules
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+# local
+from metrics import Counter, Gauge, registry
+
+__all__ = ["NegativeCache", "CachedFailure", "normalize_url", "negative_cache"]
+
+# seconds a failure is remembered, by error class
+DEFAULT_TTLS: Dict[str, float] = {
+    "unsupported": 24 * 60 * 60,  # only changes with a new URL handler
+    "malformed": 60 * 60,
+    "not_found": 60 * 60,  # may be a paper that is not public yet
+    "upstream_error": 60,  # 5xx, usually gone within a minute
+}
+DEFAULT_MAX_SIZE: int = 4096
+
+negative_cache_hits = registry.register(
+    Counter(
+        "paperbot_negative_cache_hits_total",
+        "Requests for a URL answered from the negative cache, by error class.",
+        ["error_class"],
+    )
+)
+negative_cache_entries = registry.register(
+    Gauge("paperbot_negative_cache_entries", "URLs currently in the negative cache.")
+)
+
+
+def normalize_url(url: str) -> str:
+    """
+    Host without 'www.', path without trailing slash and the query string.
+    The scheme and fragment do not change which paper a URL points to.
+    Raises ValueError for URLs urlsplit cannot parse, e.g. 'http://[::1'.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    normalized = host + parts.path.rstrip("/")
+    if parts.query:
+        normalized += "?" + parts.query
+    return normalized
+
+
+class CachedFailure(Exception):
+    """
+    Raised instead of redoing the work for a URL that failed recently
+    """
+
+    def __init__(self, url: str, error_class: str):
+        super().__init__(f"Known {error_class} URL: {url}")
+        self.url: str = url
+        self.error_class: str = error_class
+
+
+class NegativeCache:
+    """
+    Recent failures keyed by normalized URL, each with the error class of
+    the exception it failed with (its `error_class` attribute). Exceptions
+    without one, e.g. timeouts, are not cached. Entries expire after the
+    TTL of their class, and the least recently used entry is evicted once
+    `max_size` entries are held.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_size: int = max_size
+        self._timer = timer
+        self._lock = threading.Lock()
+        # normalized url -> [expires_at, error_class, hits], least recently used first
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        try:
+            return normalize_url(url)
+        except ValueError:
+            # unparseable links are re-posted too, key them by their text
+            return url.strip()
+
+    def get(self, url: str) -> Optional[str]:
+        """
+        Return the error class `url` recently failed with, or None
+        """
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self._timer():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry[2] += 1
+            self.hits += 1
+        negative_cache_hits.inc(error_class=entry[1])
+        return entry[1]
+
+    def check(self, url: str) -> None:
+        """
+        Raise CachedFailure if `url` recently failed
+        """
+        error_class = self.get(url)
+        if error_class is not None:
+            raise CachedFailure(url, error_class)
+
+    def put(self, url: str, err: Exception) -> bool:
+        """
+        Remember that `url` failed with `err`, return False if its error
+        class is not cached
+        """
+        error_class = getattr(err, "error_class", None)
+        ttl = self.ttls.get(error_class)
+        if not ttl:
+            return False
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            hits = entry[2] if entry is not None else 0
+            self._entries[key] = [self._timer() + ttl, error_class, hits]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            size = len(self._entries)
+        negative_cache_entries.set(size)
+        return True
+
+    def invalidate(self, url: str) -> bool:
+        with self._lock:
+            return self._entries.pop(self._key(url), None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def top_hits(self, n: int = 10) -> List[Tuple[str, str, int]]:
+        """
+        (url, error_class, hits) of the most re-posted failing URLs
+        """
+        now = self._timer()
+        with self._lock:
+            entries = [
+                (key, error_class, hits)
+                for key, (expires_at, error_class, hits) in self._entries.items()
+                if hits and expires_at > now
+            ]
+        return sorted(entries, key=lambda entry: -entry[2])[:n]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# shared instance used by paper_scraper
+negative_cache = NegativeCache()
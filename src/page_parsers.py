@@ -0,0 +1,157 @@
+# built-in modules
+import html
+import json
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict
+
+__all__ = ["parse_arxiv_page", "parse_cvf_page", "parse_openreview_page"]
+
+# prefer the C-based lxml parser, fall back to the pure python one
+HTML_PARSER = "lxml" if find_spec("lxml") else "html.parser"
+
+
+# bs4 is imported on the first parse, not when the bot starts
+@lru_cache(maxsize=None)
+def _strainer(name: str):
+    """
+    Only the elements matched by these strainers are built into the soup
+    """
+    from bs4 import SoupStrainer
+
+    if name == "arxiv":
+        return SoupStrainer(
+            class_=[
+                "title mathjax",
+                "authors",
+                "abstract mathjax",
+                "tablecell comments mathjax",
+            ]
+        )
+    if name == "cvf":
+        return SoupStrainer(id=["papertitle", "authors", "abstract"])
+    if name == "openreview":
+        return SoupStrainer("script", id="__NEXT_DATA__")
+    raise Exception(f"Invalid strainer: '{name}'")
+
+
+_cvf_bibref_re = re.compile(r'<div class="bibref[^"]*">(.*?)</div>', re.S)
+_br_re = re.compile(r"<br\s*/?>")
+_next_data_re = re.compile(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+
+def parse_arxiv_page(page: str, tmp_paper_dict: Dict[str, str]) -> Dict[str, str]:
+    """
+    Parse an arXiv abstract page
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, HTML_PARSER, parse_only=_strainer("arxiv"))
+
+    # get TITLE
+    result = soup.find("h1", class_="title mathjax")
+    tmp = [i.string for i in result]
+    paper_title = tmp.pop()
+    tmp_paper_dict["title"] = paper_title
+
+    # get AUTHORS
+    result = soup.find("div", class_="authors")
+    author_list = [i.string.strip() for i in result]
+    author_list.pop(0)
+    while "," in author_list:
+        author_list.remove(",")
+    tmp_paper_dict["authors"] = author_list
+
+    # get ABSTRACT
+    result = soup.find("blockquote", class_="abstract mathjax")
+    tmp = [i.string for i in result]
+    paper_abstract = tmp.pop()
+    tmp = paper_abstract.split("\n")
+    paper_abstract = " ".join(tmp)
+    tmp_paper_dict["abstract"] = paper_abstract
+
+    # get COMMENTS
+    result = soup.find("td", class_="tablecell comments mathjax")
+    if result:
+        comments = [i.string.strip() if i.string else "" for i in result]
+        comments = " ".join(comments)
+    else:
+        comments = ""
+    tmp_paper_dict["comments"] = comments
+
+    return tmp_paper_dict
+
+
+def parse_cvf_page(page: str, tmp_paper_dict: Dict[str, str]) -> Dict[str, str]:
+    """
+    Parse a CVF Open Access abstract page
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page, HTML_PARSER, parse_only=_strainer("cvf"))
+
+    # get TITLE
+    result = soup.find("div", id="papertitle")
+    tmp = [i.string for i in result]
+    paper_title = tmp.pop()
+    tmp_paper_dict["title"] = paper_title.strip()
+
+    # get AUTHORS
+    result = soup.find("div", id="authors")
+    authors_str = result.find("i").get_text()
+    author_list = [author.lstrip() for author in authors_str.split(",")]
+    tmp_paper_dict["authors"] = author_list
+
+    # get ABSTRACT
+    result = soup.find("div", id="abstract")
+    tmp = [i.string for i in result]
+    paper_abstract = tmp.pop()
+    tmp = paper_abstract.split("\n")
+    paper_abstract = " ".join(tmp)
+    tmp_paper_dict["abstract"] = paper_abstract.lstrip()
+
+    # get Bibtex, read straight from the markup as it sits outside the strained elements
+    match = _cvf_bibref_re.search(page)
+    bibtex = _br_re.sub("", match.group(1)) if match else ""
+    tmp_paper_dict["bibtex"] = html.unescape(bibtex).strip()
+
+    return tmp_paper_dict
+
+
+def parse_openreview_page(page: str, tmp_paper_dict: Dict[str, str]) -> Dict[str, str]:
+    """
+    Parse an OpenReview forum page.
+    All metadata sits in the JSON of the Next.js '__NEXT_DATA__' script, which
+    is cut out of the page directly instead of building a DOM.
+    """
+    match = _next_data_re.search(page)
+    if match:
+        all_data_str = match.group(1)
+    else:
+        # unexpected script tag layout, let the html parser find it
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(page, HTML_PARSER, parse_only=_strainer("openreview"))
+        all_data_str = soup.find("script", id="__NEXT_DATA__").string
+    all_data_json = json.loads(all_data_str)
+    # The "props" dict will contain all useful info
+    data_dict = all_data_json["props"]["pageProps"]["forumNote"]["content"]
+
+    # get TITLE
+    tmp_paper_dict["title"] = data_dict.get("title", "")
+    # get KEYWORDS
+    tmp_paper_dict["keywords"] = data_dict.get("keywords", "")
+    # get AUTHORS
+    tmp_paper_dict["authors"] = data_dict.get("authors", "")
+    # get ABSTRACT
+    tmp_paper_dict["abstract"] = data_dict.get("abstract", "")
+    # get TL;DR
+    if data_dict.get("one-sentence_summary"):
+        tmp_paper_dict["tldr"] = data_dict.get("one-sentence_summary", "")
+    else:
+        tmp_paper_dict["tldr"] = data_dict.get("TL;DR", "")
+    # get Bibtex
+    tmp_paper_dict["bibtex"] = data_dict.get("_bibtex", "")
+
+    return tmp_paper_dict
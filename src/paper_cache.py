@@ -0,0 +1,100 @@
+# built-in modules
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+# local
+from paper_class import Paper
+
+__all__ = ["PaperCache", "paper_cache"]
+
+# default cache settings
+DEFAULT_MAX_SIZE: int = 2048
+DEFAULT_TTL: float = 6 * 60 * 60  # seconds
+
+
+class PaperCache:
+    """
+    Bounded in-process cache of Paper objects keyed by paper_id.
+
+    Entries expire after `ttl` seconds, and the least recently used entry is
+    evicted once `max_size` entries are held. Safe to share between the
+    dispatcher worker threads.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl: float = DEFAULT_TTL,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        if max_size <= 0:
+            raise ValueError("max_size must be a positive integer")
+        if ttl <= 0:
+            raise ValueError("ttl must be a positive number")
+        self.max_size: int = max_size
+        self.ttl: float = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        # paper_id -> (expires_at, paper), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, Paper]]" = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, paper_id: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(paper_id)
+            return entry is not None and entry[0] > self._timer()
+
+    def get(self, paper_id: str) -> Optional[Paper]:
+        with self._lock:
+            entry = self._entries.get(paper_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, paper = entry
+            if expires_at <= self._timer():
+                del self._entries[paper_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(paper_id)
+            self.hits += 1
+            return paper
+
+    def put(self, paper: Paper) -> None:
+        paper_id = paper.paper_id
+        if not paper_id:
+            return
+        with self._lock:
+            self._entries[paper_id] = (self._timer() + self.ttl, paper)
+            self._entries.move_to_end(paper_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, paper_id: str) -> bool:
+        with self._lock:
+            return self._entries.pop(paper_id, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# shared cache instance used by datautils
+paper_cache = PaperCache()
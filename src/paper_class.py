@@ -1,115 +1,216 @@
 # built-in modules
+import sys
 from datetime import datetime
+from operator import attrgetter, itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Tuple, Union
+
+__all__ = ["Paper", "FrozenPaper", "UserPaper"]
+
+# field order of the Paper constructor and of Paper.to_dict
+PAPER_FIELDS: Tuple[str, ...] = (
+    "paper_uid",
+    "paper_id",
+    "title",
+    "authors",
+    "paper_url",
+    "pdf_url",
+    "abstract",
+    "tldr",
+    "keywords",
+    "public_comments",
+    "year",
+    "published_at",
+    "bibtex",
+    "src_website",
+    "fetched_at",
+)
+_PAPER_FIELD_SET = frozenset(PAPER_FIELDS)
+_get_paper_items = itemgetter(*PAPER_FIELDS)
+_get_paper_attrs = attrgetter(*PAPER_FIELDS)
+
+
+def _as_tuple(values: Union[Iterable[str], str, None]) -> Tuple[str, ...]:
+    if not values:
+        return ()
+    if isinstance(values, str):
+        return (values,)
+    return tuple(values)
+
+
+def _intern(value: str) -> str:
+    # few distinct values (e.g. "arxiv", "2020"), shared by every Paper
+    return sys.intern(value) if type(value) is str else value
 
 
 class Paper:
+    """
+    Metadata of a paper.
+
+    Instances have no __dict__, authors and keywords are stored as tuples,
+    and src_website and year are interned, which keeps large in-memory
+    caches and indexes of papers small. Use FrozenPaper for a read-only,
+    hashable variant.
+    """
+
+    __slots__ = PAPER_FIELDS
+
     def __init__(
         self,
         paper_uid="",
         paper_id="",
         title="",
-        authors=[],
+        authors=(),
         paper_url="",
         pdf_url="",
         abstract="",
         tldr="",
-        keywords=[],
+        keywords=(),
         public_comments="",
         year="",
         published_at="",
         bibtex="",
         src_website="",
+        fetched_at=0,
     ):
         self.paper_uid = paper_uid
         self.paper_id: str = paper_id
         self.title: str = title
-        self.authors: List[str] = authors
+        self.authors: Tuple[str, ...] = authors if type(authors) is tuple else _as_tuple(authors)
         self.paper_url: str = paper_url
         self.pdf_url: str = pdf_url
         self.abstract: str = abstract
         self.tldr: str = tldr
-        self.keywords: List[str] = keywords
+        self.keywords: Tuple[str, ...] = (
+            keywords if type(keywords) is tuple else _as_tuple(keywords)
+        )
         self.public_comments: str = public_comments
-        self.year: str = year
+        self.year: str = _intern(year) if year else year
         self.published_at: str = published_at
         self.bibtex: str = bibtex
-        self.src_website: str = src_website
+        self.src_website: str = _intern(src_website) if src_website else src_website
+        # unix time the metadata was scraped, 0 if unknown (stored before it was recorded)
+        self.fetched_at: int = fetched_at
 
-        # derived
-        self.first_author = self.authors[0] if self.authors else ""
+    @property
+    def first_author(self) -> str:
+        return self.authors[0] if self.authors else ""
 
     def __repr__(self) -> str:
         return self.title
 
+    def __reduce__(self):
+        return (self.__class__._from_values, (_get_paper_attrs(self),))
+
     def to_dict(self) -> dict:
+        authors = self.authors
         _dict = {
             "paper_uid": self.paper_uid,
             "paper_id": self.paper_id,
             "title": self.title,
-            "authors": self.authors,
+            # lists, so the dict is JSON and Firestore friendly
+            "authors": list(authors),
             "paper_url": self.paper_url,
             "pdf_url": self.pdf_url,
             "abstract": self.abstract,
             "tldr": self.tldr,
-            "keywords": self.keywords,
+            "keywords": list(self.keywords),
             "public_comments": self.public_comments,
             "year": self.year,
             "published_at": self.published_at,
             "bibtex": self.bibtex,
             "src_website": self.src_website,
-            "first_author": self.first_author,
+            "first_author": authors[0] if authors else "",
+            "fetched_at": self.fetched_at,
         }
         return _dict
 
-    @staticmethod
-    def from_dict(src_dict: dict):
+    @classmethod
+    def _from_values(cls, values: tuple):
+        return cls(*values)
+
+    @classmethod
+    def from_dict(cls, src_dict: dict):
         # TODO: dict validations
+        if len(src_dict) >= len(PAPER_FIELDS):
+            # fast path: a dict written by to_dict() has every field
+            try:
+                return cls(*_get_paper_items(src_dict))
+            except KeyError:
+                pass
+        # partial dicts, e.g. fresh from a scraper: pass on the known fields only
+        return cls(**{k: v for k, v in src_dict.items() if k in _PAPER_FIELD_SET})
 
-        return Paper(
-            paper_uid=src_dict.get("paper_uid", ""),
-            paper_id=src_dict.get("paper_id", ""),
-            title=src_dict.get("title", ""),
-            authors=src_dict.get("authors", []),
-            paper_url=src_dict.get("paper_url", ""),
-            pdf_url=src_dict.get("pdf_url", ""),
-            abstract=src_dict.get("abstract", ""),
-            tldr=src_dict.get("tldr", ""),
-            keywords=src_dict.get("keywords", []),
-            public_comments=src_dict.get("public_comments", ""),
-            year=src_dict.get("year", ""),
-            published_at=src_dict.get("published_at", ""),
-            bibtex=src_dict.get("bibtex", ""),
-            src_website=src_dict.get("src_website", ""),
-        )
+    def freeze(self) -> "FrozenPaper":
+        return FrozenPaper(*_get_paper_attrs(self))
 
     def get_first_author(self) -> str:
         return self.authors[0] if self.authors else None
 
 
+class FrozenPaper(Paper):
+    """
+    Read-only Paper, hashable and comparable by value
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        # let Paper normalise the fields, then copy them past __setattr__
+        paper = Paper(*args, **kwargs)
+        for field, value in zip(PAPER_FIELDS, _get_paper_attrs(paper)):
+            object.__setattr__(self, field, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"FrozenPaper is read-only, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"FrozenPaper is read-only, cannot delete '{name}'")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FrozenPaper):
+            return NotImplemented
+        return _get_paper_attrs(self) == _get_paper_attrs(other)
+
+    def __hash__(self) -> int:
+        return hash(_get_paper_attrs(self))
+
+    def freeze(self) -> "FrozenPaper":
+        return self
+
+
 class UserPaper:
+    __slots__ = (
+        "paper_uid",
+        "reading_note",
+        "reading_status",
+        "labels",
+        "added_at",
+        "last_read_at",
+        "favorite",
+    )
+
     def __init__(
         self,
         paper_uid: str = "",
         reading_note: str = "",
         reading_status: str = "",
-        labels: List[str] = [],
+        labels: Iterable[str] = (),
         added_at: datetime = None,
         last_read_at: datetime = None,
         favorite: bool = False,
     ):
         self.paper_uid: str = paper_uid
         self.reading_note: str = reading_note
-        self.reading_status: str = reading_status
-        self.labels: List[str] = labels
+        self.reading_status: str = _intern(reading_status)
+        self.labels: Tuple[str, ...] = _as_tuple(labels)
         self.added_at: datetime = datetime.now() if added_at is None else added_at
         self.last_read_at: datetime = (
             self.added_at if last_read_at is None else last_read_at
         )
         self.favorite: bool = favorite
 
-    def favorite(self) -> None:
+    def mark_favorite(self) -> None:
         self.favorite = True
 
     def unfavorite(self) -> None:
@@ -125,13 +226,13 @@ class UserPaper:
         if not isinstance(label, str):
             raise ValueError("label must be a string")
         if label not in self.labels:
-            self.labels.append(label)
+            self.labels = self.labels + (label,)
 
     def remove_label(self, label: str) -> None:
         if not isinstance(label, str):
             raise ValueError("label must be a string")
         if label in self.labels:
-            self.labels.remove(label)
+            self.labels = tuple(l for l in self.labels if l != label)
 
     def update_last_read(self, last_read_at: datetime) -> None:
         if not isinstance(last_read_at, datetime):
@@ -143,7 +244,7 @@ class UserPaper:
             "paper_uid": self.paper_uid,
             "reading_note": self.reading_note,
             "reading_status": self.reading_status,
-            "labels": self.labels,
+            "labels": list(self.labels),
             "added_at": self.added_at,
             "last_read_at": self.last_read_at,
             "favorite": self.favorite,
@@ -158,7 +259,7 @@ class UserPaper:
             paper_uid=src_dict.get("paper_uid", ""),
             reading_note=src_dict.get("reading_note", ""),
             reading_status=src_dict.get("reading_status", ""),
-            labels=src_dict.get("labels", []),
+            labels=src_dict.get("labels", ()),
             added_at=src_dict.get("added_at", None),
             last_read_at=src_dict.get("last_read_at", None),
             favorite=src_dict.get("favorite", False),
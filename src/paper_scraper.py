@@ -1,21 +1,64 @@
 # built-in modules
-import json
+import time
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 # external modules
-import requests
-from bs4 import BeautifulSoup
 from markkk.logger import logger
 from markkk.time import timestamp_seconds
 
 # local
+from arxiv_api import get_papers_from_arxiv_api
 from constants import project_root
-from datautils import get_paper_from_db, save_paper_to_db
+from datautils import get_paper_from_db, reindex_paper, save_paper_to_db
+from http_client import HttpClient
+from metrics import set_request_labels, span
+from negative_cache import CachedFailure, negative_cache, normalize_url
+from page_parsers import parse_arxiv_page, parse_cvf_page, parse_openreview_page
 from paper_class import Paper
-from url_handlers import process_url
+from rate_limit import RateLimiter
+from refresher import PaperRefresher
+from singleflight import SingleFlight
+from url_handlers import MalformedURL, UnsupportedURL, legacy_paper_id, process_url
+
+__all__ = [
+    "get_paper",
+    "get_arxiv_papers",
+    "refresh_paper",
+    "paper_refresher",
+    "source_limiter",
+    "UpstreamError",
+]
+
+# shared by all scrapers: pooled connections, timeouts, retries and revalidation
+http_session = HttpClient(cache_dir=project_root / "cache" / "http")
+
+# requests per second and burst size allowed towards each source website
+DEFAULT_SOURCE_LIMITS = {
+    "arxiv": {"rate": 1.0, "burst": 4},
+    "cvf": {"rate": 2.0, "burst": 5},
+    "openreview": {"rate": 2.0, "burst": 5},
+}
+# bursts of updates wait for a slot (up to max_wait) instead of getting us blocked
+source_limiter = RateLimiter(
+    "source", rate=1.0, burst=4, max_wait=30, limits=DEFAULT_SOURCE_LIMITS, export_keys=True
+)
+
+# concurrent requests for the same paper_id share one scrape and one db write
+scrape_flight = SingleFlight()
+SCRAPE_WAIT_TIMEOUT: float = 60  # seconds
+
+
+class UpstreamError(Exception):
+    """
+    The source website answered a paper page with a non-200 status
+    """
 
-__all__ = ["get_paper"]
+    def __init__(self, url: str, status_code: int):
+        super().__init__(f"Cannot connect to {url} (status {status_code})")
+        self.url: str = url
+        self.status_code: int = status_code
+        self.error_class: str = "not_found" if status_code in (404, 410) else "upstream_error"
 
 
 def get_paper(url: str) -> Paper:
@@ -23,10 +66,25 @@ def get_paper(url: str) -> Paper:
     Get a Paper object from a supported URL
     """
     try:
-        tmp_paper_dict = process_url(url)
+        # a link that failed recently fails again right away, without the work
+        negative_cache.check(url)
+        try:
+            normalize_url(url)
+        except ValueError as err:
+            # urlsplit rejects it, e.g. 'http://[::1'
+            raise MalformedURL(f"Cannot parse URL: {url}") from err
+        with span("process_url"):
+            tmp_paper_dict = process_url(url)
+    except CachedFailure:
+        raise
+    except (UnsupportedURL, MalformedURL) as err:
+        logger.error(err)
+        negative_cache.put(url, err)
+        raise
     except Exception as err:
         logger.error(err)
         raise Exception(f"Error while processing URL: {url}")
+    set_request_labels(src_website=tmp_paper_dict.get("src_website", ""))
 
     # verify expected keys are present
     for key in ("paper_id", "paper_url", "pdf_url", "src_website"):
@@ -34,159 +92,168 @@ def get_paper(url: str) -> Paper:
             logger.error(f"Missing Key in 'tmp_paper_dict': {key}")
             raise Exception(f"Missing Key in 'tmp_paper_dict': {key}")
 
-    # try to get paper from database first
-    paper = get_paper_from_db(tmp_paper_dict["paper_id"])
+    # try to get paper from database first, a stale copy is refreshed in the background
+    paper = get_paper_from_db(tmp_paper_dict["paper_id"]) or get_legacy_paper(url, tmp_paper_dict)
     if paper:
         logger.debug("Paper found in database.")
+        paper_refresher.touch(paper)
         return paper
-    else:
-        logger.debug("Paper not found in database, start scraping...")
 
-    # start scraping from source website
-    src_website = tmp_paper_dict.get("src_website")
-    if src_website == "arxiv":
-        paper_dict = get_paper_from_arxiv(tmp_paper_dict)
-    elif src_website == "cvf":
-        paper_dict = get_paper_from_cvf(tmp_paper_dict)
-    elif src_website == "openreview":
-        paper_dict = get_paper_from_openreview(tmp_paper_dict)
-    else:
-        logger.error(f"Invalid source website: '{src_website}'")
-        raise Exception(f"Invalid source website: '{src_website}'")
-
-    # get paper object
+    try:
+        return scrape_flight.do(
+            tmp_paper_dict["paper_id"],
+            lambda: scrape_paper(tmp_paper_dict),
+            timeout=SCRAPE_WAIT_TIMEOUT,
+        )
+    except UpstreamError as err:
+        negative_cache.put(url, err)
+        raise
+
+
+def get_legacy_paper(url: str, tmp_paper_dict: Dict[str, str]) -> Optional[Paper]:
+    """
+    A paper stored under the id its URL had before ids were normalized
+    (e.g. '1706.03762v2'), saved again under the current id
+    """
+    legacy_id = legacy_paper_id(url)
+    paper = get_paper_from_db(legacy_id) if legacy_id else None
+    if not paper:
+        return None
+    paper_dict = paper.to_dict()
+    for key in ("paper_id", "paper_url", "pdf_url"):
+        paper_dict[key] = tmp_paper_dict[key]
     paper = Paper.from_dict(paper_dict)
+    save_paper_to_db(paper)
+    logger.info(f"Copied paper '{legacy_id}' to its normalized id '{paper.paper_id}'")
+    return paper
+
+
+def scrape_paper(tmp_paper_dict: Dict[str, str]) -> Paper:
+    """
+    Scrape a paper from its source website and save it to database
+    """
+    # another request may have stored it while this one was waiting to scrape
+    paper = get_paper_from_db(tmp_paper_dict["paper_id"])
+    if paper:
+        return paper
+    logger.debug("Paper not found in database, start scraping...")
+
+    paper = scrape_source(tmp_paper_dict)
+
     # save new paper to database
     save_paper_to_db(paper)
 
     return paper
 
 
+def scrape_source(tmp_paper_dict: Dict[str, str]) -> Paper:
+    """
+    Scrape the metadata of a paper from its source website
+    """
+    src_website = tmp_paper_dict.get("src_website")
+    with span("rate_limit", src_website=src_website or ""):
+        source_limiter.acquire(src_website)
+    with span("scrape", src_website=src_website or ""):
+        if src_website == "arxiv":
+            paper_dict = get_paper_from_arxiv(tmp_paper_dict)
+        elif src_website == "cvf":
+            paper_dict = get_paper_from_cvf(tmp_paper_dict)
+        elif src_website == "openreview":
+            paper_dict = get_paper_from_openreview(tmp_paper_dict)
+        else:
+            logger.error(f"Invalid source website: '{src_website}'")
+            raise Exception(f"Invalid source website: '{src_website}'")
+
+        # get paper object
+        paper = Paper.from_dict(paper_dict)
+        paper.fetched_at = int(time.time())
+    return paper
+
+
+def refresh_paper(paper: Paper) -> Paper:
+    """
+    Scrape a stored paper again and overwrite its database record and
+    index entries
+    """
+    tmp_paper_dict = {
+        "paper_id": paper.paper_id,
+        "paper_url": paper.paper_url,
+        "pdf_url": paper.pdf_url,
+        "src_website": paper.src_website,
+    }
+    fresh = scrape_source(tmp_paper_dict)
+    save_paper_to_db(fresh, force_overwrite=True)
+    # titles and authors change between versions, e.g. arXiv v1 and v2
+    reindex_paper(paper, fresh)
+    logger.debug(f"Refreshed metadata of '{paper.paper_id}'")
+    return fresh
+
+
+# serves stored papers immediately and re-scrapes stale ones in the background
+paper_refresher = PaperRefresher(refresh_paper, load=get_paper_from_db)
+
+
+def get_arxiv_papers(paper_ids: Iterable[str]) -> Dict[str, Paper]:
+    """
+    Get many arXiv papers at once, e.g. for bulk imports or cache warm-ups.
+    Papers not in the database are resolved in batches through the arXiv
+    export API instead of one abstract page per paper.
+    """
+    papers: Dict[str, Paper] = {}
+    missing: List[str] = []
+    for paper_id in set(paper_ids):
+        paper = get_paper_from_db(paper_id)
+        if paper:
+            papers[paper_id] = paper
+        else:
+            missing.append(paper_id)
+
+    if missing:
+        logger.debug(f"Resolving {len(missing)} arXiv papers via export API...")
+        source_limiter.acquire("arxiv")
+        fetched = get_papers_from_arxiv_api(missing, client=http_session)
+        fetched_at = int(time.time())
+        for paper in fetched.values():
+            paper.fetched_at = fetched_at
+            save_paper_to_db(paper)
+        papers.update(fetched)
+
+    return papers
+
+
 def get_paper_from_arxiv(tmp_paper_dict: Dict[str, str]) -> Dict[str, str]:
     paper_url = tmp_paper_dict.get("paper_url")
-    response = requests.get(paper_url)
+    response = http_session.get(paper_url)
 
     if response.status_code != 200:
         logger.error(f"Cannot connect to {paper_url}")
-        raise Exception(f"Cannot connect to {paper_url}")
-
-    # make soup
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # get TITLE
-    result = soup.find("h1", class_="title mathjax")
-    tmp = [i.string for i in result]
-    paper_title = tmp.pop()
-    tmp_paper_dict["title"] = paper_title
-    logger.debug(f"Paper Title: {paper_title}")
-
-    # get AUTHORS
-    result = soup.find("div", class_="authors")
-    author_list = [i.string.strip() for i in result]
-    author_list.pop(0)
-    while "," in author_list:
-        author_list.remove(",")
-    tmp_paper_dict["authors"] = author_list
-
-    # get ABSTRACT
-    result = soup.find("blockquote", class_="abstract mathjax")
-    tmp = [i.string for i in result]
-    paper_abstract = tmp.pop()
-    tmp = paper_abstract.split("\n")
-    paper_abstract = " ".join(tmp)
-    tmp_paper_dict["abstract"] = paper_abstract
-
-    # get COMMENTS
-    result = soup.find("td", class_="tablecell comments mathjax")
-    if result:
-        comments = [i.string.strip() if i.string else "" for i in result]
-        comments = " ".join(comments)
-    else:
-        comments = ""
-    tmp_paper_dict["comments"] = comments
+        raise UpstreamError(paper_url, response.status_code)
 
+    tmp_paper_dict = parse_arxiv_page(response.text, tmp_paper_dict)
+    logger.debug(f"Paper Title: {tmp_paper_dict['title']}")
     return tmp_paper_dict
 
 
 def get_paper_from_cvf(tmp_paper_dict: Dict[str, str]) -> Dict[str, str]:
     paper_url = tmp_paper_dict.get("paper_url")
-    response = requests.get(paper_url)
+    response = http_session.get(paper_url)
 
     if response.status_code != 200:
         logger.error(f"Cannot connect to {paper_url}")
-        raise Exception(f"Cannot connect to {paper_url}")
-
-    # make soup
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # get TITLE
-    result = soup.find("div", id="papertitle")
-    tmp = [i.string for i in result]
-    paper_title = tmp.pop()
-    tmp_paper_dict["title"] = paper_title.strip()
-
-    # get AUTHORS
-    result = soup.find("div", id="authors")
-    main_content = str(result.contents[2])
-    authors_str = main_content[6:-8]
-    author_list = [author.lstrip() for author in authors_str.split(",")]
-    tmp_paper_dict["authors"] = author_list
-
-    # get ABSTRACT
-    result = soup.find("div", id="abstract")
-    tmp = [i.string for i in result]
-    paper_abstract = tmp.pop()
-    tmp = paper_abstract.split("\n")
-    paper_abstract = " ".join(tmp)
-    tmp_paper_dict["abstract"] = paper_abstract.lstrip()
-
-    # get Bibtex
-    result = str(soup.find("div", {"class": "bibref"}))
-    bibtex = result[21:-6]
-    bibtex = bibtex.replace("<br/>", "")
-    tmp_paper_dict["bibtex"] = bibtex
+        raise UpstreamError(paper_url, response.status_code)
 
-    return tmp_paper_dict
+    return parse_cvf_page(response.text, tmp_paper_dict)
 
 
 def get_paper_from_openreview(tmp_paper_dict: Dict[str, str]) -> Dict[str, str]:
     paper_url = tmp_paper_dict.get("paper_url")
-    response = requests.get(paper_url)
+    response = http_session.get(paper_url)
 
     if response.status_code != 200:
         logger.error(f"Cannot connect to {paper_url}")
-        raise Exception(f"Cannot connect to {paper_url}")
-
-    # make soup
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # Ref: https://stackoverflow.com/questions/52392246/how-to-convert-class-bs4-element-resultset-to-json-in-python-using-builtin-o
-    # All data json
-    result = soup.find("script", id="__NEXT_DATA__")
-    tmp = [i.string for i in result]
-    all_data_bs4 = tmp.pop()
-    # convert to json/dict
-    all_data_json = json.loads(str(all_data_bs4))
-    # The "props" dict will contain all useful info
-    data_dict = all_data_json["props"]["pageProps"]["forumNote"]["content"]
-
-    # get TITLE
-    tmp_paper_dict["title"] = data_dict.get("title", "")
-    # get KEYWORDS
-    tmp_paper_dict["keywords"] = data_dict.get("keywords", "")
-    # get AUTHORS
-    tmp_paper_dict["authors"] = data_dict.get("authors", "")
-    # get ABSTRACT
-    tmp_paper_dict["abstract"] = data_dict.get("abstract", "")
-    # get TL;DR
-    if data_dict.get("one-sentence_summary"):
-        tmp_paper_dict["tldr"] = data_dict.get("one-sentence_summary", "")
-    else:
-        tmp_paper_dict["tldr"] = data_dict.get("TL;DR", "")
-    # get Bibtex
-    tmp_paper_dict["bibtex"] = data_dict.get("_bibtex", "")
+        raise UpstreamError(paper_url, response.status_code)
 
-    return tmp_paper_dict
+    return parse_openreview_page(response.text, tmp_paper_dict)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,305 @@
+"""
+Content-addressed store of downloaded paper PDFs.
+
+Usage: python src/pdf_store.py [--import-dir DIR] [--quota-mb N]
+
+Files are named by their SHA-256 and sharded into objects/ab/cd/ so that no
+directory grows large, identical PDFs published under several paper_ids
+are stored once. A SQLite manifest maps paper_id to content hash and
+records sizes and last access times, lookups and evictions never list a
+directory. Once the store exceeds its quota, the least recently used
+files are evicted.
+"""
+# built-in modules
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple, Union
+from urllib.parse import quote
+
+# external modules
+from markkk.logger import logger
+
+# local
+from downloader import download_file
+
+__all__ = ["PdfStore"]
+
+CHUNK_SIZE: int = 1024 * 1024
+PDF_MAGIC = b"%PDF"
+
+_MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256      TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    last_access REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_blobs_last_access ON blobs (last_access);
+
+CREATE TABLE IF NOT EXISTS entries (
+    paper_id TEXT PRIMARY KEY,
+    sha256   TEXT NOT NULL REFERENCES blobs (sha256),
+    added_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_entries_sha256 ON entries (sha256);
+"""
+
+
+def _file_sha256(filepath: Path) -> str:
+    sha256 = hashlib.sha256()
+    with filepath.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class PdfStore:
+    """
+    PDFs under `root`, addressed by content hash and bounded by
+    `quota_bytes` (None for no limit).
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        quota_bytes: Optional[int] = None,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.root: Path = Path(root)
+        self.objects_dir: Path = self.root / "objects"
+        self.tmp_dir: Path = self.root / "tmp"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.quota_bytes: Optional[int] = quota_bytes
+        self._timer = timer
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.root / "manifest.sqlite3"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_MANIFEST_SCHEMA)
+            self._conn.commit()
+
+        # metrics
+        self.hits: int = 0
+        self.misses: int = 0
+        self.deduplicated: int = 0
+        self.evicted: int = 0
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.objects_dir / sha256[:2] / sha256[2:4] / f"{sha256}.pdf"
+
+    ###########################################################
+    # lookups
+
+    def get(self, paper_id: str) -> Optional[Path]:
+        """
+        Return the path of the PDF of `paper_id` and mark it as recently
+        used, or None if it is not stored
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT sha256 FROM entries WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            filepath = self.blob_path(row["sha256"])
+            if not filepath.is_file():
+                # deleted behind our back, forget it so it is downloaded again
+                logger.warning(f"PDF of '{paper_id}' missing from the store")
+                self._drop_blob(row["sha256"])
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE blobs SET last_access = ? WHERE sha256 = ?",
+                (self._timer(), row["sha256"]),
+            )
+            self.hits += 1
+            return filepath
+
+    def __contains__(self, paper_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM entries WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+        return row is not None
+
+    def items(self) -> Iterator[Tuple[str, Path]]:
+        """
+        Yield (paper_id, path) of every stored PDF
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT paper_id, sha256 FROM entries").fetchall()
+        for row in rows:
+            yield row["paper_id"], self.blob_path(row["sha256"])
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            papers = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            files = self._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+            return {
+                "papers": papers,
+                "files": files,
+                "bytes": self.total_size(),
+                "quota_bytes": self.quota_bytes or 0,
+                "hits": self.hits,
+                "misses": self.misses,
+                "deduplicated": self.deduplicated,
+                "evicted": self.evicted,
+            }
+
+    ###########################################################
+    # writes
+
+    def put_file(self, paper_id: str, filepath: Union[str, Path], sha256: str = None) -> Path:
+        """
+        Move `filepath` into the store as the PDF of `paper_id`, return its
+        new path. If the same content is already stored, `filepath` is
+        deleted and the stored copy is shared.
+        """
+        filepath = Path(filepath)
+        sha256 = sha256 or _file_sha256(filepath)
+        size = filepath.stat().st_size
+        blob_fp = self.blob_path(sha256)
+        now = self._timer()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if row is not None and blob_fp.is_file():
+                filepath.unlink()
+                self.deduplicated += 1
+            else:
+                blob_fp.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(filepath, blob_fp)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, size, last_access) VALUES (?, ?, ?)",
+                (sha256, size, now),
+            )
+            old = self._conn.execute(
+                "SELECT sha256 FROM entries WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (paper_id, sha256, added_at) VALUES (?, ?, ?)",
+                (paper_id, sha256, now),
+            )
+            if old is not None and old["sha256"] != sha256:
+                self._drop_unreferenced(old["sha256"])
+            self._evict(keep=sha256)
+        return blob_fp
+
+    def download(self, paper_id: str, url: str) -> Path:
+        """
+        Return the path of the PDF of `paper_id`, downloading it from `url`
+        if it is not stored yet
+        """
+        filepath = self.get(paper_id)
+        if filepath is not None:
+            return filepath
+        # paper_ids may contain slashes (CVF), keep the temporary name flat
+        tmp_fp = self.tmp_dir / f"{quote(paper_id, safe='')}.pdf"
+        sha256 = download_file(url, tmp_fp, magic=PDF_MAGIC)
+        return self.put_file(paper_id, tmp_fp, sha256=sha256)
+
+    def remove(self, paper_id: str) -> bool:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT sha256 FROM entries WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            self._conn.execute("DELETE FROM entries WHERE paper_id = ?", (paper_id,))
+            self._drop_unreferenced(row["sha256"])
+        return True
+
+    def evict(self) -> int:
+        """
+        Evict least recently used files until the store fits its quota,
+        return the number of bytes freed
+        """
+        with self._lock, self._conn:
+            return self._evict()
+
+    def _evict(self, keep: str = None) -> int:
+        if self.quota_bytes is None:
+            return 0
+        excess = self.total_size() - self.quota_bytes
+        freed = 0
+        while excess > freed:
+            rows = self._conn.execute(
+                "SELECT sha256, size FROM blobs WHERE sha256 != ? ORDER BY last_access LIMIT 32",
+                (keep or "",),
+            ).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                if excess <= freed:
+                    break
+                self._drop_blob(row["sha256"])
+                freed += row["size"]
+                self.evicted += 1
+        if freed:
+            logger.debug(f"Evicted {freed} bytes of PDFs to fit the quota")
+        return freed
+
+    def _drop_unreferenced(self, sha256: str) -> None:
+        row = self._conn.execute(
+            "SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (sha256,)
+        ).fetchone()
+        if row is None:
+            self._drop_blob(sha256)
+
+    def _drop_blob(self, sha256: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE sha256 = ?", (sha256,))
+        self._conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+        try:
+            self.blob_path(sha256).unlink()
+        except FileNotFoundError:
+            pass
+
+    def import_dir(self, papers_dir: Union[str, Path]) -> int:
+        """
+        Move the '{paper_id}.pdf' files of the old flat layout into the
+        store, return the number of files imported
+        """
+        count = 0
+        for filepath in sorted(Path(papers_dir).glob("*.pdf")):
+            self.put_file(filepath.stem, filepath)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    from constants import project_root
+
+    parser = argparse.ArgumentParser(description="Content-addressed PDF store")
+    parser.add_argument("--root", default=str(project_root / "papers"))
+    parser.add_argument("--import-dir", default=None)
+    parser.add_argument("--quota-mb", type=int, default=None)
+    args = parser.parse_args()
+
+    quota_bytes = args.quota_mb * 1024 * 1024 if args.quota_mb else None
+    store = PdfStore(args.root, quota_bytes=quota_bytes)
+    if args.import_dir:
+        logger.info(f"Imported {store.import_dir(args.import_dir)} PDFs")
+    store.evict()
+    logger.info(f"PDF store: {store.stats()}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Extract the text and section headings of the PDFs stored in papers/ into a cache.
+
+Usage: python src/pdf_text.py [--workers N] [--papers-dir DIR]
+
+Needs the optional 'pypdf' package. Extraction runs in child processes
+started as 'python pdf_text.py --worker', which import this module only,
+not the bot that started them. The cache is a SQLite database keyed by
+paper_id, each row records the SHA-256 of the PDF it was extracted from, so
+unchanged files are skipped and replaced files are extracted again.
+"""
+# built-in modules
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import re
+import sqlite3
+import subprocess
+import sys
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# external modules
+from markkk.logger import logger
+
+# local
+from constants import project_root
+
+__all__ = [
+    "PYPDF_AVAILABLE",
+    "PdfTextCache",
+    "PdfTextExtractor",
+    "extract_pdf_text",
+]
+
+PYPDF_AVAILABLE: bool = find_spec("pypdf") is not None
+if not PYPDF_AVAILABLE:
+    logger.warning("pypdf is not installed, PDF text extraction is disabled")
+PAGE_SEPARATOR = "\f"
+HASH_CHUNK_SIZE: int = 1024 * 1024
+
+# "1. Introduction", "3.2 Cross-Modal ...", "IV. Experiments", "References", ...
+_heading_re = re.compile(
+    r"^(?:(?:\d+(?:\.\d+)*\.?|[IVX]+\.)\s+[A-Z][\w\-,:&' ]{2,60}"
+    r"|Abstract|Introduction|Related Work|Conclusions?|References"
+    r"|Acknowledge?ments?|Appendix.*)$"
+)
+MAX_HEADING_WORDS: int = 10
+
+_PDF_TEXT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdf_text (
+    paper_id  TEXT PRIMARY KEY,
+    sha256    TEXT NOT NULL,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    num_pages INTEGER NOT NULL,
+    headings  TEXT NOT NULL,
+    text      BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def file_sha256(filepath: Union[str, Path]) -> str:
+    sha256 = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def find_headings(page_text: str) -> List[str]:
+    headings = []
+    for line in page_text.splitlines():
+        line = line.strip()
+        if _heading_re.match(line) and len(line.split()) <= MAX_HEADING_WORDS:
+            headings.append(line)
+    return headings
+
+
+def extract_pdf_text(filepath: Union[str, Path]) -> dict:
+    """
+    Read a PDF one page at a time, return its hash, page count, section
+    headings and zlib-compressed text (pages separated by form feeds).
+    Runs in the worker processes of PdfTextExtractor.
+    """
+    from pypdf import PdfReader
+
+    filepath = Path(filepath)
+    stat = filepath.stat()
+    reader = PdfReader(str(filepath))
+    compressor = zlib.compressobj(level=6)
+    chunks: List[bytes] = []
+    headings: List[str] = []
+    num_pages = 0
+    for page in reader.pages:
+        page_text = page.extract_text() or ""
+        headings.extend(find_headings(page_text))
+        if num_pages:
+            chunks.append(compressor.compress(PAGE_SEPARATOR.encode()))
+        chunks.append(compressor.compress(page_text.encode("utf-8")))
+        num_pages += 1
+    chunks.append(compressor.flush())
+
+    return {
+        "sha256": file_sha256(filepath),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "num_pages": num_pages,
+        "headings": headings,
+        "text": b"".join(chunks),
+    }
+
+
+class PdfTextCache:
+    """
+    Extracted text of paper PDFs stored compressed in SQLite, keyed by
+    paper_id and validated against the hash of the PDF file.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        db_path = str(db_path)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path: str = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_PDF_TEXT_SCHEMA)
+            self._conn.commit()
+
+    def is_fresh(self, paper_id: str, filepath: Union[str, Path]) -> bool:
+        """
+        True if the cached text was extracted from the current `filepath`.
+        The file is only hashed when its size or mtime changed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha256, size, mtime_ns FROM pdf_text WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+        if row is None:
+            return False
+        stat = Path(filepath).stat()
+        if (row["size"], row["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return True
+        if row["size"] != stat.st_size or row["sha256"] != file_sha256(filepath):
+            return False
+        # touched but unchanged, remember the new mtime
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pdf_text SET mtime_ns = ? WHERE paper_id = ?",
+                (stat.st_mtime_ns, paper_id),
+            )
+        return True
+
+    def put(self, paper_id: str, extracted: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdf_text "
+                "(paper_id, sha256, size, mtime_ns, num_pages, headings, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    paper_id,
+                    extracted["sha256"],
+                    extracted["size"],
+                    extracted["mtime_ns"],
+                    extracted["num_pages"],
+                    json.dumps(extracted["headings"]),
+                    extracted["text"],
+                ),
+            )
+
+    def get(self, paper_id: str) -> Optional[dict]:
+        """
+        Return {"paper_id", "sha256", "num_pages", "headings", "pages"} or None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM pdf_text WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        text = zlib.decompress(row["text"]).decode("utf-8")
+        return {
+            "paper_id": row["paper_id"],
+            "sha256": row["sha256"],
+            "num_pages": row["num_pages"],
+            "headings": json.loads(row["headings"]),
+            "pages": text.split(PAGE_SEPARATOR),
+        }
+
+    def get_text(self, paper_id: str) -> Optional[str]:
+        cached = self.get(paper_id)
+        return "\n".join(cached["pages"]) if cached else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _ExtractionWorker:
+    """
+    A 'python pdf_text.py --worker' child process. Unlike multiprocessing's
+    spawn and forkserver workers, it does not re-import the main module of
+    the bot, and unlike fork it inherits none of the bot's threads or locks.
+    Paths and results are pickled over its stdin and stdout.
+    """
+
+    def __init__(self):
+        self._proc = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def extract(self, filepath: str) -> dict:
+        """
+        Run extract_pdf_text in the child. Raises EOFError or OSError if
+        the child died, Exception if the extraction failed.
+        """
+        pickle.dump(filepath, self._proc.stdin)
+        self._proc.stdin.flush()
+        ok, value = pickle.load(self._proc.stdout)
+        if not ok:
+            raise Exception(value)
+        return value
+
+    def close(self, timeout: float = 5) -> None:
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+            self._proc.wait()
+        self._proc.stdout.close()
+
+
+def _serve_worker() -> None:
+    """
+    Main loop of an _ExtractionWorker child
+    """
+    # stdout carries the results, anything printed goes to stderr instead
+    results = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    requests = sys.stdin.buffer
+    while True:
+        try:
+            filepath = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            reply = (True, extract_pdf_text(filepath))
+        except Exception as err:
+            reply = (False, f"{type(err).__name__}: {err}")
+        pickle.dump(reply, results)
+        results.flush()
+
+
+class PdfTextExtractor:
+    """
+    Runs extract_pdf_text in up to `max_workers` worker processes and
+    stores the results in a PdfTextCache. Workers are started on demand
+    and reused.
+    """
+
+    def __init__(self, cache: PdfTextCache, max_workers: Optional[int] = None):
+        self.cache = cache
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.RLock()
+        self._idle: List[_ExtractionWorker] = []
+        # paper_id -> Future resolved once the text is stored in the cache
+        self._pending: Dict[str, Future] = {}
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # each thread drives one worker process at a time
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="pdf-text"
+                )
+            return self._pool
+
+    def _extract(self, filepath: str) -> dict:
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None:
+            worker = _ExtractionWorker()
+        try:
+            result = worker.extract(filepath)
+        except (EOFError, OSError) as err:
+            worker.close()
+            raise Exception(f"PDF text worker exited while reading {filepath}") from err
+        except Exception:
+            self._release(worker)
+            raise
+        self._release(worker)
+        return result
+
+    def _release(self, worker: _ExtractionWorker) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._idle.append(worker)
+                return
+        # shut down meanwhile
+        worker.close()
+
+    def submit(self, paper_id: str, filepath: Union[str, Path]) -> Optional[Future]:
+        """
+        Extract `filepath` in the background unless its text is already cached.
+        Return a Future resolved once the text is in the cache, or None if
+        there is nothing to do.
+        """
+        if not PYPDF_AVAILABLE:
+            return None
+        if self.cache.is_fresh(paper_id, filepath):
+            return None
+        with self._lock:
+            if paper_id in self._pending:
+                return self._pending[paper_id]
+            stored = Future()
+            self._pending[paper_id] = stored
+            future = self._get_pool().submit(self._extract, str(filepath))
+        future.add_done_callback(lambda f: self._store(paper_id, f, stored))
+        return stored
+
+    def _store(self, paper_id: str, future: Future, stored: Future) -> None:
+        try:
+            self.cache.put(paper_id, future.result())
+        except Exception as err:
+            logger.error(f"Failed to extract text of '{paper_id}': {err}")
+            stored.set_exception(err)
+        else:
+            stored.set_result(paper_id)
+        finally:
+            with self._lock:
+                self._pending.pop(paper_id, None)
+
+    def update_dir(self, papers_dir: Union[str, Path]) -> Dict[str, int]:
+        """
+        Extract every new or changed PDF in `papers_dir`, paper_ids are taken
+        from the file names. Blocks until done, returns counts per outcome.
+        """
+        files = ((fp.stem, fp) for fp in sorted(Path(papers_dir).glob("*.pdf")))
+        return self.update_files(files)
+
+    def update_files(self, files: Iterable[Tuple[str, Union[str, Path]]]) -> Dict[str, int]:
+        """
+        Extract every new or changed PDF of the (paper_id, path) pairs in
+        `files`. Blocks until done, returns counts per outcome.
+        """
+        stats = {"extracted": 0, "skipped": 0, "failed": 0}
+        futures = []
+        for paper_id, filepath in files:
+            future = self.submit(paper_id, filepath)
+            if future is None:
+                stats["skipped"] += 1
+            else:
+                futures.append(future)
+        for future in futures:
+            try:
+                future.result()
+                stats["extracted"] += 1
+            except Exception:
+                stats["failed"] += 1
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract text of downloaded PDFs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--papers-dir", default=str(project_root / "papers"))
+    parser.add_argument("--cache", default=str(project_root / "cache" / "pdf_text.sqlite3"))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        _serve_worker()
+        return
+
+    if not PYPDF_AVAILABLE:
+        logger.error("pypdf is not installed: pip install pypdf")
+        return
+    from pdf_store import PdfStore
+
+    cache = PdfTextCache(args.cache)
+    extractor = PdfTextExtractor(cache, max_workers=args.workers)
+    store = PdfStore(args.papers_dir)
+    stats = extractor.update_files(store.items())
+    store.close()
+    extractor.shutdown()
+    cache.close()
+    logger.info(f"PDF text extraction: {stats}")
+
+
+if __name__ == "__main__":
+    main()
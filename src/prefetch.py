@@ -0,0 +1,149 @@
+# built-in modules
+import queue
+import random
+import threading
+from typing import Callable, Dict, List, Optional, Set
+
+# external modules
+from markkk.logger import logger
+
+# local
+from paper_class import Paper
+
+__all__ = ["PrefetchPool"]
+
+
+class PrefetchPool:
+    """
+    Background worker pool that runs `fetch(paper)` off the dispatcher thread.
+
+    Jobs are deduplicated by paper_id while queued or in flight. A job whose
+    `fetch` raises is retried up to `max_retries` times with jittered
+    exponential backoff. Worker threads are started on the first submit.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[Paper], object],
+        num_workers: int = 2,
+        max_retries: int = 3,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+    ):
+        self.fetch = fetch
+        self.num_workers: int = num_workers
+        self.max_retries: int = max_retries
+        self.backoff_base: float = backoff_base
+        self.backoff_max: float = backoff_max
+
+        self._queue: "queue.Queue[Optional[Paper]]" = queue.Queue()
+        self._pending: Set[str] = set()  # paper_ids queued or in flight
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._workers: List[threading.Thread] = []
+        self._closed: bool = False
+
+        # metrics
+        self.submitted: int = 0
+        self.deduplicated: int = 0
+        self.completed: int = 0
+        self.failed: int = 0
+        self.retries: int = 0
+        self.in_flight: int = 0
+
+    def submit(self, paper: Paper) -> bool:
+        """
+        Queue a paper, return False if the pool is shut down or the paper is
+        already queued or in flight.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            if paper.paper_id in self._pending:
+                self.deduplicated += 1
+                return False
+            self._pending.add(paper.paper_id)
+            self.submitted += 1
+            if not self._workers:
+                self._start_workers()
+        self._queue.put(paper)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "completed": self.completed,
+                "failed": self.failed,
+                "retries": self.retries,
+            }
+
+    def shutdown(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting jobs and stop the workers. With `drain`, jobs already
+        queued are finished first, otherwise they are dropped.
+        """
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+        if not drain:
+            self._stop.set()
+        # one sentinel per worker, queued behind the remaining jobs
+        for _ in workers:
+            self._queue.put(None)
+        for worker in workers:
+            worker.join(timeout)
+
+    def _start_workers(self) -> None:
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._work, name=f"prefetch-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _work(self) -> None:
+        while True:
+            paper = self._queue.get()
+            try:
+                if paper is None:
+                    return
+                if self._stop.is_set():
+                    self._done(paper)
+                    continue
+                self._run(paper)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, paper: Paper) -> None:
+        with self._lock:
+            self.in_flight += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self.fetch(paper)
+                    with self._lock:
+                        self.completed += 1
+                    return
+                except Exception as err:
+                    logger.warning(f"Prefetch of '{paper.paper_id}' failed: {err}")
+                if attempt == self.max_retries:
+                    break
+                with self._lock:
+                    self.retries += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                if self._stop.wait(delay * random.uniform(0.5, 1.0)):
+                    break
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._done(paper)
+
+    def _done(self, paper: Paper) -> None:
+        with self._lock:
+            self._pending.discard(paper.paper_id)
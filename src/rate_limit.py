@@ -0,0 +1,191 @@
+# built-in modules
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# local
+from metrics import Counter, Gauge, Histogram, registry
+
+__all__ = ["TokenBucket", "RateLimiter", "RateLimitExceeded"]
+
+rate_limit_wait = registry.register(
+    Histogram(
+        "paperbot_rate_limit_wait_seconds",
+        "Time requests were held back by a rate limiter before being admitted.",
+        ["limiter"],
+    )
+)
+rate_limit_total = registry.register(
+    Counter(
+        "paperbot_rate_limit_total",
+        "Requests seen by a rate limiter, by outcome (admitted, delayed, rejected).",
+        ["limiter", "outcome"],
+    )
+)
+rate_limit_tokens = registry.register(
+    Gauge(
+        "paperbot_rate_limit_tokens",
+        "Tokens left in a bucket after the last request, negative while requests are queued.",
+        ["limiter", "key"],
+    )
+)
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, limiter: str, key: str, wait: float):
+        super().__init__(f"Rate limit '{limiter}' exceeded for '{key}', next slot in {wait:.1f}s")
+        self.limiter: str = limiter
+        self.key: str = key
+        self.wait: float = wait
+
+
+class TokenBucket:
+    """
+    Refills `rate` tokens per second up to `burst`. A request that finds the
+    bucket empty reserves the next token by taking the balance below zero,
+    so waiting requests are admitted in arrival order.
+    """
+
+    def __init__(self, rate: float, burst: int, timer: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be a positive number")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate: float = rate
+        self.burst: int = burst
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._tokens: float = burst
+        self._updated_at: float = timer()
+
+    def _refill(self) -> None:
+        now = self._timer()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Take a token, return the seconds to wait before using it. Return None
+        and take nothing if that wait would be longer than `max_wait`.
+        """
+        with self._lock:
+            self._refill()
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def next_slot(self) -> float:
+        """
+        Seconds until a token is free for a new request
+        """
+        with self._lock:
+            self._refill()
+            return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    @property
+    def is_full(self) -> bool:
+        return self.tokens >= self.burst
+
+
+class RateLimiter:
+    """
+    One token bucket per key, e.g. per source website or per chat.
+
+    `acquire(key)` blocks until the key's bucket admits the request. If the
+    wait would be longer than `max_wait` seconds, RateLimitExceeded is raised
+    straight away instead. `limits` overrides (rate, burst) for given keys.
+    With `export_keys`, the tokens left per key are exported as a gauge,
+    leave it off for limiters with unbounded keys such as chat ids.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_wait: float = 10.0,
+        limits: Dict[str, dict] = None,
+        export_keys: bool = False,
+        max_keys: int = 10000,
+        timer: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = time.sleep,
+    ):
+        self.name: str = name
+        self.export_keys: bool = export_keys
+        self.max_keys: int = max_keys
+        self._timer = timer
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.rate: float = rate
+        self.burst: int = burst
+        self.max_wait: float = max_wait
+        self.limits: Dict[str, dict] = dict(limits or {})
+
+    def configure(
+        self,
+        rate: float = None,
+        burst: int = None,
+        max_wait: float = None,
+        limits: Dict[str, dict] = None,
+    ) -> None:
+        """
+        Change the limits, e.g. from 'rate_limits' in 'config.conf'.
+        Buckets start over full.
+        """
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = burst
+            if max_wait is not None:
+                self.max_wait = max_wait
+            if limits:
+                self.limits.update(limits)
+            self._buckets.clear()
+
+    def _bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    # idle keys have refilled, dropping them changes nothing
+                    self._buckets = {k: b for k, b in self._buckets.items() if not b.is_full}
+                limit = self.limits.get(key, {})
+                bucket = TokenBucket(
+                    limit.get("rate", self.rate), limit.get("burst", self.burst), self._timer
+                )
+                self._buckets[key] = bucket
+            return bucket
+
+    def acquire(self, key: str) -> float:
+        """
+        Wait for a slot for `key`, return the seconds waited
+        """
+        bucket = self._bucket(key)
+        wait = bucket.reserve(self.max_wait)
+        if self.export_keys:
+            rate_limit_tokens.set(round(bucket.tokens, 3), limiter=self.name, key=key)
+        if wait is None:
+            rate_limit_total.inc(limiter=self.name, outcome="rejected")
+            raise RateLimitExceeded(self.name, key, bucket.next_slot())
+        if wait > 0:
+            rate_limit_total.inc(limiter=self.name, outcome="delayed")
+            self._sleep(wait)
+        else:
+            rate_limit_total.inc(limiter=self.name, outcome="admitted")
+        rate_limit_wait.observe(wait, limiter=self.name)
+        return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {key: round(bucket.tokens, 3) for key, bucket in buckets.items()}
@@ -0,0 +1,185 @@
+# built-in modules
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+# external modules
+from markkk.logger import logger
+
+# local
+from paper_class import Paper
+from prefetch import PrefetchPool
+
+__all__ = ["FreshnessPolicy", "PaperRefresher", "DEFAULT_MAX_AGE"]
+
+DAY: int = 24 * 60 * 60
+# seconds a stored paper is served without revalidation, per source website
+DEFAULT_MAX_AGE: Dict[str, float] = {
+    "arxiv": 7 * DAY,  # new versions
+    "openreview": 1 * DAY,  # decisions, camera-ready titles
+    "cvf": 90 * DAY,  # proceedings pages rarely change
+}
+FALLBACK_MAX_AGE: float = 30 * DAY
+
+
+class FreshnessPolicy:
+    """
+    How long the metadata of a paper stays fresh, by its src_website.
+    Papers without a fetched_at are always stale.
+    """
+
+    def __init__(
+        self,
+        max_age: Dict[str, float] = None,
+        default_max_age: float = FALLBACK_MAX_AGE,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.max_age: Dict[str, float] = dict(DEFAULT_MAX_AGE)
+        if max_age:
+            self.max_age.update(max_age)
+        self.default_max_age: float = default_max_age
+        self._timer = timer
+
+    def max_age_for(self, src_website: str) -> float:
+        return self.max_age.get(src_website, self.default_max_age)
+
+    def is_stale(self, paper: Paper) -> bool:
+        if not paper.fetched_at:
+            return True
+        return self._timer() - paper.fetched_at >= self.max_age_for(paper.src_website)
+
+
+class PaperRefresher:
+    """
+    Stale-while-revalidate for stored papers.
+
+    `touch(paper)` is called whenever a stored paper is served. It counts
+    the request and, if the paper is stale, queues `refresh(paper)` on a
+    background PrefetchPool while the caller returns the stale copy. A paper
+    is not retried within `retry_after` seconds of its last refresh attempt.
+
+    The sweeper thread wakes up every `sweep_interval` seconds and queues at
+    most `max_per_sweep` stale papers, most requested first, so popular
+    papers are refreshed before anyone asks for them again. `load(paper_id)`
+    reads a paper from the database for it.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[Paper], object],
+        load: Callable[[str], Optional[Paper]],
+        policy: FreshnessPolicy = None,
+        num_workers: int = 1,
+        max_per_sweep: int = 10,
+        sweep_interval: float = 60,
+        retry_after: float = 15 * 60,
+        max_tracked: int = 10000,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.load = load
+        self.policy: FreshnessPolicy = policy or FreshnessPolicy(timer=timer)
+        self.max_per_sweep: int = max_per_sweep
+        self.sweep_interval: float = sweep_interval
+        self.retry_after: float = retry_after
+        self.max_tracked: int = max_tracked
+        self._timer = timer
+        # failed refreshes are retried by the next touch or sweep instead
+        self._pool = PrefetchPool(refresh, num_workers=num_workers, max_retries=0)
+        self._lock = threading.Lock()
+        self._requests: Counter = Counter()  # paper_id -> times served
+        self._attempted_at: Dict[str, float] = {}  # paper_id -> last time queued
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+        # metrics
+        self.stale_hits: int = 0
+        self.sweeps: int = 0
+        self.swept: int = 0
+
+    def touch(self, paper: Paper) -> bool:
+        """
+        Record a request for a stored paper, queue a refresh if it is stale.
+        Return True if a refresh was queued.
+        """
+        with self._lock:
+            self._requests[paper.paper_id] += 1
+            if len(self._requests) > self.max_tracked:
+                # forget the long tail, keep the most requested half
+                self._requests = Counter(dict(self._requests.most_common(self.max_tracked // 2)))
+        if not self.policy.is_stale(paper):
+            return False
+        with self._lock:
+            self.stale_hits += 1
+        return self._queue(paper)
+
+    def _queue(self, paper: Paper) -> bool:
+        now = self._timer()
+        with self._lock:
+            attempted_at = self._attempted_at.get(paper.paper_id)
+            if attempted_at is not None and now - attempted_at < self.retry_after:
+                return False
+            self._attempted_at[paper.paper_id] = now
+        return self._pool.submit(paper)
+
+    def sweep(self) -> int:
+        """
+        Queue up to `max_per_sweep` stale papers, most requested first,
+        return how many were queued
+        """
+        with self._lock:
+            candidates: List[str] = [paper_id for paper_id, _ in self._requests.most_common()]
+            self.sweeps += 1
+        queued = 0
+        for paper_id in candidates:
+            if queued >= self.max_per_sweep:
+                break
+            paper = self.load(paper_id)
+            if paper and self.policy.is_stale(paper) and self._queue(paper):
+                queued += 1
+        with self._lock:
+            self.swept += queued
+            # entries older than retry_after no longer block anything
+            now = self._timer()
+            self._attempted_at = {
+                k: v for k, v in self._attempted_at.items() if now - v < self.retry_after
+            }
+        if queued:
+            logger.debug(f"Queued {queued} stale papers for refresh")
+        return queued
+
+    def start_sweeper(self) -> None:
+        if self._sweeper is not None:
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="refresh-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as err:
+                logger.error(f"Refresh sweep failed: {err}")
+
+    def shutdown(self, drain: bool = False, timeout: Optional[float] = None) -> None:
+        """
+        Stop the sweeper. Refreshes still queued are dropped unless `drain`.
+        """
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout)
+            self._sweeper = None
+        self._pool.shutdown(drain=drain, timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        pool_stats = self._pool.stats()
+        with self._lock:
+            return {
+                "tracked": len(self._requests),
+                "stale_hits": self.stale_hits,
+                "sweeps": self.sweeps,
+                "swept": self.swept,
+                "queue_depth": pool_stats["queue_depth"],
+                "refreshed": pool_stats["completed"],
+                "failed": pool_stats["failed"],
+            }
@@ -0,0 +1,273 @@
+# built-in modules
+import math
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+# local
+from paper_class import Paper
+
+__all__ = ["SearchIndex", "tokenize"]
+
+# a term found in the title counts as much as three in the abstract
+FIELD_WEIGHTS: Dict[str, int] = {
+    "title": 3,
+    "keywords": 2,
+    "authors": 2,
+    "tldr": 1,
+    "abstract": 1,
+}
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this "
+    "to was we were which with via our these their can using based".split()
+)
+
+_token_re = re.compile(r"[^\W_]+")
+
+_SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_users (
+    username     TEXT PRIMARY KEY,
+    doc_count    INTEGER NOT NULL DEFAULT 0,
+    total_length INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- users whose library saved before the index existed has been indexed
+CREATE TABLE IF NOT EXISTS search_backfilled (
+    username TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS search_docs (
+    username TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    length   INTEGER NOT NULL,
+    PRIMARY KEY (username, paper_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS search_postings (
+    username TEXT NOT NULL,
+    term     TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    tf       INTEGER NOT NULL,
+    PRIMARY KEY (username, term, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_postings_paper ON search_postings (username, paper_id);
+CREATE INDEX IF NOT EXISTS idx_search_docs_paper ON search_docs (paper_id);
+"""
+
+
+def _stem(token: str) -> str:
+    """
+    Fold plurals so that 'networks' matches 'network'
+    """
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase `text` and split it into stemmed terms, stop words and single
+    characters are dropped
+    """
+    return [
+        _stem(token)
+        for token in _token_re.findall(text.lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+def _field_text(value: Union[str, Iterable[str], None]) -> str:
+    if not value:
+        return ""
+    if isinstance(value, str):
+        return value
+    return " ".join(value)
+
+
+def paper_terms(paper: Paper) -> Counter:
+    """
+    Weighted term frequencies of the searchable fields of a paper
+    """
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(_field_text(getattr(paper, field, ""))):
+            terms[term] += weight
+    return terms
+
+
+class SearchIndex:
+    """
+    Incremental inverted index over the papers in each user's library,
+    persisted in SQLite and ranked with BM25.
+
+    Every user has their own postings and collection statistics, so scores
+    only depend on the papers in that user's library. Adding a paper writes
+    one posting per distinct term, a query reads the postings of its terms
+    only.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:", k1: float = 1.2, b: float = 0.75):
+        db_path = str(db_path)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path: str = db_path
+        self.k1: float = k1
+        self.b: float = b
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SEARCH_SCHEMA)
+            self._conn.commit()
+
+    def add_paper(self, username: str, paper: Paper) -> None:
+        """
+        Index `paper` for `username`, re-indexing it if it is already there
+        """
+        terms = paper_terms(paper)
+        with self._lock, self._conn:
+            self._add(username, paper, terms)
+
+    def update_paper(self, paper: Paper) -> int:
+        """
+        Re-index `paper` for every user who has it indexed, e.g. after its
+        metadata was refreshed. Return the number of users.
+        """
+        terms = paper_terms(paper)
+        with self._lock, self._conn:
+            usernames = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT username FROM search_docs WHERE paper_id = ?", (paper.paper_id,)
+                ).fetchall()
+            ]
+            for username in usernames:
+                self._add(username, paper, terms)
+        return len(usernames)
+
+    def _add(self, username: str, paper: Paper, terms: Counter) -> None:
+        length = sum(terms.values())
+        self._remove(username, paper.paper_id)
+        self._conn.execute(
+            "INSERT INTO search_docs (username, paper_id, length) VALUES (?, ?, ?)",
+            (username, paper.paper_id, length),
+        )
+        self._conn.executemany(
+            "INSERT INTO search_postings (username, term, paper_id, tf) VALUES (?, ?, ?, ?)",
+            [(username, term, paper.paper_id, tf) for term, tf in terms.items()],
+        )
+        self._conn.execute(
+            "INSERT INTO search_users (username, doc_count, total_length) VALUES (?, 1, ?) "
+            "ON CONFLICT (username) DO UPDATE SET "
+            "doc_count = doc_count + 1, total_length = total_length + excluded.total_length",
+            (username, length),
+        )
+
+    def remove_paper(self, username: str, paper_id: str) -> bool:
+        """
+        Drop a paper from the user's index, return False if it was not indexed
+        """
+        with self._lock, self._conn:
+            return self._remove(username, paper_id)
+
+    def _remove(self, username: str, paper_id: str) -> bool:
+        row = self._conn.execute(
+            "SELECT length FROM search_docs WHERE username = ? AND paper_id = ?",
+            (username, paper_id),
+        ).fetchone()
+        if row is None:
+            return False
+        self._conn.execute(
+            "DELETE FROM search_postings WHERE username = ? AND paper_id = ?", (username, paper_id)
+        )
+        self._conn.execute(
+            "DELETE FROM search_docs WHERE username = ? AND paper_id = ?", (username, paper_id)
+        )
+        self._conn.execute(
+            "UPDATE search_users SET doc_count = doc_count - 1, total_length = total_length - ? "
+            "WHERE username = ?",
+            (row[0], username),
+        )
+        return True
+
+    def size(self, username: str) -> int:
+        """
+        Number of papers indexed for `username`
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_count FROM search_users WHERE username = ?", (username,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def is_backfilled(self, username: str) -> bool:
+        """
+        Whether mark_backfilled was called for `username`
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM search_backfilled WHERE username = ?", (username,)
+            ).fetchone()
+        return row is not None
+
+    def mark_backfilled(self, username: str) -> None:
+        """
+        Record that the whole library of `username` was indexed, so it is
+        not rebuilt from storage again
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO search_backfilled (username) VALUES (?)", (username,)
+            )
+
+    def search(self, username: str, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Return up to `limit` (paper_id, score) pairs of the user's library
+        that match `query`, best match first
+        """
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+
+        with self._lock:
+            stats = self._conn.execute(
+                "SELECT doc_count, total_length FROM search_users WHERE username = ?",
+                (username,),
+            ).fetchone()
+            if not stats or not stats[0]:
+                return []
+            postings = {
+                term: self._conn.execute(
+                    "SELECT p.paper_id, p.tf, d.length FROM search_postings p "
+                    "JOIN search_docs d ON d.username = p.username AND d.paper_id = p.paper_id "
+                    "WHERE p.username = ? AND p.term = ?",
+                    (username, term),
+                ).fetchall()
+                for term in query_terms
+            }
+
+        doc_count, total_length = stats
+        avg_length = total_length / doc_count
+        k1, b = self.k1, self.b
+        scores: Dict[str, float] = {}
+        for rows in postings.values():
+            if not rows:
+                continue
+            idf = math.log(1 + (doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+            for paper_id, tf, length in rows:
+                norm = k1 * (1 - b + b * length / avg_length)
+                scores[paper_id] = scores.get(paper_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,63 @@
+# built-in modules
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+__all__ = ["SingleFlight"]
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key.
+
+    The first caller of do(key, fn) runs fn, callers arriving with the same
+    key while it runs wait for its result instead of running fn themselves.
+    An exception raised by fn is re-raised in every waiting caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls: int = 0
+        self.coalesced: int = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run `fn` once per in-flight `key`. Waiters give up with TimeoutError
+        after `timeout` seconds, the leading call itself is never interrupted.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as err:
+                call.error = err
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        elif not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out waiting for in-flight call '{key}'")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
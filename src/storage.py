@@ -0,0 +1,438 @@
+# built-in modules
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Union
+from urllib.parse import quote
+
+# local
+from paper_class import Paper
+
+__all__ = ["StorageBackend", "FirestoreStorage", "SQLiteStorage", "create_storage"]
+
+
+class StorageBackend(ABC):
+    """
+    Interface of the persistence layer used by datautils.
+
+    A user profile is a dict with the keys "username", "first_name",
+    "last_name", "user_createdAt" and "papers", where "papers" maps each
+    paper_id in the user's library to its library entry dict. Library
+    entries are stored one record per paper, so adding a paper never
+    rewrites the rest of the library.
+    """
+
+    @abstractmethod
+    def get_paper(self, paper_id: str) -> Optional[Paper]:
+        pass
+
+    @abstractmethod
+    def put_paper(self, paper: Paper, overwrite: bool = False) -> bool:
+        """
+        Store a paper, return False if it already exists and `overwrite` is False.
+        """
+
+    def get_papers(self, paper_ids: Iterable[str]) -> Dict[str, Paper]:
+        """
+        Read many papers at once, missing paper_ids are left out of the result
+        """
+        papers = {}
+        for paper_id in paper_ids:
+            paper = self.get_paper(paper_id)
+            if paper:
+                papers[paper_id] = paper
+        return papers
+
+    @abstractmethod
+    def iter_papers(self) -> Iterator[Paper]:
+        """
+        Stream every stored paper, e.g. to build an index over them
+        """
+
+    @abstractmethod
+    def get_user(self, username: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def user_exists(self, username: str) -> bool:
+        pass
+
+    def user_has_paper(self, username: str, paper_id: str) -> bool:
+        profile = self.get_user(username)
+        return bool(profile) and paper_id in profile["papers"]
+
+    @abstractmethod
+    def iter_user_papers(self, username: str) -> Iterator[dict]:
+        """
+        Yield the library entries of a user without loading the whole library
+        """
+
+    @abstractmethod
+    def create_user(self, profile: dict) -> bool:
+        """
+        Create a user profile, return False if the user already exists.
+        """
+
+    @abstractmethod
+    def add_paper_to_user(self, username: str, entry: dict) -> bool:
+        """
+        Add a library entry to an existing user, return False if the paper
+        is already in the user's library. Only the new entry is written.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+###########################################################
+# Firestore
+
+
+class FirestoreStorage(StorageBackend):
+    """
+    Papers live in the `paper_parent` collection. Each user is a document in
+    `user_parent` holding the profile fields, and the library is a 'papers'
+    subcollection with one document per paper, so adding a paper is a single
+    create() of a small document.
+
+    Profiles written before the subcollection existed keep their library in
+    an embedded 'papers' map, which is still read until the user has been
+    moved over with migrate_user_libraries.py.
+    """
+
+    def __init__(self, client, paper_parent: str = "papers", user_parent: str = "users"):
+        self.client = client
+        self.paper_parent: str = paper_parent
+        self.user_parent: str = user_parent
+
+    def _paper_ref(self, paper_id: str):
+        return self.client.collection(self.paper_parent).document(self.doc_id(paper_id))
+
+    def _user_ref(self, username: str):
+        return self.client.collection(self.user_parent).document(username)
+
+    def _user_papers_ref(self, username: str):
+        return self._user_ref(username).collection("papers")
+
+    @staticmethod
+    def doc_id(paper_id: str) -> str:
+        """
+        paper_ids may contain slashes (CVF, old style arXiv), which Firestore
+        reads as a path. The raw paper_id stays in the document body.
+        """
+        return quote(paper_id, safe="")
+
+    def get_paper(self, paper_id: str) -> Optional[Paper]:
+        doc = self._paper_ref(paper_id).get()
+        if doc.exists:
+            return Paper.from_dict(doc.to_dict())
+        return None
+
+    def get_papers(self, paper_ids: Iterable[str]) -> Dict[str, Paper]:
+        refs = [self._paper_ref(paper_id) for paper_id in paper_ids]
+        papers = {}
+        # one batched read instead of a round trip per paper
+        for doc in self.client.get_all(refs):
+            if doc.exists:
+                paper = Paper.from_dict(doc.to_dict())
+                papers[paper.paper_id] = paper
+        return papers
+
+    def put_paper(self, paper: Paper, overwrite: bool = False) -> bool:
+        db_ref = self._paper_ref(paper.paper_id)
+        if not overwrite and db_ref.get().exists:
+            return False
+        db_ref.set(paper.to_dict())
+        return True
+
+    def get_user(self, username: str) -> Optional[dict]:
+        doc = self._user_ref(username).get()
+        if not doc.exists:
+            return None
+        profile = doc.to_dict()
+        legacy = profile.get("papers") or {}
+        profile["papers"] = {
+            entry["paper_id"]: entry for entry in self._iter_user_papers(username, legacy)
+        }
+        return profile
+
+    def iter_papers(self) -> Iterator[Paper]:
+        for doc in self.client.collection(self.paper_parent).stream():
+            yield Paper.from_dict(doc.to_dict())
+
+    def user_exists(self, username: str) -> bool:
+        return self._user_ref(username).get(field_paths=["username"]).exists
+
+    def user_has_paper(self, username: str, paper_id: str) -> bool:
+        entry_ref = self._user_papers_ref(username).document(self.doc_id(paper_id))
+        if entry_ref.get().exists:
+            return True
+        legacy_path = self.client.field_path("papers", paper_id)
+        legacy = self._user_ref(username).get(field_paths=[legacy_path])
+        return legacy.exists and bool((legacy.to_dict() or {}).get("papers"))
+
+    def iter_user_papers(self, username: str) -> Iterator[dict]:
+        legacy = self._user_ref(username).get(field_paths=["papers"])
+        papers = (legacy.to_dict() or {}).get("papers") if legacy.exists else None
+        yield from self._iter_user_papers(username, papers or {})
+
+    def _iter_user_papers(self, username: str, legacy: dict) -> Iterator[dict]:
+        """
+        Entries of the subcollection, then those of the embedded map of a
+        not-yet-migrated profile that are not in the subcollection
+        """
+        seen = set()
+        for doc in self._user_papers_ref(username).stream():
+            entry = doc.to_dict()
+            seen.add(entry["paper_id"])
+            yield entry
+        for paper_id, entry in legacy.items():
+            if paper_id not in seen:
+                yield entry
+
+    def create_user(self, profile: dict) -> bool:
+        from google.api_core.exceptions import Conflict
+
+        profile = dict(profile)
+        papers = profile.pop("papers", None) or {}
+        try:
+            self._user_ref(profile["username"]).create(profile)
+        except Conflict:
+            return False
+        for entry in papers.values():
+            self.add_paper_to_user(profile["username"], entry)
+        return True
+
+    def add_paper_to_user(self, username: str, entry: dict) -> bool:
+        from google.api_core.exceptions import Conflict
+
+        # not-yet-migrated profiles: read just this paper's key of the embedded map
+        legacy_path = self.client.field_path("papers", entry["paper_id"])
+        legacy = self._user_ref(username).get(field_paths=[legacy_path])
+        if legacy.exists and (legacy.to_dict() or {}).get("papers"):
+            return False
+
+        entry_ref = self._user_papers_ref(username).document(
+            self.doc_id(entry["paper_id"])
+        )
+        try:
+            # create() fails if the document exists, so concurrent adds of
+            # different papers never overwrite each other
+            entry_ref.create(entry)
+        except Conflict:
+            return False
+        return True
+
+
+###########################################################
+# SQLite
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id    TEXT PRIMARY KEY,
+    src_website TEXT NOT NULL DEFAULT '',
+    data        TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_papers_src_website ON papers (src_website);
+
+CREATE TABLE IF NOT EXISTS users (
+    username       TEXT PRIMARY KEY,
+    first_name     TEXT NOT NULL DEFAULT '',
+    last_name      TEXT NOT NULL DEFAULT '',
+    user_createdAt INTEGER
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS user_papers (
+    username TEXT NOT NULL REFERENCES users (username),
+    paper_id TEXT NOT NULL,
+    added_at INTEGER,
+    labels   TEXT NOT NULL DEFAULT '[]',
+    notes    TEXT NOT NULL DEFAULT '[]',
+    PRIMARY KEY (username, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_user_papers_added_at ON user_papers (username, added_at);
+CREATE INDEX IF NOT EXISTS idx_user_papers_paper_id ON user_papers (paper_id);
+"""
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    Embedded single-node storage backed by a SQLite database in WAL mode.
+
+    A single connection is shared between threads and serialised with a lock,
+    WAL keeps readers in other processes unblocked while the bot writes.
+    """
+
+    def __init__(self, db_path: Union[str, Path] = ":memory:"):
+        db_path = str(db_path)
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path: str = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SQLITE_SCHEMA)
+            self._conn.commit()
+
+    def get_paper(self, paper_id: str) -> Optional[Paper]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM papers WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return Paper.from_dict(json.loads(row["data"]))
+
+    def get_papers(self, paper_ids: Iterable[str]) -> Dict[str, Paper]:
+        paper_ids = list(paper_ids)
+        if not paper_ids:
+            return {}
+        placeholders = ",".join("?" * len(paper_ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT paper_id, data FROM papers WHERE paper_id IN ({placeholders})",
+                paper_ids,
+            ).fetchall()
+        return {row["paper_id"]: Paper.from_dict(json.loads(row["data"])) for row in rows}
+
+    def put_paper(self, paper: Paper, overwrite: bool = False) -> bool:
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                f"{verb} INTO papers (paper_id, src_website, data) VALUES (?, ?, ?)",
+                (paper.paper_id, paper.src_website, json.dumps(paper.to_dict())),
+            )
+        return cursor.rowcount == 1
+
+    def get_user(self, username: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM users WHERE username = ?", (username,)
+            ).fetchone()
+            if row is None:
+                return None
+            entries = self._conn.execute(
+                "SELECT * FROM user_papers WHERE username = ? ORDER BY added_at",
+                (username,),
+            ).fetchall()
+        profile = dict(row)
+        profile["papers"] = {
+            entry["paper_id"]: self._entry_from_row(entry) for entry in entries
+        }
+        return profile
+
+    def iter_papers(self, batch_size: int = 500) -> Iterator[Paper]:
+        last_paper_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT paper_id, data FROM papers WHERE paper_id > ? "
+                    "ORDER BY paper_id LIMIT ?",
+                    (last_paper_id, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield Paper.from_dict(json.loads(row["data"]))
+            if len(rows) < batch_size:
+                return
+            last_paper_id = rows[-1]["paper_id"]
+
+    def user_exists(self, username: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return row is not None
+
+    def user_has_paper(self, username: str, paper_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM user_papers WHERE username = ? AND paper_id = ?",
+                (username, paper_id),
+            ).fetchone()
+        return row is not None
+
+    def iter_user_papers(self, username: str, batch_size: int = 500) -> Iterator[dict]:
+        # keyset pagination, the lock is not held while the caller consumes entries
+        last_paper_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM user_papers WHERE username = ? AND paper_id > ? "
+                    "ORDER BY paper_id LIMIT ?",
+                    (username, last_paper_id, batch_size),
+                ).fetchall()
+            for row in rows:
+                yield self._entry_from_row(row)
+            if len(rows) < batch_size:
+                return
+            last_paper_id = rows[-1]["paper_id"]
+
+    @staticmethod
+    def _entry_from_row(row) -> dict:
+        return {
+            "paper_id": row["paper_id"],
+            "added_at": row["added_at"],
+            "labels": json.loads(row["labels"]),
+            "notes": json.loads(row["notes"]),
+        }
+
+    def create_user(self, profile: dict) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO users (username, first_name, last_name, user_createdAt) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    profile["username"],
+                    profile.get("first_name") or "",
+                    profile.get("last_name") or "",
+                    profile.get("user_createdAt"),
+                ),
+            )
+            if cursor.rowcount != 1:
+                return False
+            for entry in profile.get("papers", {}).values():
+                self._insert_user_paper(profile["username"], entry)
+        return True
+
+    def add_paper_to_user(self, username: str, entry: dict) -> bool:
+        with self._lock, self._conn:
+            return self._insert_user_paper(username, entry)
+
+    def _insert_user_paper(self, username: str, entry: dict) -> bool:
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO user_papers (username, paper_id, added_at, labels, notes) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (
+                username,
+                entry["paper_id"],
+                entry.get("added_at"),
+                json.dumps(entry.get("labels", [])),
+                json.dumps(entry.get("notes", [])),
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+###########################################################
+
+
+def create_storage(backend: str, **kwargs) -> StorageBackend:
+    """
+    Build a storage backend by name: "firestore" or "sqlite"
+    """
+    if backend == "firestore":
+        return FirestoreStorage(**kwargs)
+    elif backend == "sqlite":
+        return SQLiteStorage(**kwargs)
+    else:
+        raise Exception(f"Invalid storage backend: '{backend}'")
@@ -1,27 +1,104 @@
 # built-in modules
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
 
 # external modules
 from markkk.logger import logger
 
-__all__ = ["process_url"]
+__all__ = [
+    "process_url",
+    "process_urls",
+    "legacy_paper_id",
+    "register_url_handler",
+    "UnsupportedURL",
+    "MalformedURL",
+]
+
+# (paper_id, paper_url, pdf_url)
+UrlTriple = Tuple[str, str, str]
+
+# finds the host of any url, the scheme is optional
+_host_re = re.compile(r"\s*(?:[A-Za-z][A-Za-z0-9+.-]*://)?([^/?#:\s]+)")
+
+# optional port in front, optional query string / fragment and whitespace at the end
+_PORT = r"(?::\d+)?"
+_TAIL = r"(?:[?#]\S*)?\s*$"
+
+
+class UnsupportedURL(Exception):
+    """
+    No handler is registered for the host of the URL
+    """
+
+    error_class = "unsupported"
+
+
+class MalformedURL(Exception):
+    """
+    The host is supported but the URL does not point to a paper
+    """
+
+    error_class = "malformed"
+
+
+class UrlRoute:
+    def __init__(
+        self,
+        src_website: str,
+        pattern: Pattern,
+        handler: Callable[["re.Match"], UrlTriple],
+    ):
+        self.src_website: str = src_website
+        self.pattern: Pattern = pattern
+        self.handler = handler
+
+
+# host -> routes tried in registration order
+_routes: Dict[str, List[UrlRoute]] = {}
+
+
+def register_url_handler(src_website: str, hosts: Iterable[str], pattern: str):
+    """
+    Decorator registering a handler for the URLs of a source website.
+
+    `pattern` is matched against the part of the URL that follows the host
+    (port, path, query string) of URLs on any of `hosts`. The handler receives
+    the match object and returns (paper_id, paper_url, pdf_url).
+    """
+    compiled = re.compile(pattern)
+
+    def decorator(handler):
+        route = UrlRoute(src_website, compiled, handler)
+        for host in hosts:
+            _routes.setdefault(host.lower(), []).append(route)
+        return handler
+
+    return decorator
+
+
+def _route_url(url: str, src_website: str = None) -> Tuple[str, UrlTriple]:
+    host_match = _host_re.match(url)
+    routes = _routes.get(host_match.group(1).lower()) if host_match else None
+    if not routes:
+        raise UnsupportedURL("URL not supported")
+
+    pos = host_match.end()
+    for route in routes:
+        if src_website and route.src_website != src_website:
+            continue
+        match = route.pattern.match(url, pos)
+        if match:
+            return route.src_website, route.handler(match)
+    raise MalformedURL(f"Unexpected URL Error by {routes[0].src_website} URL Handler.")
 
 
 def process_url(url: str) -> Dict[str, str]:
-    if "arxiv.org" in url:
-        src_website = "arxiv"
-        paper_id, paper_url, pdf_url = process_arxiv_url(url)
-    elif "openaccess.thecvf.com" in url:
-        src_website = "cvf"
-        paper_id, paper_url, pdf_url = process_cvf_url(url)
-    elif "openreview.net" in url:
-        src_website = "openreview"
-        paper_id, paper_url, pdf_url = process_openreview_url(url)
-    else:
-        logger.error("URL not supported")
-        raise Exception("URL not supported")
+    try:
+        src_website, (paper_id, paper_url, pdf_url) = _route_url(url)
+    except Exception as err:
+        logger.error(err)
+        raise
 
     tmp_paper_dict = {
         "paper_id": paper_id,
@@ -33,34 +110,90 @@ def process_url(url: str) -> Dict[str, str]:
     return tmp_paper_dict
 
 
-def process_arxiv_url(url: str) -> Tuple[str]:
-    def get_paper_id_from_url(url) -> str:
-        while "/" in url:
-            slash_idx = url.find("/")
-            url = url[slash_idx + 1 :]
-        if url.endswith(".pdf"):
-            return url[:-4]
-        else:
-            return url
-
-    if "arxiv.org/abs" in url:
-        ## abstract page
-        paper_id = get_paper_id_from_url(url)
-        paper_url = url
-        pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
-        return paper_id, paper_url, pdf_url
-    elif "arxiv.org/pdf" in url:
-        ## pdf page
-        paper_id = get_paper_id_from_url(url)
-        paper_url = f"https://arxiv.org/abs/{paper_id}"
-        pdf_url = url
-        return paper_id, paper_url, pdf_url
-    else:
-        logger.error("Unexpected URL Error by arxiv URL Handler.")
-        raise Exception("Unexpected URL Error by arxiv URL Handler.")
-
-
-def process_cvf_url(url: str) -> Tuple[str]:
+def process_urls(urls: Iterable[str]) -> List[Optional[Dict[str, str]]]:
+    """
+    Batch version of process_url, returns one result per URL in order with
+    None for URLs that are not supported. Repeated URLs are routed once.
+    """
+    seen: Dict[str, Optional[Dict[str, str]]] = {}
+    results: List[Optional[Dict[str, str]]] = []
+    for url in urls:
+        if url not in seen:
+            try:
+                src_website, (paper_id, paper_url, pdf_url) = _route_url(url)
+                seen[url] = {
+                    "paper_id": paper_id,
+                    "paper_url": paper_url,
+                    "pdf_url": pdf_url,
+                    "src_website": src_website,
+                }
+            except Exception as err:
+                logger.debug(f"{err}: {url}")
+                seen[url] = None
+        results.append(dict(seen[url]) if seen[url] else None)
+    return results
+
+
+def legacy_paper_id(url: str) -> Optional[str]:
+    """
+    The paper_id the substring-based process_url gave this URL before ids
+    were normalized, if it differs from the current one. Only arXiv ids
+    changed: the last path segment was taken as is, so '1706.03762v2'
+    kept its version and 'hep-th/9901001' became '9901001'.
+    """
+    try:
+        src_website, (paper_id, _, _) = _route_url(url)
+    except (UnsupportedURL, MalformedURL):
+        return None
+    if src_website != "arxiv":
+        return None
+    legacy_id = url.rsplit("/", 1)[-1]
+    if legacy_id.endswith(".pdf"):
+        legacy_id = legacy_id[:-4]
+    return legacy_id if legacy_id != paper_id else None
+
+
+###########################################################
+# arXiv
+
+
+@register_url_handler(
+    "arxiv",
+    hosts=("arxiv.org", "www.arxiv.org", "export.arxiv.org"),
+    pattern=(
+        _PORT + r"/(?:abs|pdf)/"
+        r"(?P<paper_id>\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[A-Z]{2})?/\d{7})"
+        r"(?:v\d+)?(?:\.pdf)?/?" + _TAIL
+    ),
+)
+def _arxiv_handler(match) -> UrlTriple:
+    """
+    New style ('2101.05725') and old style ('hep-th/9901001') identifiers,
+    the version suffix is dropped so every version maps to one paper_id.
+    """
+    paper_id = match.group("paper_id")
+    paper_url = f"https://arxiv.org/abs/{paper_id}"
+    pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
+    return paper_id, paper_url, pdf_url
+
+
+def process_arxiv_url(url: str) -> UrlTriple:
+    return _route_url(url, "arxiv")[1]
+
+
+###########################################################
+# CVF Open Access
+
+
+@register_url_handler(
+    "cvf",
+    hosts=("openaccess.thecvf.com",),
+    pattern=(
+        _PORT + r"/(?P<context>content_[A-Za-z]+_\d{4}|content/[A-Za-z]+\d{4}W?)"
+        r"/(?:html|papers)/(?P<name>[^/?#]+?)\.(?:html|pdf)" + _TAIL
+    ),
+)
+def _cvf_handler(match) -> UrlTriple:
     """
     Open Access url can be splitted into 5 parts:
     start: 'https://openaccess.thecvf.com/'
@@ -69,113 +202,51 @@ def process_cvf_url(url: str) -> Tuple[str]:
     name: 'Wang_Dual_Super-Resolution_Learning_for_Semantic_Segmentation_CVPR_2020_paper'
     end: '.html'
     ==> url = start + context + pg_type + name + end
+    paper_id in the form of: (context + name)
+    eg: "content_CVPR_2020/Wang_Dual_Super-Resolution_Learning_for_Semantic_Segmentation_CVPR_2020_paper"
     """
+    context = match.group("context")
+    name = match.group("name")
+    start = "https://openaccess.thecvf.com/"
+    paper_id = f"{context}/{name}"
+    paper_url = f"{start}{context}/html/{name}.html"
+    pdf_url = f"{start}{context}/papers/{name}.pdf"
+    return paper_id, paper_url, pdf_url
+
 
-    # url validation
-    if "openaccess.thecvf.com" not in url:
-        logger.error("Unexpected URL Error by CVF URL Handler.")
-        raise Exception("Unexpected URL Error by CVF URL Handler.")
-
-    def get_paper_id(url) -> str:
-        """
-        Can parse either main url (paper_url) or pdf_url to find paper_id
-        paper_id in the form of: (context + name)
-        eg: "content_CVPR_2020/Wang_Dual_Super-Resolution_Learning_for_Semantic_Segmentation_CVPR_2020_paper"
-        """
-        while "/" in url:
-            slash_idx = url.find("/")
-            url = url[slash_idx + 1 :]
-            # stop after slash until "content_CVPR..."
-            flag = re.search("^content", url)
-            if flag != None:
-                break
-        if url.endswith(".html"):
-            paper_id = url.replace("/html", "").replace(".html", "")
-            return paper_id
-        else:
-            paper_id = url.replace("/papers", "").replace(".pdf", "")
-            return paper_id
-
-    def get_pg_from_paper_id(paper_id: str, parse_mode="abs") -> str:
-        start = "https://openaccess.thecvf.com/"
-        context, name = paper_id.split("/")
-        if parse_mode == "abs":
-            pg_type = "/html/"
-            end = ".html"
-        elif parse_mode == "pdf":
-            pg_type = "/papers/"
-            end = ".pdf"
-        else:
-            raise Exception("parse_mode error")
-
-        url = start + context + pg_type + name + end
-        return url
-
-    paper_id = get_paper_id(url)
-    if "/html" in url:
-        ## abstract page
-        paper_url = url
-        pdf_url = get_pg_from_paper_id(paper_id, parse_mode="pdf")
-        return paper_id, paper_url, pdf_url
-    elif "/papers" in url:
-        ## pdf page
-        paper_url = get_pg_from_paper_id(paper_id, parse_mode="abs")
-        pdf_url = url
-        return paper_id, paper_url, pdf_url
-    else:
-        logger.error("Unexpected URL Error by CVF URL Handler.")
-        raise Exception("Unexpected URL Error by CVF URL Handler.")
-
-
-def process_openreview_url(url: str) -> Tuple[str]:
-    """
-    Open Review url can be splitted into 5 parts:
+def process_cvf_url(url: str) -> UrlTriple:
+    return _route_url(url, "cvf")[1]
+
+
+###########################################################
+# OpenReview
+
+
+@register_url_handler(
+    "openreview",
+    hosts=("openreview.net", "www.openreview.net"),
+    pattern=(
+        _PORT + r"/(?:forum|pdf)/?\?(?:[^#\s]*&)?id=(?P<paper_id>[A-Za-z0-9_\-]+)"
+        r"(?:[&#]\S*)?\s*$"
+    ),
+)
+def _openreview_handler(match) -> UrlTriple:
+    """
+    Open Review url can be splitted into 4 parts:
     start: 'https://openreview.net/'
     pg_type: 'forum' or 'pdf'
     mid: '?id='
     paper_id: 'nlAxjsniDzg'
     ==> url = start + pg_type + mid + paper_id
     """
+    paper_id = match.group("paper_id")
+    paper_url = f"https://openreview.net/forum?id={paper_id}"
+    pdf_url = f"https://openreview.net/pdf?id={paper_id}"
+    return paper_id, paper_url, pdf_url
+
 
-    # url validation
-    if "openreview.net" not in url:
-        logger.error("Unexpected URL Error by openreview URL Handler.")
-        raise Exception("Unexpected URL Error by openreview URL Handler.")
-
-    def get_paper_id(url) -> str:
-        while "/" in url:
-            slash_idx = url.find("/")
-            url = url[slash_idx + 1 :]
-        idx = url.find("=")
-        paper_id = url[idx + 1 :]
-        return paper_id
-
-    def get_pg_from_paper_id(paper_id: str, parse_mode="abs") -> str:
-        start = "https://openreview.net/"
-        mid = "?id="
-        if parse_mode == "abs":
-            pg_type = "forum"
-        elif parse_mode == "pdf":
-            pg_type = "pdf"
-        else:
-            raise Exception("parse_mode error")
-        url = start + pg_type + mid + paper_id
-        return url
-
-    paper_id = get_paper_id(url)
-    if "forum" in url:
-        ## abstract page
-        paper_url = url
-        pdf_url = get_pg_from_paper_id(paper_id, parse_mode="pdf")
-        return paper_id, paper_url, pdf_url
-    elif "pdf" in url:
-        ## pdf page
-        paper_url = get_pg_from_paper_id(paper_id, parse_mode="abs")
-        pdf_url = url
-        return paper_id, paper_url, pdf_url
-    else:
-        logger.error("Unexpected URL Error by openreview URL Handler.")
-        raise Exception("Unexpected URL Error by openreview URL Handler.")
+def process_openreview_url(url: str) -> UrlTriple:
+    return _route_url(url, "openreview")[1]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+# built-in modules
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, Union
+
+# external modules
+from markkk.logger import logger
+
+__all__ = ["VisitLogger"]
+
+_STOP = object()
+
+
+class VisitLogger:
+    """
+    Buffered JSONL log written by a background thread.
+
+    log() only puts the record on a queue, the writer thread serialises
+    records and appends them in batches of `flush_every` records or every
+    `flush_interval` seconds, whichever comes first. The file is rotated when
+    it would grow beyond `max_bytes` or when the date changes, rotated files
+    are gzipped if `compress` is set. Pending records are flushed on close()
+    and at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        log_fp: Union[str, Path],
+        flush_every: int = 100,
+        flush_interval: float = 0.5,
+        max_bytes: int = 10 * 1024 * 1024,
+        rotate_daily: bool = True,
+        compress: bool = True,
+        max_queue_size: int = 10000,
+    ):
+        self.log_fp = Path(log_fp)
+        self.flush_every: int = flush_every
+        self.flush_interval: float = flush_interval
+        self.max_bytes: int = max_bytes
+        self.rotate_daily: bool = rotate_daily
+        self.compress: bool = compress
+        self.dropped: int = 0
+
+        self.log_fp.parent.mkdir(parents=True, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._file = None
+        self._size: int = 0
+        self._opened_on: Optional[date] = None
+        self._closed: bool = False
+        self._writer = threading.Thread(target=self._run, name="visit-log", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def log(self, record: dict) -> None:
+        """
+        Queue a record, never blocks the caller. Records are dropped when
+        the queue is full.
+        """
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every record queued so far is written
+        """
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout)
+
+    ###########################################################
+    # writer thread
+
+    def _run(self) -> None:
+        batch = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None:
+                # flush interval elapsed
+                self._write(batch)
+            elif item is _STOP:
+                self._write(batch)
+                self._close_file()
+                return
+            elif isinstance(item, threading.Event):
+                self._write(batch)
+                item.set()
+            else:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) >= self.flush_every:
+                    self._write(batch)
+
+    def _write(self, batch: list) -> None:
+        if not batch:
+            return
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, default=str, ensure_ascii=False))
+            except Exception as err:
+                logger.error(f"Unserialisable visit log record: {err}")
+        batch.clear()
+        data = ("\n".join(lines) + "\n").encode()
+        try:
+            self._rotate_if_needed(len(data))
+            if self._file is None:
+                self._open_file()
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+        except OSError as err:
+            logger.error(f"Failed writing visit log: {err}")
+
+    def _open_file(self) -> None:
+        self._file = self.log_fp.open(mode="ab")
+        stat = self.log_fp.stat()
+        self._size = stat.st_size
+        self._opened_on = date.fromtimestamp(stat.st_mtime) if stat.st_size else date.today()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate_if_needed(self, incoming: int) -> None:
+        if self._file is None:
+            if not self.log_fp.is_file():
+                return
+            self._open_file()
+        if not self._size:
+            return
+        new_day = self.rotate_daily and self._opened_on != date.today()
+        too_big = self.max_bytes and self._size + incoming > self.max_bytes
+        if not (new_day or too_big):
+            return
+
+        self._close_file()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated_fp = self.log_fp.with_name(f"{self.log_fp.stem}.{stamp}{self.log_fp.suffix}")
+        counter = 1
+        while rotated_fp.exists() or rotated_fp.with_name(rotated_fp.name + ".gz").exists():
+            rotated_fp = self.log_fp.with_name(
+                f"{self.log_fp.stem}.{stamp}-{counter}{self.log_fp.suffix}"
+            )
+            counter += 1
+        os.replace(self.log_fp, rotated_fp)
+        if self.compress:
+            with rotated_fp.open(mode="rb") as src, gzip.open(f"{rotated_fp}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            rotated_fp.unlink()
@@ -0,0 +1,264 @@
+# built-in modules
+import asyncio
+import hmac
+import json
+import queue
+import threading
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Tuple
+
+# external modules
+from markkk.logger import logger
+
+__all__ = ["WebhookServer", "SECRET_TOKEN_HEADER"]
+
+# sent by Telegram with every update when setWebhook was given a secret_token
+SECRET_TOKEN_HEADER = "x-telegram-bot-api-secret-token"
+HEALTH_CHECK_PATH = "/healthz"
+MAX_BODY_SIZE: int = 1024 * 1024
+KEEP_ALIVE_TIMEOUT: float = 75  # seconds a connection may sit idle between requests
+READ_TIMEOUT: float = 10  # seconds to receive the rest of a started request
+
+
+class WebhookServer:
+    """
+    asyncio HTTP endpoint receiving Telegram updates pushed to the webhook.
+
+    A POST to `path` carrying the right secret token header is acknowledged
+    as soon as its JSON body is queued. `num_workers` threads take updates
+    off the queue and pass them to `handle_update`. When `max_queue_size`
+    updates are waiting, new ones are answered with 503 so that Telegram
+    retries them later, instead of queueing without bound. GET /healthz
+    answers 200 for load balancer health checks.
+    """
+
+    def __init__(
+        self,
+        handle_update: Callable[[dict], object],
+        secret_token: str,
+        host: str = "127.0.0.1",
+        port: int = 8443,
+        path: str = "/telegram",
+        num_workers: int = 4,
+        max_queue_size: int = 100,
+    ):
+        if not secret_token:
+            raise ValueError("secret_token must not be empty")
+        self.handle_update = handle_update
+        self.secret_token: bytes = secret_token.encode()
+        self.host: str = host
+        self.port: int = port
+        self.path: str = path
+        self.num_workers: int = num_workers
+
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue_size)
+        self._workers: List[threading.Thread] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._start_error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+        # metrics
+        self.received: int = 0
+        self.rejected: int = 0
+        self.dropped: int = 0
+        self.processed: int = 0
+        self.failed: int = 0
+
+    ###########################################################
+    # lifecycle
+
+    def start(self) -> None:
+        """
+        Start the workers and the server thread, return once the port is bound
+        """
+        for i in range(self.num_workers):
+            worker = threading.Thread(
+                target=self._work, name=f"webhook-worker-{i}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._serve, name="webhook-server", daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._start_error is not None:
+            self.stop(drain=False)
+            raise self._start_error
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path}")
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port)
+            )
+        except Exception as err:
+            self._start_error = err
+            self._started.set()
+            self._loop.close()
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        # drop idle keep-alive connections
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Stop accepting updates. With `drain`, updates already acknowledged are
+        processed before the workers exit, otherwise they are discarded.
+        """
+        if self._thread and self._thread.is_alive():
+            if self._server is not None:
+                asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+            self._thread.join(timeout)
+
+        if not drain:
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "received": self.received,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+                "processed": self.processed,
+                "failed": self.failed,
+            }
+
+    ###########################################################
+    # HTTP
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                if not request_line:
+                    break
+                status, keep_alive = await asyncio.wait_for(
+                    self._handle_request(request_line, reader), READ_TIMEOUT
+                )
+                self._respond(writer, status, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # idle timeout, client went away or a line over the stream limit
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self, request_line: bytes, reader: asyncio.StreamReader
+    ) -> Tuple[int, bool]:
+        """
+        Read the rest of one request, return the response status and whether
+        the connection can be kept open
+        """
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, False
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, False
+        if length > MAX_BODY_SIZE:
+            return HTTPStatus.REQUEST_ENTITY_TOO_LARGE, False
+        body = await reader.readexactly(length) if length > 0 else b""
+
+        return self._route(method, target.split("?", 1)[0], headers, body), keep_alive
+
+    def _route(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> int:
+        if path == HEALTH_CHECK_PATH and method == "GET":
+            return HTTPStatus.OK
+        if path != self.path:
+            return HTTPStatus.NOT_FOUND
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED
+
+        token = headers.get(SECRET_TOKEN_HEADER, "").encode()
+        if not hmac.compare_digest(token, self.secret_token):
+            with self._lock:
+                self.rejected += 1
+            logger.warning("Webhook request with invalid secret token rejected")
+            return HTTPStatus.FORBIDDEN
+
+        try:
+            update = json.loads(body)
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST
+        if not isinstance(update, dict):
+            return HTTPStatus.BAD_REQUEST
+
+        try:
+            self._queue.put_nowait(update)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Webhook update queue is full, asking Telegram to retry")
+            return HTTPStatus.SERVICE_UNAVAILABLE
+        with self._lock:
+            self.received += 1
+        return HTTPStatus.OK
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, keep_alive: bool) -> None:
+        status = HTTPStatus(status)
+        connection = "keep-alive" if keep_alive else "close"
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Length: 0\r\nConnection: {connection}\r\n\r\n".encode("latin-1")
+        )
+
+    ###########################################################
+    # workers
+
+    def _work(self) -> None:
+        while True:
+            update = self._queue.get()
+            if update is None:
+                return
+            try:
+                self.handle_update(update)
+                with self._lock:
+                    self.processed += 1
+            except Exception as err:
+                with self._lock:
+                    self.failed += 1
+                logger.error(f"Failed to handle update {update.get('update_id')}: {err}")
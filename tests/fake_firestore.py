@@ -0,0 +1,81 @@
+"""
+In-memory stand-in for the parts of the Firestore client used by
+storage.FirestoreStorage. Like Firestore, a document id containing '/'
+is rejected as it would address a nested path.
+"""
+import copy
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: dict = None):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data)
+
+
+class FakeDocument:
+    def __init__(self, client, path: tuple):
+        self._client = client
+        self._path = path
+        self.id = path[-1]
+
+    def get(self, field_paths=None) -> FakeSnapshot:
+        data = self._client.docs.get(self._path)
+        if data is not None and field_paths is not None:
+            selected = {}
+            for field_path in field_paths:
+                if isinstance(field_path, str):
+                    field_path = tuple(field_path.split("."))
+                value, target = data, selected
+                for name in field_path[:-1]:
+                    value = (value or {}).get(name)
+                    target = target.setdefault(name, {})
+                if isinstance(value, dict) and field_path[-1] in value:
+                    target[field_path[-1]] = value[field_path[-1]]
+            data = selected
+        return FakeSnapshot(self.id, data)
+
+    def set(self, data: dict) -> None:
+        self._client.docs[self._path] = copy.deepcopy(data)
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._client, self._path + (name,))
+
+
+class FakeCollection:
+    def __init__(self, client, path: tuple):
+        self._client = client
+        self._path = path
+
+    def document(self, doc_id: str) -> FakeDocument:
+        if "/" in doc_id:
+            raise ValueError(f"A document must have an even number of path elements: {doc_id}")
+        return FakeDocument(self._client, self._path + (doc_id,))
+
+    def stream(self):
+        for path, data in sorted(self._client.docs.items()):
+            if path[:-1] == self._path:
+                yield FakeSnapshot(path[-1], copy.deepcopy(data))
+
+
+class FakeFirestore:
+    def __init__(self):
+        # document path -> data
+        self.docs = {}
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, (name,))
+
+    def get_all(self, refs):
+        for ref in refs:
+            yield ref.get()
+
+    @staticmethod
+    def field_path(*names) -> tuple:
+        return names
@@ -0,0 +1,76 @@
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from arxiv_api import get_papers_from_arxiv_api, parse_arxiv_feed
+from http_client import HttpClient
+
+_feed = (Path(__file__).parent / "fixtures" / "arxiv_api_feed.xml").read_text()
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    queries = []
+
+    def do_GET(self):
+        FeedHandler.queries.append(parse_qs(urlparse(self.path).query))
+        body = _feed.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestArxivApi(unittest.TestCase):
+    def test_parse_feed(self):
+        papers = {paper.paper_id: paper for paper in parse_arxiv_feed(_feed)}
+        self.assertEqual(set(papers), {"1301.3781", "1405.4053", "hep-th/9901001"})
+
+        paper = papers["1301.3781"]
+        self.assertEqual(
+            paper.title, "Efficient Estimation of Word Representations in Vector Space"
+        )
+        self.assertEqual(paper.first_author, "Tomas Mikolov")
+        self.assertEqual(len(paper.authors), 4)
+        self.assertTrue(paper.abstract.startswith("We propose two novel model"))
+        self.assertNotIn("\n", paper.abstract)
+        self.assertEqual(paper.year, "2013")
+        self.assertEqual(paper.pdf_url, "https://arxiv.org/pdf/1301.3781.pdf")
+        self.assertEqual(papers["hep-th/9901001"].title, "An Old-Style Identifier")
+
+    def test_batched_queries(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        api_url = f"http://127.0.0.1:{server.server_address[1]}/api/query"
+        FeedHandler.queries = []
+        try:
+            papers = get_papers_from_arxiv_api(
+                ["1301.3781", "1405.4053", "hep-th/9901001"],
+                client=HttpClient(),
+                chunk_size=2,
+                interval=0,
+                api_url=api_url,
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(len(FeedHandler.queries), 2)
+        self.assertEqual(FeedHandler.queries[0]["id_list"], ["1301.3781,1405.4053"])
+        self.assertEqual(len(papers), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from dedup_index import DedupIndex, author_keys, normalize_title
+from paper_class import Paper
+
+ARXIV = Paper(
+    paper_id="1512.03385",
+    title="Deep Residual Learning for Image Recognition",
+    authors=["Kaiming He", "Xiangyu Zhang", "Shaoqing Ren", "Jian Sun"],
+    src_website="arxiv",
+)
+CVF = Paper(
+    paper_id="content_cvpr_2016/html/He_Deep_Residual_Learning_CVPR_2016_paper",
+    title="Deep Residual Learning for Image Recognition.",
+    authors=["He, Kaiming", "Zhang, Xiangyu", "Ren, Shaoqing", "Sun, Jian"],
+    src_website="cvf",
+)
+OPENREVIEW = Paper(
+    paper_id="rJl-b3RcF7",
+    title="Deep Residual Learning for Image Recognition Tasks",
+    authors=["Kaiming He", "Jian Sun"],
+    src_website="openreview",
+)
+# same title, different authors
+OTHER = Paper(
+    paper_id="SyxTest01",
+    title="Deep Residual Learning for Image Recognition",
+    authors=["Jane Doe", "John Roe"],
+    src_website="openreview",
+)
+
+
+class TestNormalization(unittest.TestCase):
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title("  Café: Déjà-Vu   Networks! "), "cafe deja vu networks")
+
+    def test_author_keys(self):
+        self.assertEqual(author_keys(["Kaiming He", "He, Kaiming", "Jian  Sun"]), ["he", "sun"])
+
+
+class TestDedupIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = DedupIndex()
+
+    def tearDown(self):
+        self.index.close()
+
+    def test_links_versions_across_sources(self):
+        self.assertEqual(self.index.add(ARXIV), ARXIV.paper_id)
+        self.assertEqual(self.index.add(CVF), ARXIV.paper_id)
+        self.assertEqual(self.index.add(OPENREVIEW), ARXIV.paper_id)
+        self.assertEqual(self.index.add(OTHER), OTHER.paper_id)
+
+        self.assertEqual(
+            self.index.versions(CVF.paper_id),
+            sorted([ARXIV.paper_id, CVF.paper_id, OPENREVIEW.paper_id]),
+        )
+        duplicates = self.index.find_duplicates(ARXIV)
+        self.assertEqual(duplicates[0], (CVF.paper_id, 1.0))
+        self.assertEqual(len(duplicates), 2)
+
+    def test_same_source_not_linked(self):
+        self.index.add(ARXIV)
+        resubmitted = Paper(
+            paper_id="1603.05027", title=ARXIV.title, authors=ARXIV.authors, src_website="arxiv"
+        )
+        self.assertEqual(self.index.add(resubmitted), "1603.05027")
+
+    def test_readd_keeps_group(self):
+        self.index.add(ARXIV)
+        self.index.add(CVF)
+        renamed = Paper(
+            paper_id=CVF.paper_id, title="ResNet", authors=CVF.authors, src_website="cvf"
+        )
+        self.assertEqual(self.index.add(renamed), ARXIV.paper_id)
+        self.assertEqual(self.index.size(), 2)
+        self.assertEqual(self.index.find_duplicates(ARXIV), [])
+
+    def test_regroup(self):
+        self.index.add(ARXIV)
+        self.index.add(CVF)
+        self.index.add(OPENREVIEW)
+        renamed = Paper(
+            paper_id=CVF.paper_id, title="ResNet", authors=CVF.authors, src_website="cvf"
+        )
+        self.assertEqual(self.index.add(renamed, regroup=True), CVF.paper_id)
+        self.assertEqual(self.index.versions(CVF.paper_id), [CVF.paper_id])
+        self.assertEqual(self.index.add(CVF, regroup=True), ARXIV.paper_id)
+
+    def test_regroup_canonical(self):
+        self.index.add(ARXIV)
+        self.index.add(CVF)
+        self.index.add(OPENREVIEW)
+        # the canonical record no longer matches, the other versions stay linked
+        renamed = Paper(
+            paper_id=ARXIV.paper_id, title="ResNet", authors=ARXIV.authors, src_website="arxiv"
+        )
+        self.assertEqual(self.index.add(renamed, regroup=True), ARXIV.paper_id)
+        self.assertEqual(self.index.versions(ARXIV.paper_id), [ARXIV.paper_id])
+        self.assertEqual(
+            self.index.versions(CVF.paper_id), sorted([CVF.paper_id, OPENREVIEW.paper_id])
+        )
+        # still matches a member of its group: stays the canonical record
+        self.assertEqual(self.index.add(CVF, regroup=True), CVF.paper_id)
+
+    def test_build(self):
+        self.assertEqual(self.index.build([ARXIV, CVF, OTHER], batch_size=2), 3)
+        self.assertEqual(self.index.canonical_id(CVF.paper_id), ARXIV.paper_id)
+        self.assertIsNone(self.index.canonical_id("unknown"))
+        self.assertEqual(self.index.versions("unknown"), [])
+        self.index.remove(CVF.paper_id)
+        self.assertEqual(self.index.versions(ARXIV.paper_id), [ARXIV.paper_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
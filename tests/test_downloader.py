@@ -0,0 +1,102 @@
+import hashlib
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from downloader import DownloadError, download_file
+
+_payload = b"%PDF-1.4\n" + bytes(range(256)) * 1024
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    requested_ranges = []
+    # pretend to resume this many bytes before the requested offset
+    misplaced_resume = 0
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        self.requested_ranges.append(range_header)
+        if range_header:
+            start = int(range_header[len("bytes=") : -1]) - self.misplaced_resume
+            body = _payload[start:]
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(_payload) - 1}/{len(_payload)}"
+            )
+        else:
+            body = _payload
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloader(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/paper.pdf"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        RangeHandler.requested_ranges = []
+        RangeHandler.misplaced_resume = 0
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.filepath = Path(self.tmp_dir.name) / "paper.pdf"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_full_download(self):
+        digest = download_file(self.url, self.filepath, magic=b"%PDF")
+        self.assertEqual(self.filepath.read_bytes(), _payload)
+        self.assertEqual(digest, hashlib.sha256(_payload).hexdigest())
+        self.assertFalse(self.filepath.with_name("paper.pdf.part").exists())
+
+    def test_resume_partial_download(self):
+        part_fp = self.filepath.with_name("paper.pdf.part")
+        part_fp.write_bytes(_payload[:1000])
+        digest = download_file(self.url, self.filepath)
+        self.assertEqual(RangeHandler.requested_ranges, ["bytes=1000-"])
+        self.assertEqual(self.filepath.read_bytes(), _payload)
+        self.assertEqual(digest, hashlib.sha256(_payload).hexdigest())
+
+    def test_resume_at_wrong_offset(self):
+        part_fp = self.filepath.with_name("paper.pdf.part")
+        part_fp.write_bytes(_payload[:1000])
+        RangeHandler.misplaced_resume = 10
+        with self.assertRaises(DownloadError):
+            download_file(self.url, self.filepath)
+        self.assertFalse(part_fp.exists())
+
+        # the retry does not send the same Range again
+        download_file(self.url, self.filepath)
+        self.assertEqual(RangeHandler.requested_ranges, ["bytes=1000-", None])
+        self.assertEqual(self.filepath.read_bytes(), _payload)
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(DownloadError):
+            download_file(self.url, self.filepath, expected_sha256="0" * 64)
+        self.assertFalse(self.filepath.exists())
+        self.assertFalse(self.filepath.with_name("paper.pdf.part").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
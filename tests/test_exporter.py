@@ -0,0 +1,134 @@
+import csv
+import json
+import re
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from exporter import bibtex_entry, bibtex_key, export_library, iter_library
+from fake_firestore import FakeFirestore
+from paper_class import Paper
+from storage import FirestoreStorage, SQLiteStorage
+
+
+def make_paper(i: int) -> Paper:
+    paper_id = f"1706.{i:05d}"
+    return Paper(
+        paper_id=paper_id,
+        title=f"Attention Is All You Need {i}",
+        authors=["Ashish Vaswani", "Noam Shazeer"],
+        paper_url=f"https://arxiv.org/abs/{paper_id}",
+        pdf_url=f"https://arxiv.org/pdf/{paper_id}.pdf",
+        src_website="arxiv",
+    )
+
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.storage = SQLiteStorage()
+        self.storage.create_user({"username": "alice", "papers": {}})
+        for i in range(7):
+            paper = make_paper(i)
+            self.storage.put_paper(paper)
+            entry = {"paper_id": paper.paper_id, "added_at": 1610000000 + i, "labels": ["nlp"]}
+            self.storage.add_paper_to_user("alice", entry)
+        self.exported = []
+
+    def tearDown(self):
+        for filepath in self.exported:
+            filepath.unlink()
+        self.storage.close()
+
+    def export(self, fmt: str, username: str = "alice"):
+        filepath, count = export_library(self.storage, username, fmt, batch_size=3)
+        self.exported.append(filepath)
+        return filepath, count
+
+    def test_iter_library_batches(self):
+        rows = list(iter_library(self.storage, "alice", batch_size=3))
+        self.assertEqual([paper.paper_id for _, paper in rows], [make_paper(i).paper_id for i in range(7)])
+        self.assertEqual(rows[0][0]["added_at"], 1610000000)
+
+    def test_bibtex(self):
+        filepath, count = self.export("bibtex")
+        self.assertEqual(count, 7)
+        self.assertEqual(filepath.suffix, ".bib")
+        text = filepath.read_text()
+        keys = re.findall(r"^@misc\{(.+),$", text, flags=re.M)
+        self.assertEqual(len(keys), 7)
+        self.assertEqual(len(set(keys)), 7)
+        self.assertEqual(keys[:3], ["vaswani2017attention", "vaswani2017attentiona", "vaswani2017attentionb"])
+        self.assertIn("author={Ashish Vaswani and Noam Shazeer},", text)
+        self.assertIn("eprint={1706.00003},", text)
+
+    def test_bibtex_from_scraper(self):
+        paper = make_paper(0)
+        paper.bibtex = "@inproceedings{vaswani2017,\n  title={Attention}\n}\n"
+        self.assertEqual(bibtex_entry(paper), paper.bibtex.strip())
+        self.assertEqual(bibtex_key(paper), "vaswani2017")
+        self.assertTrue(bibtex_entry(paper, key="vaswani2017a").startswith("@inproceedings{vaswani2017a,\n"))
+
+    def test_bibtex_unique_keys(self):
+        # scraped and generated keys share one namespace
+        for i, bibtex in enumerate(["@article{vaswani2017attentiona, title={A}}", "@misc{x, title={B}}"], start=7):
+            paper = make_paper(i)
+            paper.bibtex = bibtex
+            self.storage.put_paper(paper)
+            self.storage.add_paper_to_user("alice", {"paper_id": paper.paper_id, "added_at": 0})
+        filepath, count = self.export("bibtex")
+        keys = re.findall(r"^@\w+\{([^,]+),", filepath.read_text(), flags=re.M)
+        self.assertEqual(count, 9)
+        self.assertEqual(len(set(keys)), 9)
+
+    def test_csv(self):
+        filepath, count = self.export("csv")
+        with filepath.open(newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(count, len(rows))
+        self.assertEqual(rows[1]["paper_id"], "1706.00001")
+        self.assertEqual(rows[1]["authors"], "Ashish Vaswani; Noam Shazeer")
+        self.assertEqual(rows[1]["labels"], "nlp")
+
+    def test_jsonl(self):
+        filepath, count = self.export("jsonl")
+        records = [json.loads(line) for line in filepath.read_text().splitlines()]
+        self.assertEqual(count, len(records))
+        self.assertEqual(Paper.from_dict(records[2]).to_dict(), make_paper(2).to_dict())
+        self.assertEqual(records[2]["added_at"], 1610000002)
+
+    def test_empty_library(self):
+        filepath, count = self.export("csv", username="bob")
+        self.assertEqual(count, 0)
+        self.assertEqual(filepath.read_text().strip(), "paper_id,title,authors,year,src_website,paper_url,pdf_url,added_at,labels")
+
+    def test_legacy_library(self):
+        # a Firestore profile not yet moved by migrate_user_libraries.py
+        client = FakeFirestore()
+        storage = FirestoreStorage(client)
+        entries = {}
+        for i in range(5):
+            paper = make_paper(i)
+            storage.put_paper(paper)
+            entries[paper.paper_id] = {"paper_id": paper.paper_id, "added_at": 1610000000 + i}
+        client.docs[("users", "bob")] = {"username": "bob", "papers": dict(list(entries.items())[:4])}
+        # moved already, or added after the subcollection existed
+        client.docs[("users", "bob", "papers", "1706.00003")] = entries["1706.00003"]
+        client.docs[("users", "bob", "papers", "1706.00004")] = entries["1706.00004"]
+
+        rows = list(iter_library(storage, "bob", batch_size=2))
+        self.assertEqual(sorted(paper.paper_id for _, paper in rows), sorted(entries))
+        self.assertEqual(sorted(storage.get_user("bob")["papers"]), sorted(entries))
+
+    def test_invalid_format(self):
+        with self.assertRaises(Exception):
+            export_library(self.storage, "alice", "docx")
+
+
+if __name__ == "__main__":
+    unittest.main()
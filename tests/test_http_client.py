@@ -0,0 +1,81 @@
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from http_client import HttpClient
+
+_etag = '"v1"'
+_body = "<html><h1>Paper</h1></html>"
+
+
+class Handler(BaseHTTPRequestHandler):
+    statuses = []
+    fail_next = 0
+
+    def do_GET(self):
+        if Handler.fail_next:
+            Handler.fail_next -= 1
+            status, body = 503, b""
+        elif self.headers.get("If-None-Match") == _etag:
+            status, body = 304, b""
+        else:
+            status, body = 200, _body.encode()
+        Handler.statuses.append(status)
+        self.send_response(status)
+        self.send_header("ETag", _etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/abs/1301.3781"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.statuses = []
+        Handler.fail_next = 0
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.client = HttpClient(cache_dir=self.tmp_dir.name, backoff_base=0.001)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_conditional_revalidation(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url)
+        self.assertEqual(Handler.statuses, [200, 304])
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.text, _body)
+
+    def test_retry_on_server_error(self):
+        Handler.fail_next = 2
+        response = self.client.get(self.url)
+        self.assertEqual(Handler.statuses, [503, 503, 200])
+        self.assertEqual(response.text, _body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from message_links import LinkResolver, LinkResult, chat_limiter, extract_urls, format_reply
+from metrics import set_request_labels, span, trace_request
+from negative_cache import CachedFailure
+from paper_class import Paper
+
+
+class FakeEntity:
+    def __init__(self, type: str, offset: int, url: str = None):
+        self.type = type
+        self.offset = offset
+        self.url = url
+
+
+class FakeMessage:
+    """
+    Stands in for telegram.Message.parse_entities
+    """
+
+    def __init__(self, entities):
+        self.entities = entities
+
+    def parse_entities(self, types):
+        return {entity: text for entity, text in self.entities if entity.type in types}
+
+
+def make_paper(url: str) -> Paper:
+    paper_id = url.rsplit("/", 1)[-1]
+    return Paper(
+        paper_id=paper_id,
+        title=f"Paper {paper_id}",
+        authors=["Ada Lovelace"],
+        pdf_url=f"https://arxiv.org/pdf/{paper_id}.pdf",
+        src_website="arxiv",
+    )
+
+
+class TestExtractUrls(unittest.TestCase):
+    def test_url_and_text_link_entities(self):
+        message = FakeMessage(
+            [
+                (FakeEntity("text_link", 40, "https://arxiv.org/abs/1706.03762"), "Transformer"),
+                (FakeEntity("url", 0, None), "arxiv.org/abs/1301.3781"),
+                (FakeEntity("bold", 20, None), "must read"),
+                # same link again
+                (FakeEntity("url", 60, None), "https://www.arxiv.org/abs/1301.3781/"),
+            ]
+        )
+        self.assertEqual(
+            extract_urls(message),
+            ["arxiv.org/abs/1301.3781", "https://arxiv.org/abs/1706.03762"],
+        )
+        self.assertEqual(len(extract_urls(message, limit=1)), 1)
+
+
+class TestLinkResolver(unittest.TestCase):
+    def setUp(self):
+        self.resolver = LinkResolver(max_workers=8)
+
+    def tearDown(self):
+        self.resolver.shutdown()
+
+    def test_links_resolve_concurrently(self):
+        urls = [f"https://arxiv.org/abs/2101.{i:05d}" for i in range(8)]
+        threads = set()
+
+        def resolve(url):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.2)
+            return make_paper(url), ()
+
+        started_at = time.perf_counter()
+        results = self.resolver.resolve_all(urls, resolve)
+        elapsed = time.perf_counter() - started_at
+
+        self.assertLess(elapsed, 0.2 * len(urls) / 2)
+        self.assertGreater(len(threads), 1)
+        self.assertEqual([result.paper.paper_id for result in results], [u[-10:] for u in urls])
+
+    def test_labels_are_per_link(self):
+        barrier = threading.Barrier(3)
+
+        def resolve(url):
+            src_website = url.split("/")[0]
+            set_request_labels(src_website=src_website)
+            # all links have set their label before any span starts
+            barrier.wait(5)
+            with span("scrape"):
+                pass
+            return make_paper(url), ()
+
+        with trace_request("test_handler") as trace:
+            self.resolver.resolve_all(["arxiv/1", "cvf/2", "openreview/3"], resolve)
+        stages = sorted(labels["src_website"] for stage, _, labels in trace.stages)
+        self.assertEqual(stages, ["arxiv", "cvf", "openreview"])
+        self.assertEqual(trace.labels, {})
+
+    def test_failures_are_per_link(self):
+        def resolve(url):
+            if url.endswith("bad"):
+                raise CachedFailure(url, "malformed")
+            if url.endswith("boom"):
+                raise ValueError("parser bug")
+            return make_paper(url), ()
+
+        results = self.resolver.resolve_all(["a/ok", "a/bad", "a/boom"], resolve)
+        self.assertEqual([result.outcome for result in results], ["ok", "malformed", "error"])
+
+    def test_chat_quota_per_message(self):
+        # default limits, buckets start over full
+        chat_limiter.configure()
+        self.addCleanup(chat_limiter.configure)
+        resolver = LinkResolver(max_workers=10)
+        self.addCleanup(resolver.shutdown)
+        urls = [f"a/{i}" for i in range(10)]
+        barrier = threading.Barrier(len(urls))
+
+        def resolve(url):
+            # only passes once every link of the message is submitted
+            barrier.wait(5)
+            return make_paper(url), ()
+
+        for _ in range(chat_limiter.burst):
+            started_at = time.perf_counter()
+            results = resolver.resolve_all(urls, resolve, chat_id="42")
+            self.assertLess(time.perf_counter() - started_at, 1)
+            self.assertEqual({result.outcome for result in results}, {"ok"})
+
+        # refused straight away, with the time to the next slot
+        started_at = time.perf_counter()
+        results = resolver.resolve_all(urls, resolve, chat_id="42")
+        self.assertLess(time.perf_counter() - started_at, 1)
+        self.assertEqual({result.outcome for result in results}, {"throttled"})
+        self.assertGreater(results[0].error.wait, 0)
+        # other chats have their own quota
+        results = resolver.resolve_all(urls[:1], lambda url: (make_paper(url), ()), chat_id="43")
+        self.assertEqual(results[0].outcome, "ok")
+
+    def test_timeout(self):
+        release = threading.Event()
+
+        def resolve(url):
+            if url == "slow":
+                release.wait(5)
+            return make_paper(url), ()
+
+        results = self.resolver.resolve_all(["fast", "slow"], resolve, timeout=0.1)
+        release.set()
+        self.assertEqual([result.outcome for result in results], ["ok", "timeout"])
+
+
+class TestFormatReply(unittest.TestCase):
+    def test_single_link_keeps_detailed_reply(self):
+        paper = make_paper("1301.3781")
+        self.assertEqual(
+            format_reply([LinkResult("u", paper=paper)]),
+            ["*Paper*: Paper 1301.3781\n\n*Author*: Ada Lovelace\n\n*PDF*: https://arxiv.org/pdf/1301.3781.pdf"],
+        )
+        reply = format_reply([LinkResult("u", error=CachedFailure("u", "not_found"))])
+        self.assertEqual(reply, ["The paper was not found on its source website, please check the link."])
+
+    def test_combined_reply(self):
+        results = [
+            LinkResult("https://arxiv.org/abs/1301.3781", paper=make_paper("1301.3781")),
+            LinkResult("https://example.com/x", error=CachedFailure("x", "unsupported")),
+        ]
+        (reply,) = format_reply(results)
+        self.assertTrue(reply.startswith("1. *Paper*: Paper 1301.3781\n*Author*: Ada Lovelace"))
+        self.assertIn("\n\n2. https://example.com/x\nThis link is not supported", reply)
+
+        messages = format_reply(results * 20, limit=1000)
+        self.assertGreater(len(messages), 1)
+        self.assertTrue(all(len(msg) <= 1000 for msg in messages))
+
+    def test_markdown_escaped(self):
+        paper = Paper(
+            paper_id="content_CVPR_2020/He_Momentum_CVPR_2020_paper",
+            title="*Momentum_Contrast",
+            authors=["Kaiming_He"],
+            pdf_url="https://openaccess.thecvf.com/content_CVPR_2020/papers/He_Momentum_CVPR_2020_paper.pdf",
+        )
+        (reply,) = format_reply([LinkResult("u", paper=paper)])
+        self.assertIn("*Paper*: \\*Momentum\\_Contrast\n", reply)
+        self.assertIn("*Author*: Kaiming\\_He\n", reply)
+        self.assertIn("content\\_CVPR\\_2020/papers/He\\_Momentum", reply)
+
+        results = [LinkResult("https://example.com/a_b", error=CachedFailure("x", "unsupported"))] * 2
+        self.assertIn("1. https://example.com/a\\_b\n", format_reply(results)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import sys
+import time
+import unittest
+import urllib.request
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+import metrics
+from metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    configure_slow_log,
+    set_request_labels,
+    span,
+    start_metrics_server,
+    trace_request,
+)
+
+
+class TestMetrics(unittest.TestCase):
+    def tearDown(self):
+        configure_slow_log(None)
+
+    def test_histogram_render(self):
+        histogram = Histogram("latency_seconds", "Latency.", ["stage"], buckets=[0.1, 1])
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, stage='say "hi"')
+        self.assertEqual(
+            histogram.render(),
+            [
+                "# HELP latency_seconds Latency.",
+                "# TYPE latency_seconds histogram",
+                'latency_seconds_bucket{stage="say \\"hi\\"",le="0.1"} 2',
+                'latency_seconds_bucket{stage="say \\"hi\\"",le="1.0"} 3',
+                'latency_seconds_bucket{stage="say \\"hi\\"",le="+Inf"} 4',
+                'latency_seconds_sum{stage="say \\"hi\\""} 3.65',
+                'latency_seconds_count{stage="say \\"hi\\""} 4',
+            ],
+        )
+
+    def test_spans_and_slow_log(self):
+        slow = []
+        configure_slow_log(0, slow.append)
+        with trace_request("test_handler") as trace:
+            with span("process_url"):
+                pass
+            set_request_labels(src_website="arxiv")
+            with span("get_paper_from_db") as stage:
+                stage.labels["cache"] = "hit"
+            with self.assertRaises(ValueError):
+                with span("scrape"):
+                    raise ValueError("bad page")
+            trace.outcome = "error"
+
+        stage_duration = metrics.stage_duration
+        self.assertGreaterEqual(stage_duration.count(stage="process_url"), 1)
+        self.assertGreaterEqual(
+            stage_duration.count(stage="get_paper_from_db", src_website="arxiv", cache="hit"), 1
+        )
+        self.assertGreaterEqual(metrics.errors_total.value(stage="scrape", error_type="ValueError"), 1)
+        self.assertGreaterEqual(metrics.request_duration.count(handler="test_handler", outcome="error"), 1)
+
+        self.assertEqual(len(slow), 1)
+        self.assertEqual(
+            [(s["stage"], s["src_website"], s["cache"]) for s in slow[0]["stages"]],
+            [("process_url", "", ""), ("get_paper_from_db", "arxiv", "hit"), ("scrape", "arxiv", "")],
+        )
+
+    def test_metrics_server(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("requests_total", "Requests.", ["outcome"]))
+        counter.inc(outcome="ok")
+        server = start_metrics_server(0, metrics_registry=registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('requests_total{outcome="ok"} 1', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
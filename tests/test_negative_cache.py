@@ -0,0 +1,108 @@
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from metrics import registry
+from negative_cache import CachedFailure, NegativeCache, normalize_url
+from url_handlers import MalformedURL, UnsupportedURL
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Upstream404(Exception):
+    error_class = "not_found"
+
+
+class TestNormalizeUrl(unittest.TestCase):
+    def test_equivalent_urls(self):
+        urls = [
+            "https://www.example.org/paper/123/",
+            "http://example.org/paper/123#section-2",
+            "  EXAMPLE.org/paper/123",
+        ]
+        self.assertEqual({normalize_url(url) for url in urls}, {"example.org/paper/123"})
+        self.assertEqual(
+            normalize_url("https://openreview.net/forum?id=H1lj0nNFwB"),
+            "openreview.net/forum?id=H1lj0nNFwB",
+        )
+
+
+class TestNegativeCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = NegativeCache(
+            ttls={"unsupported": 100, "not_found": 10}, max_size=3, timer=self.clock
+        )
+
+    def test_per_class_ttl(self):
+        self.assertTrue(self.cache.put("https://example.org/a", UnsupportedURL()))
+        self.assertTrue(self.cache.put("https://arxiv.org/abs/9999.99999", Upstream404()))
+        # no error class, e.g. a timeout: not cached
+        self.assertFalse(self.cache.put("https://arxiv.org/abs/1301.3781", TimeoutError()))
+
+        self.clock.now = 50
+        self.assertEqual(self.cache.get("example.org/a/"), "unsupported")
+        self.assertIsNone(self.cache.get("https://arxiv.org/abs/9999.99999"))
+        self.assertEqual(self.cache.stats()["size"], 1)
+
+    def test_check_and_hit_counts(self):
+        url = "https://arxiv.org/list/cs.CL/recent"
+        self.cache.put(url, MalformedURL())
+        for _ in range(3):
+            with self.assertRaises(CachedFailure) as ctx:
+                self.cache.check(url)
+        self.assertEqual(ctx.exception.error_class, "malformed")
+        self.cache.put("https://example.org/b", UnsupportedURL())
+        self.cache.check("https://example.org/c")
+
+        self.assertEqual(self.cache.top_hits(), [("arxiv.org/list/cs.CL/recent", "malformed", 3)])
+        self.assertIn('paperbot_negative_cache_hits_total{error_class="malformed"}', registry.render())
+
+    def test_size_cap(self):
+        for i in range(5):
+            self.cache.put(f"https://example.org/{i}", UnsupportedURL())
+        self.assertEqual(len(self.cache), 3)
+        self.assertIsNone(self.cache.get("https://example.org/0"))
+        self.assertEqual(self.cache.get("https://example.org/4"), "unsupported")
+        self.assertEqual(self.cache.stats()["evictions"], 2)
+
+
+class TestGetPaper(unittest.TestCase):
+    def test_unsupported_url_is_not_processed_twice(self):
+        from paper_scraper import get_paper, negative_cache
+
+        url = "https://example.com/not-a-paper"
+        negative_cache.invalidate(url)
+        with self.assertRaises(UnsupportedURL):
+            get_paper(url)
+        with self.assertRaises(CachedFailure):
+            get_paper("http://www.example.com/not-a-paper/")
+        negative_cache.invalidate(url)
+
+    def test_unparseable_url_is_cached_as_malformed(self):
+        from paper_scraper import get_paper, negative_cache
+
+        url = "http://[::1"
+        negative_cache.invalidate(url)
+        with self.assertRaises(MalformedURL):
+            get_paper(url)
+        with self.assertRaises(CachedFailure) as raised:
+            get_paper(url)
+        self.assertEqual(raised.exception.error_class, "malformed")
+        negative_cache.invalidate(url)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+fixtures_dir = project_root / "tests" / "fixtures"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from page_parsers import parse_arxiv_page, parse_cvf_page, parse_openreview_page
+
+
+def load_fixture(name: str) -> str:
+    return (fixtures_dir / name).read_text()
+
+
+class TestPageParsers(unittest.TestCase):
+    def test_parse_arxiv_page(self):
+        result = parse_arxiv_page(load_fixture("arxiv_abs_1301.3781.html"), {})
+        self.assertEqual(
+            result["title"], "Efficient Estimation of Word Representations in Vector Space"
+        )
+        self.assertEqual(
+            result["authors"], ["Tomas Mikolov", "Kai Chen", "Greg Corrado", "Jeffrey Dean"]
+        )
+        self.assertTrue(result["abstract"].strip().startswith("We propose two novel"))
+        self.assertTrue(result["abstract"].strip().endswith("word similarities."))
+        self.assertNotIn("\n", result["abstract"])
+        self.assertEqual(result["comments"], "")
+
+    def test_parse_arxiv_page_with_comments(self):
+        result = parse_arxiv_page(load_fixture("arxiv_abs_1512.03385.html"), {})
+        self.assertEqual(result["title"], "Deep Residual Learning for Image Recognition")
+        self.assertEqual(result["authors"][0], "Kaiming He")
+        self.assertEqual(len(result["authors"]), 4)
+        self.assertEqual(result["comments"], "Tech report")
+
+    def test_parse_cvf_page(self):
+        page = load_fixture("cvf_CVPR_2020_Wang_Dual_Super-Resolution.html")
+        result = parse_cvf_page(page, {})
+        self.assertEqual(
+            result["title"], "Dual Super-Resolution Learning for Semantic Segmentation"
+        )
+        self.assertEqual(
+            result["authors"], ["Li Wang", "Dong Li", "Yousong Zhu", "Lu Tian", "Yi Shan"]
+        )
+        self.assertTrue(result["abstract"].startswith("Current state-of-the-art"))
+        self.assertTrue(result["bibtex"].startswith("@InProceedings{Wang_2020_CVPR,\n"))
+        self.assertTrue(result["bibtex"].endswith("}"))
+        self.assertNotIn("<br", result["bibtex"])
+
+    def test_parse_openreview_page(self):
+        result = parse_openreview_page(load_fixture("openreview_forum_m5Qsh0kBQG.html"), {})
+        self.assertTrue(result["title"].startswith("Deep Symbolic Regression"))
+        self.assertEqual(len(result["authors"]), 6)
+        self.assertIn("symbolic regression", result["keywords"])
+        self.assertTrue(result["tldr"].startswith("A deep learning approach"))
+        self.assertTrue(result["bibtex"].startswith("@inproceedings{"))
+
+    def test_parse_openreview_page_tldr(self):
+        result = parse_openreview_page(load_fixture("openreview_forum_CR1XOQ0UTh-.html"), {})
+        self.assertEqual(result["title"], "Contrastive Learning with Hard Negative Samples")
+        self.assertTrue(result["tldr"].startswith("We develop an unsupervised method"))
+
+    def test_parse_openreview_page_without_regex_match(self):
+        # attribute order the regex does not expect, parsed through the DOM instead
+        page = load_fixture("openreview_forum_m5Qsh0kBQG.html").replace(
+            '<script id="__NEXT_DATA__" type="application/json">',
+            '<script type="application/json" id="__NEXT_DATA__">',
+        )
+        result = parse_openreview_page(page, {})
+        self.assertTrue(result["title"].startswith("Deep Symbolic Regression"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from paper_cache import PaperCache
+from paper_class import Paper
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestPaperCache(unittest.TestCase):
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.cache = PaperCache(max_size=2, ttl=10, timer=self.timer)
+
+    def test_hit_and_miss(self):
+        paper = Paper(paper_id="1301.3781", title="word2vec")
+        self.assertIsNone(self.cache.get("1301.3781"))
+        self.cache.put(paper)
+        self.assertIs(self.cache.get("1301.3781"), paper)
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_ttl_expiry(self):
+        self.cache.put(Paper(paper_id="a"))
+        self.timer.now = 9.9
+        self.assertIsNotNone(self.cache.get("a"))
+        self.timer.now = 10.0
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        self.cache.put(Paper(paper_id="a"))
+        self.cache.put(Paper(paper_id="b"))
+        # touch "a" so that "b" becomes the least recently used
+        self.cache.get("a")
+        self.cache.put(Paper(paper_id="c"))
+        self.assertIn("a", self.cache)
+        self.assertNotIn("b", self.cache)
+        self.assertIn("c", self.cache)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_invalidate(self):
+        self.cache.put(Paper(paper_id="a"))
+        self.assertTrue(self.cache.invalidate("a"))
+        self.assertFalse(self.cache.invalidate("a"))
+        self.assertIsNone(self.cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
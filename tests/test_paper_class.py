@@ -0,0 +1,92 @@
+import json
+import pickle
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from paper_class import FrozenPaper, Paper, UserPaper
+
+_paper_dict = {
+    "paper_id": "1301.3781",
+    "title": "Efficient Estimation of Word Representations in Vector Space",
+    "authors": ["Tomas Mikolov", "Kai Chen"],
+    "keywords": ["word2vec"],
+    "year": "2013",
+    "src_website": "arxiv",
+}
+
+
+class TestPaper(unittest.TestCase):
+    def test_compact_fields(self):
+        paper = Paper.from_dict(_paper_dict)
+        self.assertFalse(hasattr(paper, "__dict__"))
+        self.assertEqual(paper.authors, ("Tomas Mikolov", "Kai Chen"))
+        self.assertEqual(paper.first_author, "Tomas Mikolov")
+        self.assertIs(paper.src_website, Paper(src_website="".join(["ar", "xiv"])).src_website)
+        # defaults are not shared mutable lists
+        self.assertEqual(Paper().authors, ())
+        self.assertEqual(Paper(keywords="").keywords, ())
+
+    def test_dict_round_trip(self):
+        paper = Paper.from_dict(_paper_dict)
+        full = paper.to_dict()
+        self.assertEqual(full["authors"], ["Tomas Mikolov", "Kai Chen"])
+        self.assertEqual(full["first_author"], "Tomas Mikolov")
+        self.assertEqual(json.loads(json.dumps(full)), full)
+        self.assertEqual(Paper.from_dict(full).to_dict(), full)
+        # returned lists are copies
+        full["authors"].append("Greg Corrado")
+        self.assertEqual(len(paper.authors), 2)
+
+    def test_mutable(self):
+        paper = Paper.from_dict(_paper_dict)
+        paper.title = "word2vec"
+        paper.authors = ["Tomas Mikolov"]
+        self.assertEqual(paper.to_dict()["title"], "word2vec")
+        with self.assertRaises(AttributeError):
+            paper.comments = ""
+
+    def test_frozen(self):
+        paper = Paper.from_dict(_paper_dict).freeze()
+        self.assertIsInstance(paper, FrozenPaper)
+        with self.assertRaises(AttributeError):
+            paper.title = "word2vec"
+        with self.assertRaises(AttributeError):
+            del paper.title
+        self.assertEqual(paper, FrozenPaper.from_dict(_paper_dict))
+        self.assertEqual(len({paper, FrozenPaper.from_dict(_paper_dict)}), 1)
+        self.assertEqual(paper.to_dict(), Paper.from_dict(_paper_dict).to_dict())
+
+    def test_pickle(self):
+        for paper in (Paper.from_dict(_paper_dict), FrozenPaper.from_dict(_paper_dict)):
+            restored = pickle.loads(pickle.dumps(paper))
+            self.assertIs(type(restored), type(paper))
+            self.assertEqual(restored.to_dict(), paper.to_dict())
+
+
+class TestUserPaper(unittest.TestCase):
+    def test_labels_and_favorite(self):
+        user_paper = UserPaper(paper_uid="1301.3781")
+        self.assertEqual(UserPaper().labels, ())
+        user_paper.add_label("to-read")
+        user_paper.add_label("to-read")
+        user_paper.add_label("nlp")
+        self.assertEqual(user_paper.labels, ("to-read", "nlp"))
+        user_paper.remove_label("to-read")
+        self.assertEqual(user_paper.to_dict()["labels"], ["nlp"])
+
+        user_paper.mark_favorite()
+        self.assertTrue(user_paper.favorite)
+        user_paper.toggle_favorite()
+        self.assertFalse(user_paper.favorite)
+        self.assertFalse(UserPaper.from_dict(user_paper.to_dict()).favorite)
+
+
+if __name__ == "__main__":
+    unittest.main()
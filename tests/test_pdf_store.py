@@ -0,0 +1,94 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from pdf_store import PdfStore
+
+CVF_ID = "content_CVPR_2020/html/Kim_Advisable_Learning_CVPR_2020_paper"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        self.now += 1
+        return self.now
+
+
+class TestPdfStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name)
+        self.store = PdfStore(self.root / "papers", quota_bytes=300, timer=FakeClock())
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def write(self, name: str, content: bytes) -> Path:
+        filepath = self.root / name
+        filepath.write_bytes(content)
+        return filepath
+
+    def test_sharded_and_deduplicated(self):
+        content = b"%PDF-1.4 resnet" + b"." * 85
+        path = self.store.put_file("1512.03385", self.write("a.pdf", content))
+        self.assertEqual(path.parent.parent.parent, self.store.objects_dir)
+        self.assertEqual(path.read_bytes(), content)
+
+        # same file under a CVF id with slashes
+        self.assertEqual(self.store.put_file(CVF_ID, self.write("b.pdf", content)), path)
+        self.assertFalse((self.root / "b.pdf").exists())
+        self.assertEqual(self.store.get(CVF_ID), path)
+        stats = self.store.stats()
+        self.assertEqual((stats["papers"], stats["files"], stats["bytes"]), (2, 1, 100))
+        self.assertEqual(stats["deduplicated"], 1)
+
+        # shared file stays until its last paper is removed
+        self.assertTrue(self.store.remove("1512.03385"))
+        self.assertTrue(path.is_file())
+        self.store.remove(CVF_ID)
+        self.assertFalse(path.is_file())
+
+    def test_lru_eviction(self):
+        for i in range(3):
+            self.store.put_file(f"p{i}", self.write(f"{i}.pdf", b"%PDF" + bytes([i]) * 96))
+        self.store.get("p0")  # p1 is now the least recently used
+        self.store.put_file("p3", self.write("3.pdf", b"%PDF" + b"3" * 96))
+
+        self.assertNotIn("p1", self.store)
+        self.assertIsNone(self.store.get("p1"))
+        for paper_id in ("p0", "p2", "p3"):
+            self.assertIsNotNone(self.store.get(paper_id))
+        self.assertLessEqual(self.store.total_size(), 300)
+        self.assertEqual(self.store.stats()["evicted"], 1)
+
+    def test_missing_file_and_import(self):
+        legacy_dir = self.root / "legacy"
+        legacy_dir.mkdir()
+        (legacy_dir / "1301.3781.pdf").write_bytes(b"%PDF word2vec")
+        self.assertEqual(self.store.import_dir(legacy_dir), 1)
+        path = self.store.get("1301.3781")
+        self.assertEqual(path.read_bytes(), b"%PDF word2vec")
+
+        path.unlink()
+        self.assertIsNone(self.store.get("1301.3781"))
+        self.assertEqual(self.store.stats()["files"], 0)
+
+    def test_manifest_persists(self):
+        self.store.put_file("1512.03385", self.write("a.pdf", b"%PDF resnet"))
+        self.store.close()
+        self.store = PdfStore(self.root / "papers")
+        self.assertEqual(self.store.get("1512.03385").read_bytes(), b"%PDF resnet")
+
+
+if __name__ == "__main__":
+    unittest.main()
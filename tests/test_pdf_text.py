@@ -0,0 +1,114 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from pdf_text import PYPDF_AVAILABLE, PdfTextCache, PdfTextExtractor, _ExtractionWorker, find_headings
+
+
+def write_pdf(filepath: Path, pages: list) -> None:
+    """
+    Write a minimal PDF with one line of Helvetica text per string in `pages`
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = "".join(f"BT /F1 12 Tf 72 {720 - 20 * i} Td ({line}) Tj ET\n" for i, line in enumerate(lines))
+        objects.append(f"<< /Length {len(ops)} >>\nstream\n{ops}endstream")
+        kids.append(len(objects) + 1)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for num, obj in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += f"{num} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    filepath.write_bytes(data)
+
+
+class TestFindHeadings(unittest.TestCase):
+    def test_find_headings(self):
+        page = "Abstract\nWe propose a model.\n1. Introduction\n3.2. Cross-Modal Progressive Comprehension\n2 of 10"
+        self.assertEqual(
+            find_headings(page),
+            ["Abstract", "1. Introduction", "3.2. Cross-Modal Progressive Comprehension"],
+        )
+
+
+@unittest.skipUnless(PYPDF_AVAILABLE, "pypdf is not installed")
+class TestPdfTextExtractor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.papers_dir = Path(self.tmp_dir.name) / "papers"
+        self.papers_dir.mkdir()
+        write_pdf(self.papers_dir / "1301.3781.pdf", [["Abstract", "word vectors"], ["1. Introduction", "skip-gram"]])
+        write_pdf(self.papers_dir / "1512.03385.pdf", [["Deep Residual Learning"]])
+        self.cache = PdfTextCache(Path(self.tmp_dir.name) / "pdf_text.sqlite3")
+        self.extractor = PdfTextExtractor(self.cache, max_workers=2)
+
+    def tearDown(self):
+        self.extractor.shutdown()
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_update_dir(self):
+        stats = self.extractor.update_dir(self.papers_dir)
+        self.assertEqual(stats, {"extracted": 2, "skipped": 0, "failed": 0})
+
+        cached = self.cache.get("1301.3781")
+        self.assertEqual(cached["num_pages"], 2)
+        self.assertEqual(cached["headings"], ["Abstract", "1. Introduction"])
+        self.assertIn("skip-gram", cached["pages"][1])
+        self.assertIn("Deep Residual Learning", self.cache.get_text("1512.03385"))
+
+        # unchanged files are skipped, even when touched
+        os.utime(self.papers_dir / "1512.03385.pdf", ns=(1, 1))
+        stats = self.extractor.update_dir(self.papers_dir)
+        self.assertEqual(stats, {"extracted": 0, "skipped": 2, "failed": 0})
+
+        # replaced files are extracted again
+        write_pdf(self.papers_dir / "1512.03385.pdf", [["Identity Mappings"]])
+        stats = self.extractor.update_dir(self.papers_dir)
+        self.assertEqual(stats, {"extracted": 1, "skipped": 1, "failed": 0})
+        self.assertIn("Identity Mappings", self.cache.get_text("1512.03385"))
+
+    def test_worker_process(self):
+        worker = _ExtractionWorker()
+        try:
+            result = worker.extract(str(self.papers_dir / "1301.3781.pdf"))
+            self.assertEqual(result["num_pages"], 2)
+            self.assertEqual(result["headings"], ["Abstract", "1. Introduction"])
+
+            # a failed extraction does not take the worker down
+            (self.papers_dir / "broken.pdf").write_bytes(b"%PDF-1.4 truncated")
+            with self.assertRaises(Exception):
+                worker.extract(str(self.papers_dir / "broken.pdf"))
+            result = worker.extract(str(self.papers_dir / "1512.03385.pdf"))
+            self.assertEqual(result["num_pages"], 1)
+        finally:
+            worker.close()
+
+    def test_broken_pdf(self):
+        (self.papers_dir / "broken.pdf").write_bytes(b"%PDF-1.4 truncated")
+        stats = self.extractor.update_dir(self.papers_dir)
+        self.assertEqual(stats["failed"], 1)
+        self.assertIsNone(self.cache.get("broken"))
+
+
+if __name__ == "__main__":
+    unittest.main()
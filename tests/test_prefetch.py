@@ -0,0 +1,59 @@
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from paper_class import Paper
+from prefetch import PrefetchPool
+
+
+class TestPrefetchPool(unittest.TestCase):
+    def test_dedup_and_drain(self):
+        release = threading.Event()
+        fetched = []
+
+        def fetch(paper):
+            release.wait()
+            fetched.append(paper.paper_id)
+
+        pool = PrefetchPool(fetch, num_workers=1)
+        self.assertTrue(pool.submit(Paper(paper_id="a")))
+        self.assertFalse(pool.submit(Paper(paper_id="a")))
+        self.assertTrue(pool.submit(Paper(paper_id="b")))
+        release.set()
+        pool.shutdown(drain=True, timeout=5)
+
+        self.assertEqual(fetched, ["a", "b"])
+        self.assertFalse(pool.submit(Paper(paper_id="c")))
+        stats = pool.stats()
+        self.assertEqual(stats["completed"], 2)
+        self.assertEqual(stats["deduplicated"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_retry_with_backoff(self):
+        attempts = []
+
+        def fetch(paper):
+            attempts.append(paper.paper_id)
+            if len(attempts) < 3:
+                raise Exception("upstream error")
+
+        pool = PrefetchPool(fetch, num_workers=1, max_retries=3, backoff_base=0.001)
+        pool.submit(Paper(paper_id="a"))
+        pool.shutdown(drain=True, timeout=5)
+
+        self.assertEqual(len(attempts), 3)
+        stats = pool.stats()
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["failed"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from metrics import registry
+from rate_limit import RateLimiter, RateLimitExceeded, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=3, timer=clock)
+        self.assertEqual([bucket.reserve(0) for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertIsNone(bucket.reserve(0))
+        # queued reservations are served in order, half a second apart
+        self.assertEqual(bucket.reserve(10), 0.5)
+        self.assertEqual(bucket.reserve(10), 1.0)
+        self.assertIsNone(bucket.reserve(1.2))
+        clock.now += 10
+        self.assertEqual(bucket.tokens, 3)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def make_limiter(self, **kwargs) -> RateLimiter:
+        return RateLimiter(timer=self.clock, sleep=self.clock.sleep, **kwargs)
+
+    def test_queued_admission_and_rejection(self):
+        limiter = self.make_limiter(name="test_chat", rate=1, burst=2, max_wait=2)
+        self.assertEqual(limiter.acquire("chat-1"), 0)
+        self.assertEqual(limiter.acquire("chat-1"), 0)
+        self.assertEqual(limiter.acquire("chat-1"), 1)
+        self.assertEqual(limiter.acquire("chat-1"), 2)
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.acquire("chat-1")
+        self.assertEqual(ctx.exception.wait, 3)
+        self.assertEqual(self.clock.slept, [1, 2])
+        # other keys have their own bucket
+        self.assertEqual(limiter.acquire("chat-2"), 0)
+
+    def test_refuse_without_waiting(self):
+        limiter = self.make_limiter(name="test_refuse", rate=0.2, burst=5, max_wait=0)
+        for _ in range(5):
+            self.assertEqual(limiter.acquire("chat-1"), 0)
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            limiter.acquire("chat-1")
+        self.assertEqual(ctx.exception.wait, 5)
+        self.assertEqual(self.clock.slept, [])
+
+    def test_per_key_limits_and_metrics(self):
+        limiter = self.make_limiter(
+            name="test_source",
+            rate=1,
+            burst=1,
+            limits={"arxiv": {"rate": 10, "burst": 3}},
+            export_keys=True,
+        )
+        for _ in range(3):
+            self.assertEqual(limiter.acquire("arxiv"), 0)
+        self.assertAlmostEqual(limiter.acquire("arxiv"), 0.1)
+        self.assertEqual(limiter.stats(), {"arxiv": -1})
+
+        text = registry.render()
+        self.assertIn('paperbot_rate_limit_tokens{limiter="test_source",key="arxiv"} -1', text)
+        self.assertIn('paperbot_rate_limit_total{limiter="test_source",outcome="delayed"} 1', text)
+        self.assertIn('paperbot_rate_limit_wait_seconds_count{limiter="test_source"} 4', text)
+
+    def test_configure(self):
+        limiter = self.make_limiter(name="test_configure", rate=1, burst=1, max_wait=0)
+        limiter.acquire("a")
+        limiter.configure(burst=2, limits={"b": {"burst": 5}})
+        limiter.acquire("a")
+        limiter.acquire("a")
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire("a")
+        for _ in range(5):
+            limiter.acquire("b")
+
+
+if __name__ == "__main__":
+    unittest.main()
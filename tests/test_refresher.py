@@ -0,0 +1,85 @@
+import sys
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from paper_class import Paper
+from refresher import DAY, FreshnessPolicy, PaperRefresher
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000 * DAY):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestFreshnessPolicy(unittest.TestCase):
+    def test_per_source_max_age(self):
+        clock = FakeClock()
+        policy = FreshnessPolicy({"arxiv": DAY}, default_max_age=10 * DAY, timer=clock)
+        arxiv = Paper(paper_id="a", src_website="arxiv", fetched_at=clock.now - 2 * DAY)
+        other = Paper(paper_id="b", src_website="acl", fetched_at=clock.now - 2 * DAY)
+        self.assertTrue(policy.is_stale(arxiv))
+        self.assertFalse(policy.is_stale(other))
+        # stored before fetched_at was recorded
+        self.assertTrue(policy.is_stale(Paper(paper_id="c", src_website="cvf")))
+        self.assertEqual(policy.max_age_for("openreview"), DAY)
+
+
+class TestPaperRefresher(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.refreshed = []
+        self.stored = {}
+        self.refresher = PaperRefresher(
+            self.refreshed.append, load=self.stored.get, max_per_sweep=2, timer=self.clock
+        )
+
+    def tearDown(self):
+        self.refresher.shutdown(timeout=5)
+
+    def store(self, paper_id: str, age: float) -> Paper:
+        paper = Paper(paper_id=paper_id, src_website="arxiv", fetched_at=self.clock.now - age)
+        self.stored[paper_id] = paper
+        return paper
+
+    def drain(self):
+        self.refresher.shutdown(drain=True, timeout=5)
+
+    def test_touch_refreshes_stale_only(self):
+        fresh = self.store("fresh", age=60)
+        stale = self.store("stale", age=30 * DAY)
+        self.assertFalse(self.refresher.touch(fresh))
+        self.assertTrue(self.refresher.touch(stale))
+        # not retried right after an attempt
+        self.assertFalse(self.refresher.touch(stale))
+        self.drain()
+        self.assertEqual([p.paper_id for p in self.refreshed], ["stale"])
+        stats = self.refresher.stats()
+        self.assertEqual(stats["stale_hits"], 2)
+        self.assertEqual(stats["refreshed"], 1)
+
+    def test_sweep_most_requested_first(self):
+        for paper_id, requests in (("a", 1), ("b", 5), ("c", 3), ("d", 4)):
+            paper = self.store(paper_id, age=60)
+            for _ in range(requests):
+                self.refresher.touch(paper)
+        self.clock.now += 30 * DAY
+        self.store("d", age=0)  # refreshed elsewhere in the meantime
+
+        self.assertEqual(self.refresher.sweep(), 2)
+        self.assertEqual(self.refresher.sweep(), 1)
+        self.assertEqual(self.refresher.sweep(), 0)
+        self.drain()
+        self.assertEqual([p.paper_id for p in self.refreshed], ["b", "c", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
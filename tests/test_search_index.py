@@ -0,0 +1,111 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from paper_class import Paper
+from search_index import SearchIndex, tokenize
+
+_papers = [
+    Paper(
+        paper_id="1301.3781",
+        title="Efficient Estimation of Word Representations in Vector Space",
+        authors=["Tomas Mikolov", "Kai Chen"],
+        abstract="We propose two novel model architectures for computing continuous vector representations of words.",
+    ),
+    Paper(
+        paper_id="1512.03385",
+        title="Deep Residual Learning for Image Recognition",
+        authors=["Kaiming He", "Xiangyu Zhang"],
+        abstract="Deeper neural networks are more difficult to train. We present a residual learning framework.",
+    ),
+    Paper(
+        paper_id="1706.03762",
+        title="Attention Is All You Need",
+        authors=["Ashish Vaswani"],
+        abstract="We propose a new simple network architecture, the Transformer, based solely on attention.",
+        keywords=["transformer", "attention"],
+    ),
+]
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp_dir.name) / "search_index.sqlite3"
+        self.index = SearchIndex(self.db_path)
+        for paper in _papers:
+            self.index.add_paper("alice", paper)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Deep Residual Networks, for images!"), ["deep", "residual", "network", "image"])
+        self.assertEqual(tokenize("the a of"), [])
+
+    def test_ranking(self):
+        results = self.index.search("alice", "residual networks")
+        self.assertEqual(results[0][0], "1512.03385")
+        # title and keyword matches rank above a mention in the abstract
+        results = self.index.search("alice", "transformer network")
+        self.assertEqual([paper_id for paper_id, _ in results][0], "1706.03762")
+        self.assertEqual(self.index.search("alice", "mikolov")[0][0], "1301.3781")
+        self.assertEqual(self.index.search("alice", "quantum"), [])
+
+    def test_scoped_per_user(self):
+        self.assertEqual(self.index.search("bob", "attention"), [])
+        self.index.add_paper("bob", _papers[0])
+        self.assertEqual(self.index.size("bob"), 1)
+        self.assertEqual(self.index.search("bob", "attention"), [])
+        self.assertEqual(self.index.size("alice"), 3)
+
+    def test_reindex_and_remove(self):
+        paper = Paper(paper_id="1706.03762", title="Transformers")
+        self.index.add_paper("alice", paper)
+        self.assertEqual(self.index.size("alice"), 3)
+        self.assertEqual(self.index.search("alice", "vaswani"), [])
+
+        self.assertTrue(self.index.remove_paper("alice", "1706.03762"))
+        self.assertFalse(self.index.remove_paper("alice", "1706.03762"))
+        self.assertEqual(self.index.size("alice"), 2)
+        self.assertEqual(self.index.search("alice", "transformer"), [])
+
+    def test_update_paper(self):
+        self.index.add_paper("bob", _papers[2])
+        refreshed = Paper(paper_id="1706.03762", title="Transformers", authors=["Ashish Vaswani"])
+        self.assertEqual(self.index.update_paper(refreshed), 2)
+        for username in ("alice", "bob"):
+            self.assertEqual(self.index.search(username, "attention"), [])
+            self.assertEqual(self.index.search(username, "transformers")[0][0], "1706.03762")
+        self.assertEqual(self.index.size("alice"), 3)
+        self.assertEqual(self.index.update_paper(Paper(paper_id="0000.00000")), 0)
+
+    def test_backfill_marker(self):
+        # having papers indexed does not mean the old library was
+        self.assertFalse(self.index.is_backfilled("alice"))
+        self.index.mark_backfilled("alice")
+        self.index.mark_backfilled("alice")
+        # also kept for users with an empty library
+        self.index.mark_backfilled("carol")
+        self.index.close()
+        self.index = SearchIndex(self.db_path)
+        self.assertTrue(self.index.is_backfilled("alice"))
+        self.assertTrue(self.index.is_backfilled("carol"))
+        self.assertFalse(self.index.is_backfilled("bob"))
+
+    def test_persisted(self):
+        self.index.close()
+        self.index = SearchIndex(self.db_path)
+        self.assertEqual(self.index.search("alice", "word vector")[0][0], "1301.3781")
+
+
+if __name__ == "__main__":
+    unittest.main()
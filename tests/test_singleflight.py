@@ -0,0 +1,75 @@
+import sys
+import threading
+import time
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def run_burst(self, flight: SingleFlight, fn, n: int = 8, timeout=None):
+        results, errors = [], []
+        barrier = threading.Barrier(n)
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(flight.do("1301.3781", fn, timeout=timeout))
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=worker) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        return results, errors
+
+    def test_burst_runs_once(self):
+        flight = SingleFlight()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return "paper"
+
+        results, errors = self.run_burst(flight, fetch)
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, ["paper"] * 8)
+        self.assertEqual(errors, [])
+        self.assertEqual(flight.coalesced, 7)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_error_propagates_to_waiters(self):
+        def fetch():
+            time.sleep(0.1)
+            raise ValueError("Cannot connect")
+
+        results, errors = self.run_burst(SingleFlight(), fetch)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 8)
+        self.assertTrue(all(isinstance(err, ValueError) for err in errors))
+
+    def test_waiter_timeout(self):
+        release = threading.Event()
+        results, errors = self.run_burst(SingleFlight(), lambda: release.wait(2), n=3, timeout=0.05)
+        release.set()
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(isinstance(err, TimeoutError) for err in errors))
+
+    def test_sequential_calls_run_again(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("a", lambda: 1), 1)
+        self.assertEqual(flight.do("a", lambda: 2), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
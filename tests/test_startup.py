@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+
+HEAVY_MODULES = ["firebase_admin", "google.cloud", "bs4", "requests", "lxml", "pypdf"]
+
+
+def modules_loaded_by(module: str) -> list:
+    """
+    Import `module` in a fresh interpreter, return the heavy modules it loaded
+    """
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=tmp_dir,
+            env=dict(os.environ, PYTHONPATH=str(src_dir)),
+            capture_output=True,
+            text=True,
+        )
+    if proc.returncode != 0:
+        raise Exception(proc.stderr)
+    return json.loads(proc.stdout)
+
+
+class TestStartup(unittest.TestCase):
+    def test_lazy_imports(self):
+        for module in ["constants", "page_parsers", "http_client", "datautils", "paper_scraper"]:
+            with self.subTest(module=module):
+                self.assertEqual(modules_loaded_by(module), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from fake_firestore import FakeFirestore
+from paper_class import Paper
+from storage import FirestoreStorage, SQLiteStorage, StorageBackend
+
+_profile = {
+    "username": "alice",
+    "first_name": "Alice",
+    "last_name": "",
+    "user_createdAt": 1610000000,
+    "papers": {},
+}
+
+
+class TestStorageBackend(unittest.TestCase):
+    def test_incomplete_backend(self):
+        class PaperOnlyStorage(StorageBackend):
+            def get_paper(self, paper_id):
+                return None
+
+        with self.assertRaises(TypeError):
+            PaperOnlyStorage()
+
+
+class TestSQLiteStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.storage = SQLiteStorage(Path(self.tmp_dir.name) / "paperbot.sqlite3")
+
+    def tearDown(self):
+        self.storage.close()
+        self.tmp_dir.cleanup()
+
+    def test_wal_mode(self):
+        mode = self.storage._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_paper_get_put(self):
+        paper = Paper(
+            paper_id="1301.3781",
+            title="Efficient Estimation of Word Representations in Vector Space",
+            authors=["Tomas Mikolov", "Kai Chen"],
+            src_website="arxiv",
+        )
+        self.assertIsNone(self.storage.get_paper("1301.3781"))
+        self.assertTrue(self.storage.put_paper(paper))
+        self.assertFalse(self.storage.put_paper(paper))
+
+        stored = self.storage.get_paper("1301.3781")
+        self.assertEqual(stored.to_dict(), paper.to_dict())
+
+        paper.title = "word2vec"
+        self.assertTrue(self.storage.put_paper(paper, overwrite=True))
+        self.assertEqual(self.storage.get_paper("1301.3781").title, "word2vec")
+
+    def test_get_papers(self):
+        for paper_id in ("1301.3781", "1706.03762"):
+            self.storage.put_paper(Paper(paper_id=paper_id, src_website="arxiv"))
+        papers = self.storage.get_papers(["1301.3781", "1706.03762", "0000.00000"])
+        self.assertEqual(sorted(papers), ["1301.3781", "1706.03762"])
+        self.assertEqual(papers["1706.03762"].paper_id, "1706.03762")
+        self.assertEqual(self.storage.get_papers([]), {})
+
+    def test_iter_papers(self):
+        paper_ids = [f"2101.{i:05d}" for i in range(7)]
+        for paper_id in reversed(paper_ids):
+            self.storage.put_paper(Paper(paper_id=paper_id))
+        streamed = [paper.paper_id for paper in self.storage.iter_papers(batch_size=3)]
+        self.assertEqual(streamed, paper_ids)
+
+    def test_user_library(self):
+        self.assertIsNone(self.storage.get_user("alice"))
+        self.assertTrue(self.storage.create_user(dict(_profile)))
+        self.assertFalse(self.storage.create_user(dict(_profile)))
+
+        entry = {"paper_id": "1301.3781", "added_at": 1610000001, "labels": [], "notes": []}
+        self.assertTrue(self.storage.add_paper_to_user("alice", entry))
+        self.assertFalse(self.storage.add_paper_to_user("alice", entry))
+        self.assertTrue(self.storage.user_has_paper("alice", "1301.3781"))
+        self.assertFalse(self.storage.user_has_paper("alice", "1706.03762"))
+
+        profile = self.storage.get_user("alice")
+        self.assertEqual(profile["first_name"], "Alice")
+        self.assertEqual(profile["papers"], {"1301.3781": entry})
+
+    def test_iter_user_papers(self):
+        self.assertFalse(self.storage.user_exists("alice"))
+        self.storage.create_user(dict(_profile))
+        self.assertTrue(self.storage.user_exists("alice"))
+        paper_ids = [f"2101.{i:05d}" for i in range(25)]
+        for paper_id in paper_ids:
+            self.storage.add_paper_to_user("alice", {"paper_id": paper_id, "added_at": 0})
+
+        entries = list(self.storage.iter_user_papers("alice", batch_size=10))
+        self.assertEqual([entry["paper_id"] for entry in entries], paper_ids)
+        self.assertEqual(entries[0]["labels"], [])
+
+
+class TestFirestoreStorage(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeFirestore()
+        self.storage = FirestoreStorage(self.client)
+
+    def test_paper_ids_with_slashes(self):
+        paper_ids = ["content_CVPR_2020/He_Momentum_Contrast_CVPR_2020_paper", "hep-th/9901001"]
+        for paper_id in paper_ids:
+            self.assertIsNone(self.storage.get_paper(paper_id))
+            self.assertTrue(self.storage.put_paper(Paper(paper_id=paper_id, title="v1")))
+            self.assertFalse(self.storage.put_paper(Paper(paper_id=paper_id, title="v2")))
+            self.assertEqual(self.storage.get_paper(paper_id).title, "v1")
+            self.assertTrue(self.storage.put_paper(Paper(paper_id=paper_id, title="v2"), overwrite=True))
+            self.assertEqual(self.storage.get_paper(paper_id).paper_id, paper_id)
+
+        papers = self.storage.get_papers(paper_ids + ["0000.00000"])
+        self.assertEqual(sorted(papers), sorted(paper_ids))
+        self.assertEqual(papers["hep-th/9901001"].title, "v2")
+        # one flat document each, the raw paper_id is kept in the body
+        stored = {path: data["paper_id"] for path, data in self.client.docs.items()}
+        self.assertEqual(
+            stored,
+            {
+                ("papers", "content_CVPR_2020%2FHe_Momentum_Contrast_CVPR_2020_paper"): paper_ids[0],
+                ("papers", "hep-th%2F9901001"): paper_ids[1],
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,7 +10,14 @@ src_dir = project_root / "src"
 # add src into path
 sys.path.insert(0, str(src_dir))
 
-from url_handlers import process_arxiv_url, process_cvf_url, process_openreview_url
+from url_handlers import (
+    legacy_paper_id,
+    process_arxiv_url,
+    process_cvf_url,
+    process_openreview_url,
+    process_url,
+    process_urls,
+)
 
 _arxiv_urls = [
     "https://arxiv.org/abs/1405.4053",
@@ -29,5 +36,105 @@ class TestUrlHandlers(unittest.TestCase):
             self.assertEqual(response.status_code, 200)
 
 
+class TestUrlRouter(unittest.TestCase):
+    """
+    Offline checks of URL classification and paper_id normalization
+    """
+
+    def assertArxiv(self, url: str, paper_id: str):
+        result = process_url(url)
+        self.assertEqual(result["src_website"], "arxiv")
+        self.assertEqual(result["paper_id"], paper_id)
+        self.assertEqual(result["paper_url"], f"https://arxiv.org/abs/{paper_id}")
+        self.assertEqual(result["pdf_url"], f"https://arxiv.org/pdf/{paper_id}.pdf")
+
+    def test_arxiv_variants(self):
+        for url in (
+            "https://arxiv.org/abs/2101.05709",
+            "http://arxiv.org/abs/2101.05709v2",
+            "https://www.arxiv.org/abs/2101.05709/",
+            "https://export.arxiv.org/abs/2101.05709",
+            "https://arxiv.org/abs/2101.05709?context=cs.LG",
+            "https://arxiv.org/abs/2101.05709v3#references",
+            "https://arxiv.org/pdf/2101.05709.pdf",
+            "https://arxiv.org/pdf/2101.05709v1",
+            "arxiv.org/abs/2101.05709",
+            "  https://arxiv.org/abs/2101.05709  ",
+        ):
+            with self.subTest(url=url):
+                self.assertArxiv(url, "2101.05709")
+
+    def test_arxiv_old_style_ids(self):
+        self.assertArxiv("https://arxiv.org/abs/hep-th/9901001", "hep-th/9901001")
+        self.assertArxiv("https://arxiv.org/pdf/hep-th/9901001v2.pdf", "hep-th/9901001")
+        self.assertArxiv("https://arxiv.org/abs/math.GT/0309136", "math.GT/0309136")
+
+    def test_cvf(self):
+        name = "Wang_Dual_Super-Resolution_Learning_for_Semantic_Segmentation_CVPR_2020_paper"
+        paper_id = f"content_CVPR_2020/{name}"
+        for url in (
+            f"https://openaccess.thecvf.com/content_CVPR_2020/html/{name}.html",
+            f"http://openaccess.thecvf.com/content_CVPR_2020/papers/{name}.pdf",
+        ):
+            with self.subTest(url=url):
+                result = process_url(url)
+                self.assertEqual(result["src_website"], "cvf")
+                self.assertEqual(result["paper_id"], paper_id)
+                self.assertEqual(
+                    result["pdf_url"],
+                    f"https://openaccess.thecvf.com/content_CVPR_2020/papers/{name}.pdf",
+                )
+        paper_id, _, _ = process_cvf_url(
+            "https://openaccess.thecvf.com/content/CVPR2021/html/Chen_Example_CVPR_2021_paper.html"
+        )
+        self.assertEqual(paper_id, "content/CVPR2021/Chen_Example_CVPR_2021_paper")
+
+    def test_openreview(self):
+        for url in (
+            "https://openreview.net/forum?id=H1lj0nNFwB",
+            "https://openreview.net/pdf?id=H1lj0nNFwB",
+            "https://openreview.net/forum?id=H1lj0nNFwB&noteId=rkxyz",
+            "https://www.openreview.net/forum?noteId=rkxyz&id=H1lj0nNFwB",
+        ):
+            with self.subTest(url=url):
+                paper_id, paper_url, pdf_url = process_openreview_url(url)
+                self.assertEqual(paper_id, "H1lj0nNFwB")
+                self.assertEqual(paper_url, "https://openreview.net/forum?id=H1lj0nNFwB")
+                self.assertEqual(pdf_url, "https://openreview.net/pdf?id=H1lj0nNFwB")
+
+    def test_unsupported(self):
+        for url in (
+            "https://example.com/abs/2101.05709",
+            "https://arxiv.org/list/cs.CL/recent",
+            "https://openreview.net/group?id=ICLR.cc",
+            "not a url",
+        ):
+            with self.subTest(url=url):
+                with self.assertRaises(Exception):
+                    process_url(url)
+
+    def test_legacy_paper_id(self):
+        self.assertEqual(legacy_paper_id("https://arxiv.org/abs/1706.03762v2"), "1706.03762v2")
+        self.assertEqual(legacy_paper_id("https://arxiv.org/pdf/1706.03762v5.pdf"), "1706.03762v5")
+        self.assertEqual(legacy_paper_id("https://arxiv.org/abs/hep-th/9901001"), "9901001")
+        # unchanged ids, other sources and unsupported links
+        self.assertIsNone(legacy_paper_id("https://arxiv.org/abs/1706.03762"))
+        self.assertIsNone(legacy_paper_id("https://openreview.net/forum?id=nlAxjsniDzg"))
+        self.assertIsNone(legacy_paper_id("https://example.com/1706.03762v2"))
+
+    def test_process_urls(self):
+        results = process_urls(
+            [
+                "https://arxiv.org/abs/1301.3781",
+                "https://example.com/",
+                "https://arxiv.org/abs/1301.3781",
+            ]
+        )
+        self.assertEqual(results[0]["paper_id"], "1301.3781")
+        self.assertIsNone(results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertIsNot(results[0], results[2])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,71 @@
+import gzip
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from visit_log import VisitLogger
+
+
+def read_jsonl(fp: Path) -> list:
+    return [json.loads(line) for line in fp.read_text().splitlines()]
+
+
+class TestVisitLogger(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_fp = Path(self.tmp_dir.name) / "user_visit_history.jsonl"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_flush_and_close(self):
+        visit_logger = VisitLogger(self.log_fp, flush_every=1000, flush_interval=60)
+        for i in range(3):
+            visit_logger.log({"chat_id": i, "command": "/start"})
+        self.assertTrue(visit_logger.flush(timeout=5))
+        self.assertEqual([r["chat_id"] for r in read_jsonl(self.log_fp)], [0, 1, 2])
+
+        visit_logger.log({"chat_id": 3, "command": "/help"})
+        visit_logger.close()
+        self.assertEqual(len(read_jsonl(self.log_fp)), 4)
+        # records after close are ignored
+        visit_logger.log({"chat_id": 4})
+        self.assertEqual(len(read_jsonl(self.log_fp)), 4)
+
+    def test_flush_interval(self):
+        visit_logger = VisitLogger(self.log_fp, flush_every=1000, flush_interval=0.01)
+        visit_logger.log({"chat_id": 1})
+        for _ in range(500):
+            if self.log_fp.is_file() and self.log_fp.stat().st_size:
+                break
+            visit_logger._writer.join(0.01)
+        self.assertEqual(read_jsonl(self.log_fp), [{"chat_id": 1}])
+        visit_logger.close()
+
+    def test_rotate_by_size(self):
+        visit_logger = VisitLogger(self.log_fp, flush_every=1, max_bytes=200, compress=True)
+        for i in range(20):
+            visit_logger.log({"chat_id": i, "command": "respond_paper_info_from_url"})
+        visit_logger.close()
+
+        rotated = sorted(Path(self.tmp_dir.name).glob("user_visit_history.*.jsonl.gz"))
+        self.assertTrue(rotated)
+        self.assertLessEqual(self.log_fp.stat().st_size, 200)
+        records = []
+        for fp in rotated:
+            with gzip.open(fp, "rt") as f:
+                records.extend(json.loads(line) for line in f)
+        records.extend(read_jsonl(self.log_fp))
+        self.assertEqual(sorted(r["chat_id"] for r in records), list(range(20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import http.client
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+# get project root
+project_root: Path = Path(__file__).resolve().parent.parent
+src_dir = project_root / "src"
+fixtures_dir = project_root / "tests" / "fixtures"
+# add src into path
+sys.path.insert(0, str(src_dir))
+
+from webhook import WebhookServer
+
+_update = (fixtures_dir / "telegram_update_url.json").read_bytes()
+
+
+class TestWebhookServer(unittest.TestCase):
+    def setUp(self):
+        self.received = []
+        self.release = threading.Event()
+        self.release.set()
+
+        def handle_update(update):
+            self.release.wait(5)
+            self.received.append(update)
+
+        self.server = WebhookServer(
+            handle_update, secret_token="s3cret", port=0, num_workers=1, max_queue_size=2
+        )
+        self.server.start()
+
+    def tearDown(self):
+        self.release.set()
+        self.server.stop(timeout=5)
+
+    def post(self, body: bytes = _update, token: str = "s3cret", path: str = "/telegram", conn=None):
+        conn = conn or http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        headers = {"Content-Type": "application/json"}
+        if token is not None:
+            headers["X-Telegram-Bot-Api-Secret-Token"] = token
+        conn.request("POST", path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    def test_dispatch_recorded_update(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        # several updates over one keep-alive connection
+        for _ in range(3):
+            self.assertEqual(self.post(conn=conn), 200)
+        conn.close()
+        self.server.stop(drain=True, timeout=5)
+        self.assertEqual(len(self.received), 3)
+        self.assertEqual(self.received[0]["message"]["text"], "https://arxiv.org/abs/1301.3781")
+        self.assertEqual(self.server.stats()["processed"], 3)
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.post(token=None), 403)
+        self.assertEqual(self.post(token="wrong"), 403)
+        self.assertEqual(self.post(path="/other"), 404)
+        self.assertEqual(self.post(body=b"not json"), 400)
+        self.assertEqual(self.server.stats()["rejected"], 2)
+
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        conn.request("GET", "/healthz")
+        self.assertEqual(conn.getresponse().status, 200)
+        conn.close()
+        self.assertEqual(self.received, [])
+
+    def test_full_queue(self):
+        self.release.clear()
+        self.assertEqual(self.post(), 200)
+        # wait for the worker to pick it up and block
+        for _ in range(500):
+            if self.server.stats()["queue_depth"] == 0:
+                break
+            threading.Event().wait(0.01)
+        # two more fit in the queue, the rest are asked to retry
+        self.assertEqual([self.post() for _ in range(4)], [200, 200, 503, 503])
+        self.assertEqual(self.server.stats()["dropped"], 2)
+        self.release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()